@@ -0,0 +1,117 @@
+"""End-to-end /classify load test against the fake LLM backend.
+
+Drives the thinkengine app in-process (httpx ASGI transport) with a fixed
+number of concurrent clients and reports latency percentiles, throughput
+and time spent in save_classification. No API key is needed: the app runs
+with LLM_BACKEND=fake and a fresh SQLite file.
+
+    python benchmarks/bench_classify.py --requests 200 --concurrency 16 --latency-ms 800
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+WORDS = ["모델", "학습", "데이터", "영상", "기획", "마케팅", "채널", "전략", "회고", "오늘",
+         "디자인", "화면", "보안", "취약점", "차트", "매매", "스토리", "캐릭터", "배포", "서버"]
+
+
+def make_memos(count, lines, repeat, seed):
+    rng = random.Random(seed)
+    memos = []
+    for _ in range(count):
+        if memos and rng.random() < repeat:
+            memos.append(rng.choice(memos))
+            continue
+        memos.append("\n".join(" ".join(rng.choices(WORDS, k=6)) + f" {rng.randint(0, 10**6)}"
+                               for _ in range(lines)))
+    return memos
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def drive(te, memos, concurrency):
+    import httpx
+
+    latencies, errors = [], 0
+    queue = list(enumerate(memos))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=te.app),
+                                 base_url="http://bench", timeout=None) as client:
+        async def worker():
+            nonlocal errors
+            while queue:
+                _, memo = queue.pop()
+                started = time.perf_counter()
+                response = await client.post("/classify", json={"memo": memo})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200 or "error" in response.json():
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return sorted(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--lines", type=int, default=8)
+    parser.add_argument("--repeat", type=float, default=0.0, help="fraction of memos that repeat an earlier one")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_MALFORMED_RATE": str(args.malformed_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "THINKENGINE_DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+    })
+    import thinkengine as te
+
+    save_times = []
+    save_classification = te.save_classification
+
+    def timed_save(*a, **kw):
+        started = time.perf_counter()
+        try:
+            return save_classification(*a, **kw)
+        finally:
+            save_times.append(time.perf_counter() - started)
+
+    te.save_classification = timed_save
+    te.on_startup()
+
+    memos = make_memos(args.requests, args.lines, args.repeat, args.seed)
+    latencies, errors, elapsed = asyncio.run(drive(te, memos, args.concurrency))
+    ms = [t * 1000 for t in latencies]
+
+    print(f"requests={args.requests} concurrency={args.concurrency} lines/memo={args.lines} "
+          f"fake latency={args.latency_ms:.0f}ms malformed={args.malformed_rate} repeat={args.repeat}")
+    print(f"throughput {len(ms) / elapsed:8.1f} req/s  errors {errors}")
+    print(f"latency    p50 {percentile(ms, 0.50):7.1f} ms  p95 {percentile(ms, 0.95):7.1f} ms  "
+          f"p99 {percentile(ms, 0.99):7.1f} ms")
+    if save_times:
+        save_ms = sorted(t * 1000 for t in save_times)
+        print(f"db write   {len(save_ms)} saves  mean {statistics.mean(save_ms):6.1f} ms  "
+              f"p95 {percentile(save_ms, 0.95):6.1f} ms  total {sum(save_ms) / 1000:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Concurrent classify-write throughput: default SQLite vs tuned (WAL) engine.
+
+Each writer thread persists memos the way thinkengine.save_classification
+does (memo row, category upsert, bulk memo_categories insert, one commit)
+against a fresh database file per mode.
+
+    python benchmarks/bench_db_write.py --writers 16 --memos 400 --lines 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy.orm import sessionmaker
+
+from common.category_index import CategoryIndex
+from common.sqlite import create_sqlite_engine
+from db import Base, Category, Memo, MemoCategory
+
+CATEGORIES = ["AI 개발", "콘텐츠 제작", "마케팅 전략", "개인 회고", "트레이딩 분석"]
+
+
+def write_memo(Session, index, memo_no, lines):
+    db = Session()
+    started = time.perf_counter()
+    try:
+        text = "\n".join(f"메모 {memo_no} 문장 {i}" for i in range(lines))
+        result = {"classification": {str(i + 1): CATEGORIES[i % len(CATEGORIES)] for i in range(lines)},
+                  "new_categories": []}
+        memo = Memo(text=text, created_at=datetime.now(), result_json=result)
+        db.add(memo)
+        db.flush()
+        ids, created = index.ensure(db, set(result["classification"].values()))
+        db.execute(MemoCategory.__table__.insert(), [
+            {"memo_id": memo.id, "category_id": ids[cat], "sentence_number": int(n), "sentence": f"문장 {n}"}
+            for n, cat in result["classification"].items()
+        ])
+        db.commit()
+        index.publish(created)
+        return time.perf_counter() - started, None
+    except Exception as e:
+        db.rollback()
+        return time.perf_counter() - started, e
+    finally:
+        db.close()
+
+
+def run(tuned, writers, memos, lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{tmp}/bench.db", tuned=tuned,
+                                      pool_size=writers, max_overflow=0)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        index = CategoryIndex(Category)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as pool:
+            outcomes = list(pool.map(lambda n: write_memo(Session, index, n, lines), range(memos)))
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    latencies = sorted(t * 1000 for t, err in outcomes if err is None)
+    errors = [err for _, err in outcomes if err is not None]
+    return {
+        "mode": "tuned (WAL)" if tuned else "default",
+        "memos/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95 ms": latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan"),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--memos", type=int, default=400)
+    parser.add_argument("--lines", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"writers={args.writers} memos={args.memos} lines/memo={args.lines}")
+    for tuned in (False, True):
+        row = run(tuned, args.writers, args.memos, args.lines)
+        print(f"{row['mode']:<12} {row['memos/s']:8.1f} memos/s  p50 {row['p50 ms']:7.1f} ms  "
+              f"p95 {row['p95 ms']:7.1f} ms  errors {row['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""input_api /memo/create: a new httpx client per memo vs the shared pooled client.
+
+Starts stub processing and storage servers on localhost (plain asyncio,
+real TCP, optional per-request latency) and drives both versions of the
+endpoint in-process: sequentially for per-memo latency, then with
+--concurrency requests in flight for sustained throughput. Also reports
+how many TCP connections the stubs accepted.
+
+    python benchmarks/bench_input_api.py --memos 500 --concurrency 32 --latency-ms 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+INPUT_API = os.path.join(os.path.dirname(__file__), "..", "services", "input_api")
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server answering every POST with a fixed JSON body."""
+
+    def __init__(self, body: dict, latency: float):
+        self.body = json.dumps(body).encode()
+        self.latency = latency
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                             % (len(self.body), self.body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def legacy_app(processing_url: str, storage_url: str) -> FastAPI:
+    """The previous create_memo: a fresh AsyncClient (and connections) per memo."""
+    app = FastAPI()
+
+    @app.post("/memo/create")
+    async def create_memo(memo: dict):
+        async with httpx.AsyncClient() as client:
+            try:
+                processing_resp = await client.post(processing_url, json={"text": memo["text"]})
+                processing_resp.raise_for_status()
+                storage_resp = await client.post(storage_url, json={"original_text": memo["text"],
+                                                                    **processing_resp.json()})
+                storage_resp.raise_for_status()
+            except httpx.RequestError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            return {"message": "Memo processed and stored!", "data": storage_resp.json()}
+
+    return app
+
+
+async def run(app, memos: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        for i in range(memos):
+            started = time.perf_counter()
+            (await client.post("/memo/create", json={"text": f"회의 메모 {i}"})).raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                (await client.post("/memo/create", json={"text": f"회의 메모 {i}"})).raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(memos)))
+        throughput = memos / (time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))], throughput
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memos", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    processing = StubServer({"summary": "회의", "tags": ["회의"], "category": "업무"}, args.latency_ms / 1000)
+    storage = StubServer({"id": 1, "summary": "회의", "tags": ["회의"], "category": "업무",
+                          "created_at": "2024-01-01T00:00:00"}, args.latency_ms / 1000)
+    processing_url = await processing.start() + "/process"
+    storage_url = await storage.start() + "/store"
+
+    os.environ["PROCESSING_URL"], os.environ["STORAGE_URL"] = processing_url, storage_url
+    sys.path.insert(0, INPUT_API)
+    import main as input_api
+
+    results = {}
+    for name, app in (("per-memo", legacy_app(processing_url, storage_url)), ("pooled", input_api.app)):
+        before = processing.connections + storage.connections
+        if app is input_api.app:
+            await input_api.open_http_client()
+        try:
+            results[name] = await run(app, args.memos, args.concurrency)
+        finally:
+            if app is input_api.app:
+                await input_api.close_http_client()
+        p50, p95, throughput = results[name]
+        print(f"{name:9s} p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  {throughput:7.1f} memos/s  "
+              f"{processing.connections + storage.connections - before} connections")
+    print(f"speedup   p50 x{results['per-memo'][0] / results['pooled'][0]:.2f}  "
+          f"throughput x{results['pooled'][2] / results['per-memo'][2]:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Keyword extraction cost: TF-IDF engine, one memo at a time vs batched.
+
+Builds document frequencies from the transcript lines in
+domains/youtube_transcripts (as a stand-in for the memo archive), then
+scores memos made of consecutive lines.
+
+    python benchmarks/bench_keywords.py --memos 5000 --lines 5
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from common.keywords import KeywordEngine
+
+TRANSCRIPTS = os.path.join(os.path.dirname(__file__), "..", "domains", "youtube_transcripts", "*.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memos", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = []
+    for path in sorted(glob.glob(TRANSCRIPTS)):
+        with open(path, encoding="utf-8") as f:
+            lines.extend(line.strip() for line in f if line.strip())
+    if not lines:
+        sys.exit(f"no transcripts found under {TRANSCRIPTS}")
+
+    engine = KeywordEngine()
+    started = time.perf_counter()
+    engine.load(lines)
+    print(f"df build   {len(lines)} docs in {time.perf_counter() - started:.2f} s")
+
+    memos = ["\n".join(lines[(i * args.lines + j) % len(lines)] for j in range(args.lines))
+             for i in range(args.memos)]
+
+    started = time.perf_counter()
+    single = [engine.top_k(memo, args.k) for memo in memos]
+    per_memo = (time.perf_counter() - started) / len(memos) * 1000
+    print(f"one-by-one {per_memo:.3f} ms/memo")
+
+    started = time.perf_counter()
+    batched = engine.top_k_batch(memos, args.k)
+    per_memo = (time.perf_counter() - started) / len(memos) * 1000
+    print(f"batched    {per_memo:.3f} ms/memo  (same keywords: {single == batched})")
+    print(f"example    {memos[0].splitlines()[0][:40]!r} -> {batched[0]}")
+
+
+if __name__ == "__main__":
+    main()
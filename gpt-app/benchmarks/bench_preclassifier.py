@@ -0,0 +1,105 @@
+"""LLM calls avoided vs agreement for the embedding pre-classifier.
+
+Splits labelled (sentence, category) rows from memo_categories into a
+train part that builds the centroids and a held-out part that is
+"classified". For each threshold it reports the share of held-out lines
+resolved locally (LLM lines avoided) and how often those local labels
+agree with the stored LLM label.
+
+    python benchmarks/bench_preclassifier.py --db sqlite:///thinkengine.db
+    python benchmarks/bench_preclassifier.py --synthetic 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import Category, MemoCategory
+from preclassifier import CentroidClassifier
+
+# --synthetic 용 카테고리별 어휘 (실제 데이터가 없을 때 동작 확인용)
+SYNTHETIC_VOCAB = {
+    "AI 개발": ["모델", "학습", "프롬프트", "임베딩", "파인튜닝", "추론", "데이터셋", "LLM"],
+    "콘텐츠 제작": ["촬영", "편집", "썸네일", "대본", "업로드", "콘텐츠", "영상", "자막"],
+    "마케팅 전략": ["광고", "타겟", "전환율", "캠페인", "브랜딩", "고객", "퍼널", "예산"],
+    "개인 회고": ["오늘", "느낌", "반성", "감정", "하루", "목표", "습관", "회고"],
+    "트레이딩 분석": ["차트", "매수", "매도", "손절", "포지션", "변동성", "지지선", "거래량"],
+}
+FILLER = ["그리고", "정말", "다시", "이번에", "조금", "내일", "해보자", "생각했다", "필요하다", "확인"]
+
+
+def load_rows(url):
+    Session = sessionmaker(bind=create_engine(url))
+    db = Session()
+    try:
+        return [(sentence, name) for sentence, name in
+                db.query(MemoCategory.sentence, Category.name)
+                .join(Category, MemoCategory.category_id == Category.id)]
+    finally:
+        db.close()
+
+
+def synthetic_rows(n, rng):
+    rows = []
+    for _ in range(n):
+        cat = rng.choice(list(SYNTHETIC_VOCAB))
+        words = rng.sample(SYNTHETIC_VOCAB[cat], 2) + rng.sample(FILLER, 3)
+        if rng.random() < 0.3:  # 다른 카테고리 단어가 섞인 애매한 문장
+            words.append(rng.choice(SYNTHETIC_VOCAB[rng.choice(list(SYNTHETIC_VOCAB))]))
+        rng.shuffle(words)
+        rows.append((" ".join(words), cat))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="sqlite:///thinkengine.db")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N labelled lines instead of reading --db")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--margin", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = synthetic_rows(args.synthetic, rng) if args.synthetic else load_rows(args.db)
+    rows = [(s, c) for s, c in rows if s.strip() and c != "분류 안됨"]
+    if len(rows) < 20:
+        print("Not enough labelled memo_categories rows; use --synthetic N to try it out.")
+        return
+    rng.shuffle(rows)
+    split = int(len(rows) * (1 - args.test_fraction))
+    train, test = rows[:split], rows[split:]
+
+    clf = CentroidClassifier(threshold=0.0, margin=args.margin)
+    started = time.perf_counter()
+    clf.update(train)
+    build_s = time.perf_counter() - started
+    lines = [s for s, _ in test]
+    started = time.perf_counter()
+    names, sims = clf.scores(lines)
+    score_ms = (time.perf_counter() - started) * 1000
+
+    print(f"train={len(train)} test={len(test)} categories={len(names)} "
+          f"build={build_s:.2f}s score={score_ms / len(test):.3f} ms/line")
+    print(f"{'threshold':>9} {'LLM avoided':>12} {'agreement':>10}")
+    best = sims.argmax(axis=1)
+    top = sims.max(axis=1)
+    second = sims.copy()
+    second[range(len(best)), best] = -1
+    margin_ok = top - second.max(axis=1) >= args.margin if len(names) > 1 else top >= 0
+    for threshold in (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8):
+        local = [(names[best[i]], test[i][1]) for i in range(len(test))
+                 if top[i] >= threshold and margin_ok[i]]
+        avoided = len(local) / len(test)
+        agreement = sum(pred == gold for pred, gold in local) / len(local) if local else float("nan")
+        print(f"{threshold:>9.2f} {avoided:>11.1%} {agreement:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
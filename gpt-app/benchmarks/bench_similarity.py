@@ -0,0 +1,72 @@
+"""Similarity index: query latency and recall of the IVF index vs exact search.
+
+Fills an IVFIndex with synthetic clustered unit vectors (quantized the
+way saved sentences are) and compares top-k results against brute force.
+
+    python benchmarks/bench_similarity.py --sentences 1000000 --queries 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_index import IVFIndex, SIMILARITY_DIM, dequantize, quantize
+
+
+def synthetic(n, centers, rng):
+    x = centers[rng.integers(0, len(centers), n)] + 0.8 * rng.standard_normal((n, centers.shape[1])).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=SIMILARITY_DIM)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # 문장 주제(군집) 중심을 한 번만 만들고 데이터와 질의 모두 같은 분포에서 뽑음
+    centers = rng.standard_normal((2000, args.dim)).astype(np.float32)
+    index = IVFIndex(args.dim, nprobe=args.nprobe)
+    started = time.perf_counter()
+    for start in range(0, args.sentences, 100000):
+        x = synthetic(min(100000, args.sentences - start), centers, rng)
+        codes, scales = quantize(x)
+        ids = np.arange(start, start + len(x))
+        index.add(ids, np.ones(len(x), dtype=np.int32), codes, scales, train=False)
+    print(f"add       {args.sentences} rows in {time.perf_counter() - started:.1f} s "
+          f"({index._codes[:len(index)].nbytes / 2**20:.0f} MiB int8)")
+
+    queries = synthetic(args.queries, centers, rng)
+    exact = []
+    flat = dequantize(index._codes[:len(index)], index._scales[:len(index)])
+    for q in queries:
+        exact.append(set(np.argpartition(-(flat @ q), args.k)[:args.k].tolist()))
+    del flat
+
+    started = time.perf_counter()
+    index.maybe_retrain(background=False)
+    print(f"train     {time.perf_counter() - started:.1f} s, {len(index._lists)} lists")
+
+    latencies, recall = [], []
+    for q, truth in zip(queries, exact):
+        t = time.perf_counter()
+        hits = index.search(q[None, :], args.k)[0]
+        latencies.append((time.perf_counter() - t) * 1000)
+        recall.append(len({m for m, _, _ in hits} & truth) / args.k)
+    latencies.sort()
+    print(f"search    p50 {statistics.median(latencies):.2f} ms  p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms  "
+          f"recall@{args.k} {statistics.mean(recall):.3f} (nprobe={args.nprobe})")
+
+
+if __name__ == "__main__":
+    main()
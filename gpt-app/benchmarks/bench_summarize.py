@@ -0,0 +1,62 @@
+"""processing TextRank summarizer: throughput and scaling on the transcript corpus.
+
+Summarizes memo-sized chunks of the transcripts in domains/youtube_transcripts
+one at a time and as one batch, then times whole transcripts repeated
+1, 2, 4 and 8 times to show cost growing linearly with sentence count.
+
+    python benchmarks/bench_summarize.py --memos 2000 --lines 10
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "processing"))
+
+import nlp
+
+TRANSCRIPTS = os.path.join(os.path.dirname(__file__), "..", "domains", "youtube_transcripts", "*.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memos", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--sentences", type=int, default=3)
+    args = parser.parse_args()
+
+    transcripts = []
+    for path in sorted(glob.glob(TRANSCRIPTS)):
+        with open(path, encoding="utf-8") as f:
+            transcripts.append(f.read())
+    if not transcripts:
+        sys.exit(f"no transcripts found under {TRANSCRIPTS}")
+    lines = [line for text in transcripts for line in text.splitlines() if line.strip()]
+    memos = ["\n".join(lines[(i * args.lines + j) % len(lines)] for j in range(args.lines))
+             for i in range(args.memos)]
+
+    started = time.perf_counter()
+    single = [nlp.simple_summarize(memo, args.sentences) for memo in memos]
+    per_memo = (time.perf_counter() - started) / len(memos) * 1000
+    print(f"one-by-one {per_memo:.3f} ms/memo")
+
+    started = time.perf_counter()
+    batched = nlp.summarize_batch(memos, args.sentences)
+    per_memo = (time.perf_counter() - started) / len(memos) * 1000
+    print(f"batched    {per_memo:.3f} ms/memo  (same summaries: {single == batched})")
+
+    longest = max(transcripts, key=len)
+    for times in (1, 2, 4, 8):
+        text = "\n".join([longest] * times)
+        sentences = len(nlp.split_sentences(text))
+        started = time.perf_counter()
+        nlp.simple_summarize(text, args.sentences)
+        elapsed = time.perf_counter() - started
+        print(f"long x{times}    {sentences:6d} sentences  {elapsed * 1000:8.1f} ms  "
+              f"{elapsed / sentences * 1e6:6.1f} us/sentence")
+    print(f"example    {nlp.simple_summarize(transcripts[0], args.sentences)[:120]!r}")
+
+
+if __name__ == "__main__":
+    main()
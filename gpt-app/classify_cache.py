@@ -0,0 +1,180 @@
+"""Content-addressed cache for classify_memo results.
+
+Two tiers: a bounded in-process LRU in front of the classification_cache
+table in thinkengine.db. Entries expire after a TTL and both tiers are
+trimmed by size, least recently used first.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from db import SessionLocal, ClassificationCache
+
+CACHE_MEMORY_ENTRIES = int(os.getenv("CLASSIFY_CACHE_MEMORY_ENTRIES", "1024"))
+CACHE_MAX_ROWS = int(os.getenv("CLASSIFY_CACHE_MAX_ROWS", "100000"))
+CACHE_TTL_SECONDS = int(os.getenv("CLASSIFY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# 몇 번 저장할 때마다 DB 티어의 만료/초과 행을 정리할지
+PRUNE_EVERY = 100
+
+
+def normalize_memo(text: str) -> str:
+    """Normalize memo text so trivially different submissions share a key.
+
+    Line structure is kept because classification is keyed by line number.
+    """
+    text = unicodedata.normalize("NFC", text).strip()
+    return "\n".join(re.sub(r"\s+", " ", line).strip() for line in text.splitlines())
+
+
+def make_cache_key(text: str, categories: List[str], model: str,
+                   prompt_version: str, use_structured_output: bool) -> str:
+    payload = json.dumps(
+        [normalize_memo(text), list(categories), model, prompt_version, bool(use_structured_output)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, memory_entries: int = CACHE_MEMORY_ENTRIES,
+                 max_rows: int = CACHE_MAX_ROWS, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.memory_entries = memory_entries
+        self.max_rows = max_rows
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._lru = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._sets = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: datetime) -> bool:
+        return datetime.utcnow() - stored_at > self.ttl
+
+    def _remember(self, key: str, stored_at: datetime, result: Dict):
+        with self._lock:
+            self._lru[key] = (stored_at, result)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result or None. Blocking on a memory miss."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._lru[key]
+
+        db = SessionLocal()
+        try:
+            row = db.get(ClassificationCache, key)
+            if row is None or self._expired(row.created_at):
+                if row is not None:
+                    db.delete(row)
+                    db.commit()
+                with self._lock:
+                    self.misses += 1
+                return None
+            row.hits += 1
+            row.last_hit_at = datetime.utcnow()
+            db.commit()
+            stored_at, result = row.created_at, row.result_json
+        finally:
+            db.close()
+
+        self._remember(key, stored_at, result)
+        with self._lock:
+            self.db_hits += 1
+        return result
+
+    def get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """get for several keys at once: memory first, then one query for the rest."""
+        results: Dict[str, Dict] = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._lru.get(key)
+                if entry is not None and not self._expired(entry[0]):
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    results[key] = entry[1]
+                else:
+                    self._lru.pop(key, None)
+                    missing.append(key)
+
+        found = []
+        if missing:
+            db = SessionLocal()
+            try:
+                now = datetime.utcnow()
+                for row in db.query(ClassificationCache).filter(ClassificationCache.key.in_(missing)):
+                    if self._expired(row.created_at):
+                        db.delete(row)
+                        continue
+                    row.hits += 1
+                    row.last_hit_at = now
+                    found.append((row.key, row.created_at, row.result_json))
+                db.commit()
+            finally:
+                db.close()
+
+        for key, stored_at, result in found:
+            self._remember(key, stored_at, result)
+            results[key] = result
+        with self._lock:
+            self.db_hits += len(found)
+            self.misses += len(missing) - len(found)
+        return [results.get(key) for key in keys]
+
+    def set(self, key: str, result: Dict):
+        now = datetime.utcnow()
+        self._remember(key, now, result)
+        db = SessionLocal()
+        try:
+            db.merge(ClassificationCache(key=key, result_json=result, created_at=now,
+                                         last_hit_at=now, hits=0))
+            db.commit()
+            self._sets += 1
+            if self._sets % PRUNE_EVERY == 0:
+                self._prune(db)
+        finally:
+            db.close()
+
+    def _prune(self, db):
+        db.query(ClassificationCache).filter(
+            ClassificationCache.created_at < datetime.utcnow() - self.ttl
+        ).delete(synchronize_session=False)
+        overflow = db.query(ClassificationCache).count() - self.max_rows
+        if overflow > 0:
+            oldest = (db.query(ClassificationCache.key)
+                      .order_by(ClassificationCache.last_hit_at)
+                      .limit(overflow)
+                      .subquery())
+            db.query(ClassificationCache).filter(
+                ClassificationCache.key.in_(oldest.select())
+            ).delete(synchronize_session=False)
+        db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._lru),
+            }
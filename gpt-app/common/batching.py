@@ -0,0 +1,80 @@
+"""Pack several memos into one classification prompt and split the answer.
+
+Shared by thinkengine and the llm-categorizer router.
+"""
+from typing import Dict, List, Tuple
+
+from common.json_repair import loads_repaired
+from common.tokens import count_tokens
+
+BATCH_SYSTEM_PROMPT = "당신은 메모 분류 전문가입니다. 반드시 JSON 스키마에 맞춰 한국어로만 응답하세요."
+
+
+def pack_by_budget(texts: List[str], token_budget: int, overhead: int = 300) -> List[List[int]]:
+    """Greedily group memo indexes so each group's prompt stays under token_budget.
+
+    A memo that alone exceeds the budget gets its own group.
+    """
+    groups, current, used = [], [], overhead
+    for idx, text in enumerate(texts):
+        cost = count_tokens(text) + 20
+        if current and used + cost > token_budget:
+            groups.append(current)
+            current, used = [], overhead
+        current.append(idx)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def build_batch_prompt(texts: List[str], categories: List[str]) -> str:
+    memos = []
+    for memo_no, text in enumerate(texts, 1):
+        lines = "\n".join(f"{i}. {line}" for i, line in enumerate(text.strip().splitlines(), 1))
+        memos.append(f"### 메모 {memo_no}\n{lines}")
+    joined = "\n\n".join(memos)
+    return f"""
+    당신은 분류 전문가입니다. 아래 여러 개의 메모 각각에 대해, 메모의 각 문장을 기존 카테고리 중 하나에 분류하거나, 기존 카테고리에 맞지 않으면 새로운 카테고리명을 직접 만들어서 분류하세요.
+    메모는 "### 메모 번호" 로 구분되며, 문장 번호는 메모마다 1부터 시작합니다.
+
+    반드시 아래와 같은 JSON 형식으로만 응답하세요. 예시:
+    {{
+    "results": {{
+        "1": {{
+            "classification": {{"1": "카테고리명", "2": "카테고리명"}},
+            "new_categories": ["새로운카테고리"]
+        }},
+        "2": {{
+            "classification": {{"1": "카테고리명"}},
+            "new_categories": []
+        }}
+    }}
+    }}
+
+    기존 카테고리: {', '.join(categories)}
+
+    {joined}
+    """
+
+
+def split_batch_result(content: str, count: int) -> List[Tuple[Dict, str]]:
+    """Split a batch completion into per-memo (result, error) pairs.
+
+    Exactly one of result/error is set for each memo, in prompt order.
+    """
+    try:
+        results = loads_repaired(content).get("results", {})
+    except Exception as e:
+        return [(None, f"Failed to parse batch output as JSON: {e}")] * count
+    out = []
+    for memo_no in range(1, count + 1):
+        item = results.get(str(memo_no))
+        if not isinstance(item, dict) or not isinstance(item.get("classification"), dict):
+            out.append((None, f"Memo {memo_no} missing from batch output"))
+            continue
+        out.append(({
+            "classification": {str(k): v for k, v in item["classification"].items()},
+            "new_categories": item.get("new_categories") or [],
+        }, None))
+    return out
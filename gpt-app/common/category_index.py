@@ -0,0 +1,64 @@
+"""Process-wide category name -> id index with bulk upsert.
+
+Replaces the per-line ``query(Category).filter_by(name=...)`` + commit loop:
+known names resolve from memory, missing ones are created with one
+``INSERT ... ON CONFLICT DO NOTHING`` followed by one SELECT.
+"""
+import threading
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def _insert_for(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Category upsert is not supported on {dialect}")
+
+
+class CategoryIndex:
+    def __init__(self, model):
+        self.model = model
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def warm(self, db):
+        """Load every existing category. Call once at startup."""
+        ids = {name: id_ for id_, name in db.query(self.model.id, self.model.name)}
+        with self._lock:
+            self._ids = ids
+
+    def ensure(self, db, names: Iterable[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Resolve names to ids, creating missing categories on db's transaction.
+
+        Returns (ids, created). Newly created categories are only added to the
+        index by publish() once the caller's transaction has committed, so a
+        rollback never leaves dangling ids behind.
+        """
+        names = set(names)
+        with self._lock:
+            ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = names - ids.keys()
+        if not missing:
+            return ids, {}
+
+        insert = _insert_for(db)
+        db.execute(
+            insert(self.model.__table__)
+            .values([{"name": name} for name in sorted(missing)])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        ids.update({name: id_ for id_, name in
+                    db.query(self.model.id, self.model.name).filter(self.model.name.in_(missing))})
+        return ids, {name: ids[name] for name in missing}
+
+    def publish(self, created: Dict[str, int]):
+        if created:
+            with self._lock:
+                self._ids.update(created)
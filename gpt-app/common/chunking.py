@@ -0,0 +1,28 @@
+"""Split long memos into token-budgeted chunks of whole lines.
+
+Chunks carry the original 1-based line numbers so per-chunk
+classifications can be mapped back onto the global numbering.
+"""
+from typing import List
+
+from common.tokens import DEFAULT_MODEL, count_tokens
+
+
+def chunk_line_numbers(lines: List[str], numbers: List[int], token_budget: int,
+                       model: str = DEFAULT_MODEL) -> List[List[int]]:
+    """Group the given line numbers, in order, into chunks under token_budget.
+
+    A single line larger than the budget becomes a chunk of its own.
+    """
+    chunks, current, used = [], [], 0
+    for idx in numbers:
+        # 프롬프트에는 "n. 문장\n" 형태로 들어가므로 번호/줄바꿈 몫을 더함
+        cost = count_tokens(lines[idx - 1], model) + 3
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
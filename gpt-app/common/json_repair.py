@@ -0,0 +1,30 @@
+"""Repair the usual ways a model breaks JSON before giving up on its answer.
+
+Shared by thinkengine, the batch splitter and the llm-categorize domain.
+"""
+import json
+import re
+from typing import Any
+
+
+def fix_json(json_str):
+    """Fix common JSON issues that cause parsing errors"""
+    # Replace single quotes with double quotes (common mistake in JSON)
+    fixed = re.sub(r"'([^']*)':", r'"\1":', json_str)
+    # Fix trailing commas in lists/objects (not allowed in JSON)
+    fixed = re.sub(r",\s*}", "}", fixed)
+    fixed = re.sub(r",\s*\]", "]", fixed)
+    # Add double quotes around property names that are missing them
+    fixed = re.sub(r"([{,])\s*(\w+):", r'\1"\2":', fixed)
+    return fixed
+
+
+def loads_repaired(content: str) -> Any:
+    """json.loads, retrying once on the fix_json'd outermost {...} if the raw text doesn't parse."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        fixed = fix_json(content)
+        # 앞뒤에 설명이 붙어 있으면 JSON 부분만 사용
+        json_match = re.search(r'(\{[\s\S]*\})', fixed)
+        return json.loads(json_match.group(1) if json_match else fixed)
@@ -0,0 +1,153 @@
+"""TF-IDF keyword extraction shared by thinkengine and the categorizer.
+
+Tokens are Hangul runs with trailing particles/endings stripped, plus
+Latin words and numbers. Document frequencies are kept incrementally over
+stored memos (add_documents on save, a bulk load at startup), and scoring
+runs over a whole batch of memos at once with numpy. Ties break on first
+occurrence, so the same text and corpus always give the same keywords.
+"""
+import re
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[A-Za-z][A-Za-z0-9+#]*|\d+(?:\.\d+)?")
+
+# 길이가 긴 것부터 검사해서 "에서" 가 "서" 보다 먼저 떨어지게 함
+_SUFFIXES = sorted([
+    "입니다", "합니다", "습니다", "했습니다", "됩니다", "였다", "이었다", "했다", "한다", "하는", "하고",
+    "해서", "하기", "하게", "했던", "했고", "하며", "하다", "되는", "된다", "이다", "이고", "이며", "한",
+    "에서는", "에서", "에게", "한테", "으로", "부터", "까지", "처럼", "보다", "라고", "이라",
+    "은", "는", "이", "가", "을", "를", "에", "로", "와", "과", "의", "도", "만", "랑",
+], key=len, reverse=True)
+
+_STOPWORDS = {
+    # 한국어
+    "그리고", "하지만", "그러나", "그래서", "또한", "그런데", "이것", "그것", "저것", "여기", "거기",
+    "있다", "없다", "있는", "없는", "같은", "같다", "그런", "이런", "저런", "정말", "너무", "아주",
+    "모든", "우리", "저희", "나는", "저는", "그냥", "위한", "대한", "통해", "때문", "경우", "어떤",
+    "되다", "하면", "해야", "있습니다", "없습니다", "그래", "근데", "이제", "다시", "진짜",
+    # English
+    "the", "and", "for", "with", "that", "this", "from", "are", "was", "were", "you", "your",
+    "have", "has", "not", "but", "can", "will", "all", "our", "its", "into", "about", "just",
+}
+
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        # 어간이 두 글자 이상 남을 때만 떼어냄 ("회의" 의 "의" 는 유지)
+        if len(token) - len(suffix) >= 2 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for raw in _TOKEN_RE.findall(text):
+        if raw[0] >= "가":
+            token = _stem(raw)
+            if len(token) < 2:
+                continue
+        else:
+            token = raw.lower()
+            if len(token) < 2 and not token.isdigit():
+                continue
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class KeywordEngine:
+    def __init__(self):
+        self._vocab = {}
+        self._df = np.zeros(1024, dtype=np.int64)
+        self.n_docs = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.n_docs
+
+    def add_documents(self, texts: Iterable[str]):
+        """Count each text once towards the document frequency of its terms."""
+        with self._lock:
+            for text in texts:
+                ids = [self._vocab.setdefault(term, len(self._vocab)) for term in set(tokenize(text))]
+                if len(self._vocab) > len(self._df):
+                    grown = np.zeros(max(len(self._vocab), 2 * len(self._df)), dtype=np.int64)
+                    grown[:len(self._df)] = self._df
+                    self._df = grown
+                if ids:
+                    self._df[ids] += 1
+                self.n_docs += 1
+
+    def load(self, texts: Iterable[str], batch_size: int = 2000):
+        """Rebuild document frequencies from scratch, e.g. from a yield_per query over stored memos."""
+        with self._lock:
+            self._vocab = {}
+            self._df = np.zeros(1024, dtype=np.int64)
+            self.n_docs = 0
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                self.add_documents(batch)
+                batch = []
+        self.add_documents(batch)
+
+    def top_k_batch(self, texts: List[str], k: int = 5) -> List[List[str]]:
+        """Top-k terms per text by sublinear tf * smoothed idf, scored in one pass."""
+        docs, terms, positions = [], [], []
+        local = {}
+        for doc, text in enumerate(texts):
+            for pos, token in enumerate(tokenize(text)):
+                docs.append(doc)
+                terms.append(local.setdefault(token, len(local)))
+                positions.append(pos)
+        out = [[] for _ in texts]
+        if not docs:
+            return out
+
+        names = list(local)
+        with self._lock:
+            global_ids = np.array([self._vocab.get(name, -1) for name in names], dtype=np.int64)
+            df = np.where(global_ids >= 0, self._df[np.maximum(global_ids, 0)], 0)
+            n_docs = self.n_docs
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+        docs = np.asarray(docs, dtype=np.int64)
+        terms = np.asarray(terms, dtype=np.int64)
+        # (문서, 단어) 쌍마다 등장 횟수와 첫 등장 위치
+        pair_keys, first, counts = np.unique(docs * len(names) + terms, return_index=True, return_counts=True)
+        pair_docs, pair_terms = pair_keys // len(names), pair_keys % len(names)
+        scores = (1.0 + np.log(counts)) * idf[pair_terms]
+        first_pos = np.asarray(positions, dtype=np.int64)[first]
+
+        order = np.lexsort((first_pos, -scores, pair_docs))
+        pair_docs, pair_terms = pair_docs[order], pair_terms[order]
+        starts = np.searchsorted(pair_docs, np.arange(len(texts)))
+        ends = np.searchsorted(pair_docs, np.arange(len(texts)), side="right")
+        for doc in range(len(texts)):
+            out[doc] = [names[t] for t in pair_terms[starts[doc]:min(ends[doc], starts[doc] + k)]]
+        return out
+
+    def top_k(self, text: str, k: int = 5) -> List[str]:
+        return self.top_k_batch([text], k)[0]
+
+
+default_engine = KeywordEngine()
+
+
+def summarize_first_sentence(text: str) -> str:
+    return text.split('.')[0] if '.' in text else text.split('\n')[0]
+
+
+def extract_metadata(text: str, engine: Optional[KeywordEngine] = None, k: int = 5) -> Tuple[str, List[str]]:
+    """(summary, keywords) for a memo: first sentence plus top-k TF-IDF keywords."""
+    return summarize_first_sentence(text), (default_engine if engine is None else engine).top_k(text, k)
+
+
+def extract_metadata_batch(texts: List[str], engine: Optional[KeywordEngine] = None,
+                           k: int = 5) -> List[Tuple[str, List[str]]]:
+    keywords = (default_engine if engine is None else engine).top_k_batch(texts, k)
+    return [(summarize_first_sentence(text), kws) for text, kws in zip(texts, keywords)]
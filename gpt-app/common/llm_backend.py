@@ -0,0 +1,196 @@
+"""Pluggable chat-completion backends.
+
+OpenAIBackend talks to the real API; FakeBackend answers locally with
+configurable latency and category distribution (and, optionally, broken
+JSON) so the classify pipeline can be exercised and load-tested without
+an API key. Select one with LLM_BACKEND=openai|fake.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from common.metrics import llm_request_seconds, llm_requests_total, record_usage
+from common.tokens import count_tokens
+
+DEFAULT_FAKE_CATEGORIES = {
+    "AI 개발": 5, "콘텐츠 제작": 3, "마케팅 전략": 2, "개인 회고": 3,
+    "트레이딩 분석": 1, "스토리텔링 설계": 1, "UI/UX 디자인": 1,
+    "보안 위험": 1, "YouTube 기획": 2,
+}
+
+
+@contextmanager
+def observe_call(model: str):
+    """Record latency and outcome of one completion into the LLM metrics."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        llm_requests_total.inc(model=model, outcome="error")
+        raise
+    else:
+        llm_requests_total.inc(model=model, outcome="ok")
+    finally:
+        llm_request_seconds.observe(time.perf_counter() - started, model=model)
+
+
+def _record_response_usage(model, usage):
+    if usage is not None:
+        record_usage(model, usage.prompt_tokens, usage.completion_tokens)
+
+
+class LLMBackend(ABC):
+    """Interface: return the assistant message content for a chat request."""
+
+    @abstractmethod
+    async def complete(self, model: str, messages: List[Dict], **kwargs) -> str:
+        ...
+
+    async def stream(self, model: str, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        yield await self.complete(model, messages, **kwargs)
+
+    @abstractmethod
+    def complete_sync(self, model: str, messages: List[Dict], **kwargs) -> str:
+        ...
+
+
+class OpenAIBackend(LLMBackend):
+    def __init__(self, api_key: str, timeout: float = 60.0):
+        from openai import AsyncOpenAI, OpenAI
+        self.timeout = timeout
+        self.async_client = AsyncOpenAI(api_key=api_key, timeout=timeout)
+        self.client = OpenAI(api_key=api_key, timeout=timeout)
+
+    async def complete(self, model, messages, **kwargs):
+        with observe_call(model):
+            response = await self.async_client.chat.completions.create(
+                model=model, messages=messages, timeout=self.timeout, **kwargs)
+        _record_response_usage(model, response.usage)
+        return response.choices[0].message.content
+
+    async def stream(self, model, messages, **kwargs):
+        with observe_call(model):
+            # 마지막 청크에 usage 가 실려 오도록 요청
+            stream = await self.async_client.chat.completions.create(
+                model=model, messages=messages, stream=True, timeout=self.timeout,
+                stream_options={"include_usage": True}, **kwargs)
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    _record_response_usage(model, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    def complete_sync(self, model, messages, **kwargs):
+        with observe_call(model):
+            response = self.client.chat.completions.create(
+                model=model, messages=messages, timeout=self.timeout, **kwargs)
+        _record_response_usage(model, response.usage)
+        return response.choices[0].message.content
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic local stand-in for the classification prompts.
+
+    The same prompt always gets the same answer (per seed). Latency is
+    latency_ms +/- jitter; malformed_rate of answers use single quotes and
+    trailing commas, the breakage fix_json is meant to repair. Streamed
+    answers that are malformed yield no per-line pairs; only the final
+    repaired parse sees them.
+    """
+
+    def __init__(self, latency_ms: float = 800.0, jitter: float = 0.3,
+                 categories: Optional[Dict[str, float]] = None, new_category_rate: float = 0.05,
+                 malformed_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.categories = categories or DEFAULT_FAKE_CATEGORIES
+        self.new_category_rate = new_category_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+
+    def _rng(self, messages):
+        return random.Random(f"{self.seed}:{messages[-1]['content']}")
+
+    def _delay(self, rng) -> float:
+        return self.latency_ms / 1000 * rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _classify(self, body: str, rng):
+        numbered = re.findall(r"^\s*(\d+)\.\s", body, re.M)
+        count = len(numbered) or len([line for line in body.strip().splitlines()
+                                      if line.strip() and not re.match(r"\s*(요약|키워드):", line)])
+        names, weights = list(self.categories), list(self.categories.values())
+        classification, new_categories = {}, []
+        for n in range(1, count + 1):
+            if rng.random() < self.new_category_rate:
+                cat = f"새 카테고리 {rng.randint(1, 50)}"
+                if cat not in new_categories:
+                    new_categories.append(cat)
+            else:
+                cat = rng.choices(names, weights)[0]
+            classification[str(n)] = cat
+        return {"classification": classification, "new_categories": new_categories}
+
+    def _answer(self, model, messages, rng) -> str:
+        prompt = messages[-1]["content"]
+        memos = re.split(r"^\s*### 메모 (\d+)\s*$", prompt, flags=re.M)
+        if len(memos) > 1:
+            # 배치 프롬프트: [머리말, 번호, 본문, 번호, 본문, ...]
+            answer = {"results": {memos[i]: self._classify(memos[i + 1], rng) for i in range(1, len(memos), 2)}}
+        else:
+            body = re.split(r"메모:|문서:", prompt)[-1]
+            answer = self._classify(body, rng)
+        text = json.dumps(answer, ensure_ascii=False)
+        if rng.random() < self.malformed_rate:
+            text = re.sub(r'"([^"]*)":', r"'\1':", text).replace("}", ",}").replace("]", ",]")
+        # usage 는 실제 API 처럼 토큰 수로 기록 (tiktoken 이 없으면 추정치)
+        record_usage(model, sum(count_tokens(m["content"]) for m in messages), count_tokens(text))
+        return text
+
+    async def complete(self, model, messages, **kwargs):
+        rng = self._rng(messages)
+        with observe_call(model):
+            await asyncio.sleep(self._delay(rng))
+            return self._answer(model, messages, rng)
+
+    async def stream(self, model, messages, **kwargs):
+        rng = self._rng(messages)
+        with observe_call(model):
+            delay = self._delay(rng)
+            text = self._answer(model, messages, rng)
+            pieces = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+            for piece in pieces:
+                await asyncio.sleep(delay / len(pieces))
+                yield piece
+
+    def complete_sync(self, model, messages, **kwargs):
+        rng = self._rng(messages)
+        with observe_call(model):
+            time.sleep(self._delay(rng))
+            return self._answer(model, messages, rng)
+
+
+def fake_backend_from_env() -> FakeBackend:
+    return FakeBackend(
+        latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "800")),
+        jitter=float(os.getenv("FAKE_LLM_JITTER", "0.3")),
+        new_category_rate=float(os.getenv("FAKE_LLM_NEW_CATEGORY_RATE", "0.05")),
+        malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+    )
+
+
+def get_backend(api_key: Optional[str] = None, timeout: float = 60.0) -> LLMBackend:
+    kind = os.getenv("LLM_BACKEND", "openai")
+    if kind == "fake":
+        return fake_backend_from_env()
+    if kind != "openai":
+        raise RuntimeError(f"Unknown LLM_BACKEND: {kind}")
+    if not api_key:
+        raise RuntimeError("OpenAI API key is required for LLM_BACKEND=openai")
+    return OpenAIBackend(api_key, timeout=timeout)
@@ -0,0 +1,158 @@
+"""In-process Prometheus metrics for the classify pipeline.
+
+A tiny counter/histogram registry rendered in the Prometheus text format
+on /metrics, so no client library or external collector is needed.
+Recording is a lock plus a bisect, cheap enough to wrap every stage.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = _label_str(self.labelnames, key, 'le="%s"' % le)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, doc: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, doc, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, doc: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, doc, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+stage_seconds = REGISTRY.histogram(
+    "classify_stage_seconds", "Time spent in each classify pipeline stage.", ["stage"])
+request_seconds = REGISTRY.histogram(
+    "classify_request_seconds", "End-to-end classify handler latency.", ["endpoint"])
+requests_total = REGISTRY.counter(
+    "classify_requests_total", "Classify requests by outcome.", ["endpoint", "outcome"])
+llm_request_seconds = REGISTRY.histogram(
+    "llm_request_seconds", "Latency of a single LLM completion.", ["model"])
+llm_requests_total = REGISTRY.counter(
+    "llm_requests_total", "LLM completions by outcome.", ["model", "outcome"])
+llm_tokens_total = REGISTRY.counter(
+    "llm_tokens_total", "Tokens reported by the completion usage block.", ["model", "type"])
+
+
+def span(stage: str):
+    """Context manager timing one pipeline stage into classify_stage_seconds."""
+    return stage_seconds.time(stage=stage)
+
+
+def record_usage(model: str, prompt_tokens, completion_tokens):
+    if prompt_tokens:
+        llm_tokens_total.inc(prompt_tokens, model=model, type="prompt")
+    if completion_tokens:
+        llm_tokens_total.inc(completion_tokens, model=model, type="completion")
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing classify requests until the last body byte is sent.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streamed (SSE) responses
+    are measured end to end and not buffered.
+    """
+
+    def __init__(self, app, prefixes=("/classify",)):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(self.prefixes):
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_seconds.observe(time.perf_counter() - started, endpoint=path)
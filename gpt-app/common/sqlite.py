@@ -0,0 +1,43 @@
+"""SQLite engine factory shared by thinkengine and llm-categorizer.
+
+Tuned mode switches the database to WAL so readers no longer block the
+single writer, relaxes fsync to once per checkpoint (synchronous=NORMAL is
+safe under WAL), enlarges the page cache, memory-maps the file and makes
+writers wait on a busy lock instead of failing with "database is locked".
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",      # 64MB (음수는 KiB 단위)
+    "PRAGMA mmap_size=268435456",    # 256MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=30000",
+)
+
+
+def create_sqlite_engine(url: str, tuned: bool = True, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+    if not tuned:
+        # 기존 동작: 기본 journal 모드, 기본 풀
+        return create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        **kwargs,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
@@ -0,0 +1,37 @@
+"""Token counting for prompt budgeting.
+
+Uses tiktoken when it is installed so budgets match what the model
+actually sees; otherwise falls back to a conservative byte-based estimate
+and logs a warning the first time it does.
+"""
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o"
+_fallback_warned = False
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    if tiktoken is None:
+        global _fallback_warned
+        if not _fallback_warned:
+            logger.warning("tiktoken is not installed; token counts are estimated from UTF-8 length")
+            _fallback_warned = True
+        # 한글은 대략 글자당 1토큰 이상이라 UTF-8 바이트 수 / 3 으로 보수적으로 추정
+        return len(text.encode("utf-8")) // 3 + 1
+    return len(_encoding(model).encode(text, disallowed_special=()))
@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, JSON, LargeBinary, Float
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from datetime import datetime
+import os
+
+from common.sqlite import create_sqlite_engine
 
 Base = declarative_base()
 
@@ -29,9 +32,59 @@ class MemoCategory(Base):
     memo = relationship('Memo', back_populates='categories')
     category = relationship('Category', back_populates='memos')
 
-engine = create_engine('sqlite:///thinkengine.db')
-SessionLocal = sessionmaker(bind=engine)
+class SentenceEmbedding(Base):
+    __tablename__ = 'sentence_embeddings'
+    memo_id = Column(Integer, ForeignKey('memos.id'), primary_key=True)
+    sentence_number = Column(Integer, primary_key=True)
+    vector = Column(LargeBinary, nullable=False)  # int8 양자화 벡터 (vector_index.quantize)
+    scale = Column(Float, nullable=False)
+
+class ClassificationCache(Base):
+    __tablename__ = 'classification_cache'
+    key = Column(String(64), primary_key=True)
+    result_json = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, index=True)
+    hits = Column(Integer, default=0, nullable=False)
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    response_json = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
-# Create tables if not exist
+class ClassifyJob(Base):
+    __tablename__ = 'classify_jobs'
+    id = Column(String(32), primary_key=True)
+    memo = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default='queued', index=True)  # queued/running/done/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True)
+    result_json = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+DATABASE_URL = os.getenv("THINKENGINE_DATABASE_URL", "sqlite:///thinkengine.db")
+# SQLITE_TUNED=0 이면 기존 기본 설정(rollback journal)으로 동작
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "1") == "1"
+
+engine = create_sqlite_engine(
+    DATABASE_URL,
+    tuned=SQLITE_TUNED,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+)
+SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+# Create tables if not exist - called once at app startup
 def init_db():
     Base.metadata.create_all(engine)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+"""De-duplication of repeated /classify submissions.
+
+SingleFlight makes concurrent identical requests share one in-flight
+classification instead of each calling the LLM and writing its own Memo.
+The Idempotency-Key helpers let a client retry with the same key and get
+the originally stored response back instead of a second write; the
+lookup, classification and store for one key run as a single flight, so
+a retry never lands between the store and the end of the first request.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from db import IdempotencyKey
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+
+class FlightConflict(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, Tuple[asyncio.Task, Optional[str]]] = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable], tag: Optional[str] = None) -> Tuple[object, bool]:
+        """Run fn once per key at a time. Returns (result, shared).
+
+        The work runs in its own task so a disconnecting caller does not
+        cancel it for everyone else waiting on the same key. A caller whose
+        tag differs from the tag the flight was started with gets
+        FlightConflict instead of someone else's result.
+        """
+        entry = self._inflight.get(key)
+        shared = entry is not None
+        if entry is None:
+            entry = (asyncio.ensure_future(fn()), tag)
+            self._inflight[key] = entry
+            entry[0].add_done_callback(lambda _: self._inflight.pop(key, None))
+        elif entry[1] != tag:
+            raise FlightConflict(f"{key} is in flight for a different request")
+        return await asyncio.shield(entry[0]), shared
+
+
+def load_response(db, key: str) -> Optional[IdempotencyKey]:
+    row = db.get(IdempotencyKey, key)
+    if row is None or datetime.utcnow() - row.created_at > timedelta(hours=IDEMPOTENCY_TTL_HOURS):
+        return None
+    return row
+
+
+def store_response(db, key: str, request_hash: str, response: Dict):
+    db.merge(IdempotencyKey(key=key, request_hash=request_hash, response_json=response,
+                            created_at=datetime.utcnow()))
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.created_at < datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    ).delete(synchronize_session=False)
+    db.commit()
@@ -2,8 +2,16 @@ import json
 import os
 import logging
 import re
+import sys
 from typing import Dict, List, Optional
-from openai import OpenAI
+
+# gpt-app/common 공유 모듈 (LLM 백엔드)
+_GPT_APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _GPT_APP_ROOT not in sys.path:
+    sys.path.append(_GPT_APP_ROOT)
+from common.llm_backend import LLMBackend, get_backend
+from common.json_repair import fix_json
+from common.keywords import extract_metadata
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -16,30 +24,15 @@ BASE_CATEGORIES = [
     "보안 위험", "YouTube 기획"
 ]
 
-def extract_metadata(text):
-    """Extract basic metadata from text"""
-    summary = text.split('.')[0] if '.' in text else text.split('\n')[0]
-    keywords = list(set(re.findall(r'\w+', text)))[:5]      
-    return summary, keywords
-
-def fix_json(json_str):
-    """Fix common JSON issues that cause parsing errors"""
-    # Replace single quotes with double quotes (common mistake in JSON)
-    fixed = re.sub(r"'([^']*)':", r'"\1":', json_str)
-    # Fix trailing commas in lists/objects (not allowed in JSON)
-    fixed = re.sub(r",\s*}", "}", fixed)
-    fixed = re.sub(r",\s*\]", "]", fixed)
-    # Add double quotes around property names that are missing them
-    fixed = re.sub(r"([{,])\s*(\w+):", r'\1"\2":', fixed)
-    return fixed
-
-def categorize_memo(memo_text: str, categories: Optional[List[str]] = None) -> Dict:
+def categorize_memo(memo_text: str, categories: Optional[List[str]] = None,
+                    backend: Optional[LLMBackend] = None) -> Dict:
     """
-    Categorize a memo using OpenAI.
+    Categorize a memo using OpenAI (or the backend selected by LLM_BACKEND).
     
     Args:
         memo_text: Text to categorize
         categories: Optional list of categories to use
+        backend: Optional LLM backend; defaults to get_backend()
     
     Returns:
         Dict with classification results
@@ -49,7 +42,7 @@ def categorize_memo(memo_text: str, categories: Optional[List[str]] = None) -> D
     
     # Get API key from environment or from a config file
     api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+    if backend is None and not api_key and os.environ.get("LLM_BACKEND", "openai") != "fake":
         try:
             import configparser
             config = configparser.ConfigParser()
@@ -92,8 +85,9 @@ def categorize_memo(memo_text: str, categories: Optional[List[str]] = None) -> D
         """
         
         # Call OpenAI API with explicit JSON output format
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
+        if backend is None:
+            backend = get_backend(api_key)
+        content = backend.complete_sync(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 유효한 JSON 형식으로만 응답하세요. 모든 키와 값은 반드시 쌍따옴표로 감싸야 합니다."},
@@ -103,7 +97,7 @@ def categorize_memo(memo_text: str, categories: Optional[List[str]] = None) -> D
         )
         
         # Extract content
-        content = response.choices[0].message.content.strip()
+        content = content.strip()
         logger.info(f"AI response: {content[:100]}...")
         
         # Try to fix any JSON issues if present
@@ -1,5 +1,7 @@
-from fastapi import APIRouter
-from app.services.categorize import classify_memo, extract_metadata
+from fastapi import APIRouter, Depends
+from app.services.categorize import classify_memo, classify_memo_batch, extract_metadata
+from app.services.embedding import embedding_service, cluster_sentences
+from fastapi.concurrency import run_in_threadpool
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
 from typing import List, Dict
@@ -19,31 +21,104 @@ import json
 from openai import OpenAI 
 import os 
 import re
-from app.database.db import SessionLocal, Memo, Category, MemoRequest ,MemoCategory, init_db
+from app.database.db import SessionLocal, Memo, Category, MemoRequest, BatchMemoRequest, MemoCategory, init_db, get_db
+from sqlalchemy.orm import Session
 router = APIRouter() 
 import logging 
 logger = logging.getLogger("categorizer") 
 from app.constants import BASE_CATEGORIES
+from app.utils.config import ensure_common_on_path, get_openai_api_key
+ensure_common_on_path()
+from common.category_index import CategoryIndex
+from common import metrics
+from common.metrics import span
+from common.keywords import default_engine as keyword_engine, extract_metadata_batch
  
-config = configparser.ConfigParser()
+# 값 가져오기 (LLM_BACKEND=fake 이면 키 없이도 동작)
+openai_api_key = get_openai_api_key()
 
-config.read(os.path.join(os.path.dirname(__file__), '../api_key.ini'))
+category_index = CategoryIndex(Category)
 
-# 값 가져오기
-if 'OPENAI_API_KEY' not in config or 'OPEN_API_KEY' not in config['OPENAI_API_KEY']:
-    raise RuntimeError("Missing [OPENAI_API_KEY] section or OPEN_API_KEY in api_key.ini")
-openai_api_key = config['OPENAI_API_KEY']['OPEN_API_KEY']
 
+@router.on_event("startup")
+def warm_category_index():
+    # 스키마 생성은 요청마다가 아니라 시작 시 한 번만
+    init_db()
+    db = SessionLocal()
+    try:
+        category_index.warm(db)
+        # 저장된 메모로 키워드 문서 빈도(DF) 초기화
+        keyword_engine.load(text for (text,) in db.query(Memo.text).yield_per(1000))
+    finally:
+        db.close()
+
+
+@router.on_event("startup")
+def start_embedding_service():
+    # 모델은 여기서(백그라운드 스레드) 한 번만 로드, 요청 경로에서는 로드하지 않음
+    embedding_service.start()
+
+
+@router.on_event("shutdown")
+def stop_embedding_service():
+    embedding_service.stop()
+
+
+
+
+def add_classification(db, memo_text: str, result: Dict):
+    """
+    Stage a memo and its per-line categories on db without committing.
+
+    Returns (sidebar, created); publish created to category_index after commit.
+    """
+    memo_obj = Memo(text=memo_text, created_at=datetime.now(), result_json=result)
+    db.add(memo_obj)
+    db.flush()
+
+    # Organize sidebar data
+    sidebar = {}
+    labelled = []
+    lines = memo_text.strip().splitlines()
+    # Defensive: ensure classification is a dict of {str: str}
+    classification = result.get("classification", {})
+    if not isinstance(classification, dict):
+        logger.warning("classification is not a dict: %s", classification)
+        classification = {}
+    for idx, line in enumerate(lines, 1):
+        idx_str = str(idx)
+        cat = classification.get(idx_str, "분류 안됨")
+        # Defensive: skip empty or weird category names
+        if not cat or cat.lower() in ("classification", "classification (0)"):
+            cat = "분류 안됨"
+        if cat not in sidebar:
+            sidebar[cat] = []
+        sidebar[cat].append(line)
+        labelled.append((idx, line, cat))
+
+    # 카테고리는 한 번에 upsert, 문장-카테고리 매핑은 한 번에 bulk insert
+    category_ids, created = category_index.ensure(db, sidebar.keys())
+    if labelled:
+        db.execute(MemoCategory.__table__.insert(), [
+            {"memo_id": memo_obj.id, "category_id": category_ids[cat], "sentence_number": idx, "sentence": line}
+            for idx, line, cat in labelled
+        ])
+    return sidebar, created
 
 
+def filter_sidebar(sidebar: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    # Remove invalid sidebar keys before returning
+    invalid_keys = {"classification", "classification (0)", ""}
+    return {k: v for k, v in sidebar.items() if k not in invalid_keys}
+
 
 @router.post("/classify")
-async def classify(request: MemoRequest):
-    client = OpenAI(api_key=openai_api_key)
+async def classify(request: MemoRequest, db: Session = Depends(get_db)):
     logger.info("Classifying memo: %s", request.memo)
     print(f"Received classify request: {request.memo}")
     logging.info(f"Received classify request: {request.memo}")
-    summary, keywords = extract_metadata(request.memo)
+    with span("extract_metadata"):
+        summary, keywords = extract_metadata(request.memo)
     logging.info(f"Summary: {summary}, Keywords: {keywords}")
 
     try:
@@ -65,20 +140,12 @@ async def classify(request: MemoRequest):
             sentences =  request.memo.strip().split('.')
             sentences = [s.strip() for s in sentences if s.strip()]
             
-       #    임베딩 생성 및 의미 기반 클러스터링
-            from sentence_transformers import SentenceTransformer
-            model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-            embeddings = model.encode(sentences)
-            from sklearn.cluster import KMeans
-            n_clusters = min(len(sentences), 5)  # 최대 5개 클러스터
-            kmeans = KMeans(n_clusters=n_clusters)
-            clusters = kmeans.fit_predict(embeddings)
-            
-            # 클러스터별로 문장 그룹화
-            lines = []
-            for i in range(n_clusters):
-                cluster_sentences = [s for idx, s in enumerate(sentences) if clusters[idx] == i]
-                lines.append(' '.join(cluster_sentences))
+       #    임베딩 생성(공유 서비스에서 마이크로배치) 및 의미 기반 클러스터링
+            with span("embedding"):
+                embeddings = await embedding_service.aencode(sentences)
+            with span("clustering"):
+                # 클러스터별로 문장 그룹화 (최대 5개 클러스터)
+                lines = await run_in_threadpool(cluster_sentences, sentences, embeddings, 5)
             print('lines best:', lines)
            
            #lines = request.memo.strip().splitlines()
@@ -95,59 +162,20 @@ async def classify(request: MemoRequest):
     except Exception as e:
         print(f"Classification error: {e}") 
         logging.error(f"Classification error: {e}")
+        metrics.requests_total.inc(endpoint="/classify", outcome="error")
 
         return {"error": str(e), "metadata": {"summary": summary, "keywords": keywords}}
 
     # DB integration
-    init_db()
-    db = SessionLocal()
-    memo_obj = Memo(text=request.memo, created_at=datetime.now(), result_json=result)
-    db.add(memo_obj)
-    db.commit()
-    db.refresh(memo_obj)
-
-    # Organize sidebar data
-    sidebar = {}
-    lines = request.memo.strip().splitlines()
-    # Defensive: ensure classification is a dict of {str: str}
-    classification = result.get("classification", {})
-    if not isinstance(classification, dict):
-        print(f"classification is not a dict: {classification}")
-        classification = {}
-    for idx, line in enumerate(lines, 1):
-        print(f"Processing line {idx}: {line}")
-        idx_str = str(idx)
-        cat = classification.get(idx_str, "분류 안됨")
-        print(f"Category for line {idx}: {cat}")
-        # Defensive: skip empty or weird category names
-        if not cat or cat.lower() in ("classification", "classification (0)"):
-            print(f"Skipping invalid category: {cat}")
-            cat = "분류 안됨"
-        if cat not in sidebar:
-            print(f"Adding new category: {cat}")
-            sidebar[cat] = []
-        sidebar[cat].append(line)
-        print(f"Adding line {line} to category {cat}")
-        # Save category to DB
-        category_obj = db.query(Category).filter_by(name=cat).first()
-        if not category_obj:
-            print(f"Adding new category to DB: {cat}")
-            category_obj = Category(name=cat)
-            db.add(category_obj)
-            db.commit()
-            db.refresh(category_obj)
-            # 바이브 코딩으로 따라갈수가없네. -> 카테고리 추가 
-        print(f"Adding MemoCategory to DB: memo_id={memo_obj.id}, category_id={category_obj.id}, sentence_number={idx}, sentence={line}")
-        
-        db.add(MemoCategory(memo_id=memo_obj.id, category_id=category_obj.id, sentence_number=idx, sentence=line))
-        
-        
-    db.commit()
-    db.close()
-
-    # Remove invalid sidebar keys before returning
-    invalid_keys = {"classification", "classification (0)", ""}
-    filtered_sidebar = {k: v for k, v in sidebar.items() if k not in invalid_keys} # sidebar는 어떻게 구성해야하는가 
+    with span("db_write"):
+        sidebar, created = add_classification(db, request.memo, result)
+    with span("db_commit"):
+        db.commit()
+    category_index.publish(created)
+    keyword_engine.add_documents([request.memo])
+    metrics.requests_total.inc(endpoint="/classify", outcome="ok")
+
+    filtered_sidebar = filter_sidebar(sidebar) # sidebar는 어떻게 구성해야하는가 
      # 이후 표시되는 화면은 어떻게 구성해야하는가 , 표로 해야하는 것은 표로만들어주고, 집정리를 대신 다 해주는거지 알라미처럼
     # 표로 구성해주기도하고 사용자가 accept하면 그림도그려주고 생각도 연결하는 지식그래프기본으로해주고 포렌식도해주고
     # prd문서로 특허화도하고
@@ -159,4 +187,47 @@ async def classify(request: MemoRequest):
         "metadata": {"summary": summary, "keywords": keywords}
 }
 
-# 
\ No newline at end of file
+#
+
+
+@router.post("/classify/batch")
+def classify_batch(request: BatchMemoRequest, db: Session = Depends(get_db)):
+    logger.info("Classifying batch of %d memos", len(request.memos))
+    outcomes = classify_memo_batch(request.memos, BASE_CATEGORIES)
+
+    # 성공한 메모는 한 트랜잭션으로 저장
+    ok = [i for i, (result, _) in enumerate(outcomes) if result is not None]
+    sidebars, created = {}, {}
+    try:
+        with span("db_write"):
+            for i in ok:
+                sidebars[i], memo_created = add_classification(db, request.memos[i], outcomes[i][0])
+                created.update(memo_created)
+        with span("db_commit"):
+            db.commit()
+        category_index.publish(created)
+        keyword_engine.add_documents([request.memos[i] for i in ok])
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Batch save failed: {e}")
+        outcomes = [(result, f"Failed to save batch: {e}") if result is not None else (result, error)
+                    for result, error in outcomes]
+        sidebars = {}
+
+    with span("extract_metadata"):
+        metadata = extract_metadata_batch(request.memos)
+    items = []
+    for i, (result, error) in enumerate(outcomes):
+        metrics.requests_total.inc(endpoint="/classify/batch", outcome="error" if error else "ok")
+        summary, keywords = metadata[i]
+        item = {"index": i, "metadata": {"summary": summary, "keywords": keywords}}
+        if error:
+            item["error"] = error
+        else:
+            item.update({"result": result, "sidebar": filter_sidebar(sidebars.get(i, {}))})
+        items.append(item)
+    return {
+        "results": items,
+        "succeeded": sum(1 for item in items if "error" not in item),
+        "failed": sum(1 for item in items if "error" in item),
+    }
@@ -2,7 +2,7 @@ from sqlalchemy import create_engine, Column, Integer, String, DateTime, Foreign
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from datetime import datetime
 from fastapi import FastAPI, Request
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict
 import openai
 import uuid
@@ -21,10 +21,15 @@ from openai import OpenAI
 import os 
 Base = declarative_base()
 
+BATCH_MAX_MEMOS = int(os.getenv("BATCH_MAX_MEMOS", "100"))
+
 # --- 입력 데이터 모델 ---
 class MemoRequest(BaseModel):
     memo: str
 
+class BatchMemoRequest(BaseModel):
+    memos: List[str] = Field(..., max_length=BATCH_MAX_MEMOS)
+
 
 class Memo(Base):
     __tablename__ = 'memos'
@@ -51,9 +56,26 @@ class MemoCategory(Base):
     memo = relationship('Memo', back_populates='categories')
     category = relationship('Category', back_populates='memos')
 
-engine = create_engine('sqlite:///thinkengine.db')
-SessionLocal = sessionmaker(bind=engine)
+from app.utils.config import ensure_common_on_path
+ensure_common_on_path()
+from common.sqlite import create_sqlite_engine
 
-# Create tables if not exist
+DATABASE_URL = os.getenv("THINKENGINE_DATABASE_URL", "sqlite:///thinkengine.db")
+engine = create_sqlite_engine(
+    DATABASE_URL,
+    tuned=os.getenv("SQLITE_TUNED", "1") == "1",
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+)
+SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+# Create tables if not exist - called once at startup
 def init_db():
     Base.metadata.create_all(engine)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
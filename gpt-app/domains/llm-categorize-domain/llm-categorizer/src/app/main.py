@@ -19,6 +19,9 @@ from app.database.db import SessionLocal, Memo, Category, MemoCategory, init_db
 
 from app.api.categorize import classify_memo,extract_metadata
 from app.api.categorize import router
+from app.utils.config import get_openai_api_key
+from common import metrics
+from fastapi.responses import Response
 import logging  
 
 # --- Config ---
@@ -27,15 +30,11 @@ config = configparser.ConfigParser()
 logging.basicConfig(level=logging.DEBUG)
 
 
-config.read(os.path.join(os.path.dirname(__file__), 'api_key.ini'))
-
-# 값 가져오기
-if 'OPENAI_API_KEY' not in config or 'OPEN_API_KEY' not in config['OPENAI_API_KEY']:
-    raise RuntimeError("Missing [OPENAI_API_KEY] section or OPEN_API_KEY in api_key.ini")
-openai_api_key = config['OPENAI_API_KEY']['OPEN_API_KEY']
+# 값 가져오기 (LLM_BACKEND=fake 이면 키 없이도 동작)
+openai_api_key = get_openai_api_key()
 
 # --- Config ---
-client = OpenAI(api_key=openai_api_key)
+client = OpenAI(api_key=openai_api_key) if openai_api_key else None
 
 # --- FastAPI 앱 생성 ---
 app = FastAPI() 
@@ -49,6 +48,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 # --- 입력 데이터 모델 ---
 class MemoRequest(BaseModel):
     memo: str
@@ -66,4 +66,9 @@ app.include_router(router)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
\ No newline at end of file
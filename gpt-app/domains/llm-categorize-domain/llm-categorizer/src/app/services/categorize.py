@@ -21,6 +21,8 @@ from datetime import datetime
 import json
 from openai import OpenAI 
 import os 
+import hashlib
+import threading
 from app.utils.utils import is_json_like
 
 import configparser
@@ -29,23 +31,30 @@ from pydantic import BaseModel, Field, create_model
 
 
 
-from app.utils.config import get_openai_api_key
+from app.utils.config import get_openai_api_key, ensure_common_on_path, get_taxonomy_path
 openai_api_key = get_openai_api_key()
 
-client = OpenAI(api_key=openai_api_key)
+ensure_common_on_path()
+from common.batching import BATCH_SYSTEM_PROMPT, build_batch_prompt, pack_by_budget, split_batch_result
+from common.llm_backend import OpenAIBackend, get_backend, observe_call
+from common.metrics import record_usage, span
+from common.keywords import extract_metadata
+
+# LLM_BACKEND=fake 이면 API 키 없이 가짜 백엔드가 응답
+llm_backend = get_backend(openai_api_key)
+CLASSIFY_MODEL = "gpt-4.1-2025-04-14"
+
+
+def complete(**kwargs) -> str:
+    with span("llm"):
+        return llm_backend.complete_sync(**kwargs)
+
 import logging 
 def create_example_data(data):
     example_data = {}
     for index, key in enumerate(data.keys(), start=1):
         example_data[key] = f"example{index}"
     return example_data
-def extract_metadata(text):
-    # Fast, simple keyword extraction: unique words (alphanumeric, Korean, etc.)
-    import re
-    summary = text.split('.')[0] if '.' in text else text.split('\n')[0]
-    keywords = list(set(re.findall(r'\w+', text)))[:5]      
-    return summary, keywords
-
 def generate_prompt(meta_template, task: str = "meta_extract"):
     import json
     print('메타프롬프트 in')
@@ -104,33 +113,110 @@ def generate_prompt(meta_template, task: str = "meta_extract"):
     return prompt
 
 
+class TaxonomyTemplate:
+    """taxonomy_template.json, re-read only when the file's mtime or size changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp = None
+        self.schema = None
+        self.content_hash = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return (schema, content_hash), reloading if the file changed on disk."""
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    with open(self.path, 'rb') as f:
+                        raw = f.read()
+                    self.schema = json.loads(raw.decode('utf-8'))
+                    self.content_hash = hashlib.sha256(raw).hexdigest()
+                    self._stamp = stamp
+                    logging.info("Loaded taxonomy template %s (%s)", self.path, self.content_hash[:12])
+        return self.schema, self.content_hash
+
+
+class CompiledPrompt:
+    """PromptTemplate with the parser instructions and taxonomy baked in, plus its reusable chain."""
+
+    def __init__(self, schema, task: str):
+        self.prompt = generate_prompt(meta_template=schema, task=task)
+        if "meta_template" in self.prompt.input_variables:
+            # 요청마다 dict 를 문자열로 바꾸지 않도록 미리 채워둠
+            self.prompt = self.prompt.partial(meta_template=str(schema))
+        self._chain = None
+
+    def format(self, **kwargs) -> str:
+        return self.prompt.format(**kwargs)
+
+    def chain(self):
+        if self._chain is None:
+            self._chain = self.prompt | get_chat_llm()
+        return self._chain
+
+
+taxonomy = TaxonomyTemplate(get_taxonomy_path())
+_compiled: Dict[tuple, CompiledPrompt] = {}
+_compiled_lock = threading.Lock()
+_chat_llm = None
+
+
+def get_chat_llm():
+    """One ChatOpenAI client shared by every chain (keeps its HTTP connection pool warm)."""
+    global _chat_llm
+    if _chat_llm is None:
+        from langchain.chat_models import ChatOpenAI
+
+        llm = ChatOpenAI(openai_api_key=openai_api_key, temperature=0.3)
+        _chat_llm = llm if openai_api_key else llm.bind(temperature=0.3, stop=['<|eot_id|>'])
+    return _chat_llm
+
+
+def get_compiled_prompt(task: str = "meta_extract") -> CompiledPrompt:
+    """Compiled prompt for the current taxonomy file, built once per (content hash, task)."""
+    schema, content_hash = taxonomy.load()
+    key = (content_hash, task)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        with _compiled_lock:
+            compiled = _compiled.get(key)
+            if compiled is None:
+                compiled = _compiled[key] = CompiledPrompt(schema, task)
+                # 예전 버전 템플릿으로 만든 항목은 버림
+                for stale in [k for k in _compiled if k[0] != content_hash]:
+                    del _compiled[stale]
+    return compiled
+
+
 def classify_memo(text: str, categories: List[str], use_structured_output: bool = True) -> Dict: 
-    with open(r'C:\workspace\thinkengine\gpt-app\domains\llm-categorize-domain\llm-categorizer\src\app\taxonomy_template.json', 'r', encoding='utf-8') as f:        
-        schema = json.load(f)
-    print('schema:', schema) 
-    
-    from langchain.chat_models import ChatOpenAI
-    
-    llm = ChatOpenAI(openai_api_key=openai_api_key, temperature=0.3)
-    prompt = generate_prompt(meta_template=schema, task="meta_extract")
+    with span("prompt_build"):
+        compiled = get_compiled_prompt("meta_extract")
     
     suffix = ""
     prefix = "" # if using opensource model 
-    logging.info("Prompt generated: %s", prompt.format(prefix=prefix, meta_template=schema, document=text, suffix=suffix))
-    
-    if openai_api_key:          
-        first_chain = prompt | llm
-    else:
-        first_chain = prompt | llm.bind(temperature=0.3, stop=['<|eot_id|>'])
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Prompt generated: %s", compiled.format(prefix=prefix, document=text, suffix=suffix))
         
-    print(prompt.format(prefix=prefix, meta_template=schema, document=text, suffix=suffix))
-    llm_response = first_chain.invoke(
-            {"prefix": prefix, "meta_template": schema, "document": text,
-             "suffix": suffix})
-    print("llm_response:%s", llm_response.content)
+    if isinstance(llm_backend, OpenAIBackend):
+        first_chain = compiled.chain()
+        model_name = getattr(get_chat_llm(), "model_name", CLASSIFY_MODEL)
+        with span("llm"), observe_call(model_name):
+            llm_response = first_chain.invoke({"prefix": prefix, "document": text, "suffix": suffix})
+        usage = (getattr(llm_response, "response_metadata", None) or {}).get("token_usage") or {}
+        record_usage(model_name, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        llm_content = llm_response.content
+    else:
+        llm_content = complete(
+            model=CLASSIFY_MODEL,
+            messages=[{"role": "user", "content": compiled.format(prefix=prefix, document=text, suffix=suffix)}])
+    print("llm_response:%s", llm_content)
     
     try:
-        result = json.loads(llm_response.content)
+        with span("json_parse"):
+            result = json.loads(llm_content)
         
         # Convert new schema result to expected structure if using structured output
         if use_structured_output:
@@ -198,8 +284,8 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
             """
             
             # Use function calling if available
-            response = client.chat.completions.create(
-                model="gpt-4.1-2025-04-14",
+            content = complete(
+                model=CLASSIFY_MODEL,
                 messages=[
                     {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 JSON 스키마에 맞춰 응답하세요."},
                     {"role": "user", "content": prompt}
@@ -208,9 +294,9 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
             )
             
             # Ensure proper JSON parsing
-            content = response.choices[0].message.content.strip()
+            content = (content or "").strip()
             if not content:
-                print(f"LLM response content is empty. Full response: {response}")
+                print("LLM response content is empty.")
                 raise ValueError("LLM response content is empty. Cannot classify memo.")
             try:
                 result = json.loads(content)
@@ -239,14 +325,13 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
             {enriched_text}
             """
 
-            response = client.chat.completions.create(
-                model="gpt-4.1-2025-04-14",
+            content = complete(
+                model=CLASSIFY_MODEL,
                 messages=[
                     {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 JSON 형식으로만 응답하세요. 설명 없이 결과만 출력하세요."},
                     {"role": "user", "content": prompt}
                 ]
-            )
-            content = response.choices[0].message.content.strip()
+            ).strip()
             import re
             json_match = re.search(r'(\{[\s\S]*\})', content)
             if not json_match:
@@ -258,3 +343,28 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
             except Exception as e:
                 raise ValueError(f"Failed to parse LLM output as JSON: {json_str}\nOriginal output: {content}\nError: {e}")
 
+
+def classify_memo_batch(texts: List[str], categories: List[str], token_budget: int = 6000) -> List[tuple]:
+    """
+    Classify many memos with as few completions as the token budget allows.
+
+    Returns a (result, error) pair per memo, in input order.
+    """
+    outcomes = [None] * len(texts)
+    for group in pack_by_budget(texts, token_budget):
+        try:
+            content = complete(
+                model=CLASSIFY_MODEL,
+                messages=[
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": build_batch_prompt([texts[i] for i in group], categories)}
+                ],
+                response_format={"type": "json_object"}
+            )
+            split = split_batch_result(content.strip(), len(group))
+        except Exception as e:
+            logging.error(f"Batch classification failed: {e}")
+            split = [(None, str(e))] * len(group)
+        for i, outcome in zip(group, split):
+            outcomes[i] = outcome
+    return outcomes
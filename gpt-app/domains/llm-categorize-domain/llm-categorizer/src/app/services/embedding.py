@@ -0,0 +1,152 @@
+"""
+Shared sentence embedding service for the categorize router.
+
+The SentenceTransformer model is loaded once at startup (in a background
+thread) and a single worker thread encodes requests in micro-batches:
+sentences from concurrent callers that arrive within EMBEDDING_MAX_WAIT_MS
+of each other are encoded together, up to EMBEDDING_MAX_BATCH sentences.
+The request path never loads a model; it only enqueues and waits.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("categorizer")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+# 시작 직후 모델 로딩이 끝나기 전에 들어온 요청이 기다릴 최대 시간(초)
+EMBEDDING_READY_TIMEOUT = float(os.getenv("EMBEDDING_READY_TIMEOUT", "30"))
+
+
+class EmbeddingUnavailable(RuntimeError):
+    pass
+
+
+class EmbeddingService:
+    def __init__(self, model_name: str = EMBEDDING_MODEL, max_batch: int = EMBEDDING_MAX_BATCH,
+                 max_wait_ms: float = EMBEDDING_MAX_WAIT_MS, model=None):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._model = model
+        self._error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        if model is not None:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._model is not None
+
+    def start(self):
+        """Load the model (if not injected) and start the encode worker, both off the caller's thread."""
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def _load(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+            logger.info("Loaded embedding model %s", self.model_name)
+        except Exception as e:
+            self._error = e
+            logger.error(f"Embedding model {self.model_name} failed to load: {e}")
+        finally:
+            self._ready.set()
+
+    def _run(self):
+        if self._model is None:
+            self._load()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, size = [item], len(item[0])
+            # 짧은 대기 시간 안에 들어온 다른 요청들을 한 번의 encode 로 묶음
+            while size < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch):
+        # 기다리다 취소된 호출자(aencode 취소 시 wrap_future 가 Future 도 취소)는 빼고,
+        # 남은 Future 는 실행 중으로 표시해서 더 이상 취소되지 않게 함
+        batch = [(texts, future) for texts, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        sentences = [s for texts, _ in batch for s in texts]
+        try:
+            vectors = np.asarray(self._model.encode(sentences, batch_size=self.max_batch))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for texts, future in batch:
+            future.set_result(vectors[start:start + len(texts)])
+            start += len(texts)
+
+    def submit(self, sentences: List[str]) -> Future:
+        if self._worker is None:
+            raise EmbeddingUnavailable("Embedding service is not started")
+        if not self._ready.wait(EMBEDDING_READY_TIMEOUT) or self._model is None:
+            raise EmbeddingUnavailable(f"Embedding model is not available: {self._error or 'still loading'}")
+        future = Future()
+        if not sentences:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((list(sentences), future))
+        return future
+
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        return self.submit(sentences).result()
+
+    async def aencode(self, sentences: List[str]) -> np.ndarray:
+        # 모델 로딩 대기(ready.wait)가 이벤트 루프를 막지 않도록 스레드에서 제출
+        future = await asyncio.to_thread(self.submit, sentences)
+        return await asyncio.wrap_future(future)
+
+
+def cluster_sentences(sentences: List[str], embeddings: np.ndarray, max_clusters: int = 5) -> List[str]:
+    """
+    Group sentences by KMeans over their embeddings.
+
+    Returns one joined string per cluster, in cluster order. Seeded so the
+    same input always gives the same grouping.
+    """
+    if not sentences:
+        return []
+    n_clusters = min(len(sentences), max_clusters)
+    if n_clusters == 1:
+        return [' '.join(sentences)]
+    from sklearn.cluster import KMeans
+    clusters = KMeans(n_clusters=n_clusters, n_init=10, random_state=0).fit_predict(embeddings)
+    return [' '.join(s for idx, s in enumerate(sentences) if clusters[idx] == i) for i in range(n_clusters)]
+
+
+embedding_service = EmbeddingService()
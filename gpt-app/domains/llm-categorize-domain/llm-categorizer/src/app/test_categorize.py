@@ -1,5 +1,18 @@
+import json
+import os
+import sys
 import unittest
 
+DOMAIN_INIT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "__init__.py"))
+GPT_APP = os.path.abspath(os.path.join(os.path.dirname(DOMAIN_INIT), "..", ".."))
+if GPT_APP not in sys.path:
+    sys.path.append(GPT_APP)
+from service_modules import load_file
+
+
+def load_domain():
+    return load_file("llm_categorize_domain", DOMAIN_INIT)
+
 class TestCategorize(unittest.TestCase):
     """
     Test the categorize module
@@ -10,20 +23,240 @@ class TestCategorize(unittest.TestCase):
         Test the extract_metadata function
         """
         test_memo = "이것은 테스트 메모입니다. 여러 내용을 포함하고 있습니다."
-        
-        # Create a simple implementation of extract_metadata
-        def extract_metadata(text):
-            summary = text.split('.')[0] if '.' in text else text.split('\n')[0]
-            import re
-            keywords = list(set(re.findall(r'\w+', text)))[:5]
-            return summary, keywords
+        extract_metadata = load_domain().extract_metadata
             
         summary, keywords = extract_metadata(test_memo)
         
         self.assertEqual(summary, "이것은 테스트 메모입니다")
         self.assertIsInstance(keywords, list)
-        # We can't assume what keywords will be found by the regex, just check that we have some
         self.assertTrue(len(keywords) > 0, "Should have extracted at least one keyword")
+        # Deterministic: same text gives the same keywords in the same order
+        self.assertEqual(keywords, extract_metadata(test_memo)[1])
+
+    def test_keywords_follow_corpus_idf(self):
+        """
+        Terms common across stored memos rank below rare ones
+        """
+        load_domain()
+        from common.keywords import KeywordEngine, extract_metadata_batch, tokenize
+
+        self.assertEqual(tokenize("모델을 학습했다 AI가"), ["모델", "학습", "ai"])
+        engine = KeywordEngine()
+        engine.add_documents([f"오늘 회의 {i}번" for i in range(20)] + ["썸네일 실험"])
+        _, keywords = extract_metadata_batch(["오늘 회의 썸네일 정리"], engine=engine, k=2)[0]
+        self.assertEqual(keywords, ["정리", "썸네일"])
+
+class TestFakeBackend(unittest.TestCase):
+    """
+    Test categorize_memo against the fake LLM backend (no API key)
+    """
+
+    def setUp(self):
+        self.domain = load_domain()
+        from common.llm_backend import FakeBackend
+        self.FakeBackend = FakeBackend
+
+    def test_deterministic_classification(self):
+        """
+        Same memo and seed give the same labels, one per line
+        """
+        memo = "모델 학습 계획\n영상 기획 회의\n오늘 회고"
+        backend = self.FakeBackend(latency_ms=0, seed=7)
+        first = self.domain.categorize_memo(memo, backend=backend)
+        second = self.domain.categorize_memo(memo, backend=backend)
+
+        self.assertNotIn("error", first)
+        self.assertEqual(first["classification"], second["classification"])
+        self.assertEqual(sorted(first["classification"]), ["1", "2", "3"])
+
+    def test_malformed_output_is_repaired(self):
+        """
+        Single-quoted keys and trailing commas go through fix_json
+        """
+        backend = self.FakeBackend(latency_ms=0, malformed_rate=1.0)
+        result = self.domain.categorize_memo("첫 줄\n둘째 줄", backend=backend)
+
+        self.assertNotIn("error", result)
+        self.assertEqual(sorted(result["classification"]), ["1", "2"])
+
+    def test_backends_must_implement_both_calls(self):
+        """
+        LLMBackend is abstract; a backend without complete_sync cannot be created
+        """
+        from common.llm_backend import LLMBackend
+
+        class AsyncOnly(LLMBackend):
+            async def complete(self, model, messages, **kwargs):
+                return "{}"
+
+        with self.assertRaises(TypeError):
+            LLMBackend()
+        with self.assertRaises(TypeError):
+            AsyncOnly()
+
+class TestClassifyMemoBatch(unittest.TestCase):
+    """
+    Test packing and splitting of classify_memo_batch against the fake backend
+    """
+
+    def setUp(self):
+        load_domain()
+        src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if src not in sys.path:
+            sys.path.insert(0, src)
+        saved = os.environ.get("LLM_BACKEND")
+        os.environ["LLM_BACKEND"] = "fake"
+        try:
+            from app.services import categorize
+        finally:
+            if saved is None:
+                os.environ.pop("LLM_BACKEND")
+            else:
+                os.environ["LLM_BACKEND"] = saved
+        from common.llm_backend import FakeBackend
+
+        self.categorize = categorize
+        self.backend = categorize.llm_backend
+        test = self
+        self.prompts = []
+        self.drop = None
+
+        class RecordingBackend(FakeBackend):
+            def complete_sync(self, model, messages, **kwargs):
+                content = super().complete_sync(model, messages, **kwargs)
+                test.prompts.append(messages[-1]["content"])
+                if test.drop and test.drop in messages[-1]["content"]:
+                    # 이 메모가 들어 있는 묶음의 답에서 첫 메모 결과를 뺌
+                    answer = json.loads(content)
+                    del answer["results"]["1"]
+                    content = json.dumps(answer, ensure_ascii=False)
+                return content
+
+        categorize.llm_backend = RecordingBackend(latency_ms=0)
+
+    def tearDown(self):
+        self.categorize.llm_backend = self.backend
+
+    def memos(self, count):
+        return [f"배치 메모 {i}\n두 번째 줄 {i}" for i in range(count)]
+
+    def test_groups_are_split_back_in_order(self):
+        """
+        A small budget makes several completions; each memo gets its own lines back
+        """
+        outcomes = self.categorize.classify_memo_batch(self.memos(6), ["AI 개발"], token_budget=420)
+
+        self.assertGreater(len(self.prompts), 1)
+        self.assertLess(len(self.prompts), 6)
+        for result, error in outcomes:
+            self.assertIsNone(error)
+            self.assertEqual(sorted(result["classification"]), ["1", "2"])
+
+    def test_memo_missing_from_the_answer_fails_alone(self):
+        """
+        Only the memo left out of its group's answer gets an error
+        """
+        self.drop = "1. 배치 메모 0\n"
+        outcomes = self.categorize.classify_memo_batch(self.memos(6), ["AI 개발"], token_budget=420)
+
+        self.assertIsNone(outcomes[0][0])
+        self.assertIn("missing from batch output", outcomes[0][1])
+        self.assertTrue(all(result is not None for result, _ in outcomes[1:]))
+
+    def test_failed_completion_fails_its_group_only(self):
+        """
+        A group whose completion raises fails together; other groups still succeed
+        """
+        self.drop = None
+        complete_sync = self.categorize.llm_backend.complete_sync
+
+        def failing(model, messages, **kwargs):
+            if "배치 메모 0\n" in messages[-1]["content"]:
+                raise RuntimeError("rate limited")
+            return complete_sync(model, messages, **kwargs)
+
+        self.categorize.llm_backend.complete_sync = failing
+        outcomes = self.categorize.classify_memo_batch(self.memos(6), ["AI 개발"], token_budget=420)
+
+        failed = [i for i, (_, error) in enumerate(outcomes) if error]
+        self.assertIn(0, failed)
+        self.assertLess(len(failed), 6)
+        self.assertTrue(all(outcomes[i][1] == "rate limited" for i in failed))
+
+class TestEmbeddingService(unittest.TestCase):
+    """
+    Test micro-batching in the shared embedding service
+    """
+
+    def load_embedding(self):
+        return load_file("embedding_service", os.path.join(os.path.dirname(__file__), "services", "embedding.py"))
+
+    def test_concurrent_requests_share_one_encode(self):
+        """
+        Requests arriving together are encoded in one model call and split back in order
+        """
+        embedding = self.load_embedding()
+        import numpy as np
+
+        class FakeModel:
+            calls = []
+
+            def encode(self, sentences, batch_size=32):
+                self.calls.append(len(sentences))
+                return np.array([[len(s)] for s in sentences], dtype=np.float32)
+
+        model = FakeModel()
+        service = embedding.EmbeddingService(model=model, max_wait_ms=50)
+        service.start()
+        try:
+            futures = [service.submit(["a" * i, "b"]) for i in range(1, 5)]
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            service.stop()
+        self.assertEqual([r[:, 0].tolist() for r in results], [[i, 1] for i in range(1, 5)])
+        self.assertEqual(sum(model.calls), 8)
+        self.assertLess(len(model.calls), 4)
+
+    def test_cancelled_caller_does_not_stop_the_worker(self):
+        """
+        A caller cancelled while its sentences are queued is skipped, and later encodes still complete
+        """
+        import asyncio
+        import threading
+
+        import numpy as np
+
+        embedding = self.load_embedding()
+        entered, release = threading.Event(), threading.Event()
+
+        class SlowModel:
+            def encode(self, sentences, batch_size=32):
+                entered.set()
+                release.wait(5)
+                return np.array([[len(s)] for s in sentences], dtype=np.float32)
+
+        service = embedding.EmbeddingService(model=SlowModel(), max_wait_ms=0)
+        service.start()
+
+        async def scenario():
+            # 첫 요청이 encode 중인 동안 두 번째 요청을 큐에 넣고 취소
+            first = asyncio.ensure_future(service.aencode(["aa"]))
+            await asyncio.to_thread(entered.wait, 5)
+            cancelled = asyncio.ensure_future(service.aencode(["bbb"]))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            release.set()
+            self.assertEqual((await first)[:, 0].tolist(), [2])
+            return await asyncio.wait_for(service.aencode(["cccc"]), timeout=5)
+
+        try:
+            later = asyncio.run(scenario())
+        finally:
+            release.set()
+            service.stop()
+        self.assertEqual(later[:, 0].tolist(), [4])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,13 +1,34 @@
 import configparser
 import os
+import sys
 
 def get_api_key_ini_path():
     # Adjust the path as needed for your project structure
     return os.path.join(os.path.dirname(__file__), "..", "api_key.ini")
 
 def get_openai_api_key():
+    """OPENAI_API_KEY from the environment or api_key.ini; None is allowed with LLM_BACKEND=fake."""
+    if os.getenv("OPENAI_API_KEY"):
+        return os.getenv("OPENAI_API_KEY")
     config = configparser.ConfigParser()
     config.read(get_api_key_ini_path())
     if 'OPENAI_API_KEY' not in config or 'OPEN_API_KEY' not in config['OPENAI_API_KEY']:
+        if os.getenv("LLM_BACKEND", "openai") == "fake":
+            return None
         raise RuntimeError("Missing [OPENAI_API_KEY] section or OPEN_API_KEY in api_key.ini")
-    return config['OPENAI_API_KEY']['OPEN_API_KEY']
\ No newline at end of file
+    return config['OPENAI_API_KEY']['OPEN_API_KEY']
+
+def get_taxonomy_path():
+    # TAXONOMY_TEMPLATE_PATH 로 바꿀 수 있음, 기본은 app/taxonomy_template.json
+    return os.getenv("TAXONOMY_TEMPLATE_PATH",
+                     os.path.join(os.path.dirname(__file__), "..", "taxonomy_template.json"))
+
+def get_gpt_app_root():
+    # llm-categorizer/src/app/utils -> gpt-app
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), *[".."] * 6))
+
+def ensure_common_on_path():
+    """Make gpt-app/common (shared with thinkengine) importable."""
+    root = get_gpt_app_root()
+    if root not in sys.path:
+        sys.path.append(root)
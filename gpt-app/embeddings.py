@@ -0,0 +1,49 @@
+"""Local CPU sentence embeddings.
+
+HashingEmbedder maps character n-grams (which suit Korean, where words
+inflect heavily) and whole tokens into a fixed number of buckets with a
+signed hash. It needs no model download, is deterministic across
+processes and encodes thousands of lines per second.
+"""
+import re
+import unicodedata
+import zlib
+from typing import List
+
+import numpy as np
+
+EMBEDDING_DIM = 1024
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text).lower()).strip()
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = EMBEDDING_DIM, ngram_sizes=(2, 3)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for token in re.findall(r"\w+", text):
+            features.append(token)
+            padded = f" {token} "
+            for n in self.ngram_sizes:
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return an (len(texts), dim) float32 matrix of L2-normalized rows."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in self._features(_normalize(text))),
+                                 dtype=np.uint32)
+            if hashes.size == 0:
+                continue
+            # 하위 비트는 버킷, 최상위 비트는 부호 (충돌이 서로 상쇄되도록)
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
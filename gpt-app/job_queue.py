@@ -0,0 +1,166 @@
+"""Durable background queue for /classify?async=1.
+
+Jobs live in the classify_jobs table so they survive restarts. A pool of
+asyncio workers claims the oldest runnable job, runs the handler and
+stores the response; failures are retried with exponential backoff and
+jitter until JOB_MAX_ATTEMPTS, then marked failed.
+"""
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from db import SessionLocal, ClassifyJob
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# queued + running 작업이 이 수를 넘으면 새 작업을 거절 (backpressure)
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, handler: Callable[[str], Awaitable[Dict]], workers: int = JOB_WORKERS,
+                 max_pending: int = JOB_QUEUE_MAX, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 backoff: float = JOB_BACKOFF_SECONDS, poll: float = JOB_POLL_SECONDS):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll = poll
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+
+    # --- DB 작업 (동기, 스레드풀에서 실행) ---
+    def _enqueue(self, memo: str) -> str:
+        db = SessionLocal()
+        try:
+            pending = db.query(ClassifyJob).filter(ClassifyJob.status.in_(("queued", "running"))).count()
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs pending")
+            job = ClassifyJob(id=uuid.uuid4().hex, memo=memo, status="queued")
+            db.add(job)
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+
+    def _claim(self) -> Optional[ClassifyJob]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            candidates = (db.query(ClassifyJob.id)
+                          .filter(ClassifyJob.status == "queued", ClassifyJob.run_after <= now)
+                          .order_by(ClassifyJob.run_after)
+                          .limit(self.workers)
+                          .all())
+            for (job_id,) in candidates:
+                # 조건부 UPDATE 로 다른 워커와 경쟁해도 한 워커만 가져가도록 함
+                claimed = (db.query(ClassifyJob)
+                           .filter(ClassifyJob.id == job_id, ClassifyJob.status == "queued")
+                           .update({"status": "running", "attempts": ClassifyJob.attempts + 1,
+                                    "updated_at": now}, synchronize_session=False))
+                db.commit()
+                if claimed:
+                    job = db.get(ClassifyJob, job_id)
+                    db.expunge(job)
+                    return job
+            return None
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, response: Optional[Dict], error: Optional[str], attempts: int):
+        db = SessionLocal()
+        try:
+            job = db.get(ClassifyJob, job_id)
+            job.updated_at = datetime.utcnow()
+            if error is None:
+                job.status, job.result_json, job.error = "done", response, None
+            elif attempts < self.max_attempts:
+                delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+                job.status, job.error = "queued", error
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            else:
+                job.status, job.result_json, job.error = "failed", response, error
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue_running(self):
+        # 이전 프로세스가 처리 중에 죽었다면 다시 대기열로
+        db = SessionLocal()
+        try:
+            db.query(ClassifyJob).filter(ClassifyJob.status == "running").update(
+                {"status": "queued", "run_after": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            job = db.get(ClassifyJob, job_id)
+            if job is None:
+                return None
+            return {
+                "job_id": job.id,
+                "status": job.status,
+                "attempts": job.attempts,
+                "result": job.result_json,
+                "error": job.error,
+                "created_at": job.created_at.isoformat(),
+                "updated_at": job.updated_at.isoformat(),
+            }
+        finally:
+            db.close()
+
+    # --- 비동기 인터페이스 ---
+    async def enqueue(self, memo: str) -> str:
+        job_id = await run_in_threadpool(self._enqueue, memo)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        await run_in_threadpool(self._requeue_running)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            job = await run_in_threadpool(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            response, error = None, None
+            try:
+                response = await self.handler(job.memo)
+                error = response.get("error")
+            except Exception as e:
+                error = str(e)
+            if error:
+                logger.warning("Job %s attempt %d failed: %s", job.id, job.attempts, error)
+            await run_in_threadpool(self._finish, job.id, response, error, job.attempts)
@@ -0,0 +1,103 @@
+"""Embedding-centroid pre-classifier in front of classify_memo.
+
+Keeps a running sum of line embeddings per category, built from historical
+memo_categories rows and updated as new classifications are saved. A line
+whose cosine similarity to the nearest centroid clears the threshold (and
+beats the runner-up by a margin) is labelled locally; everything else
+still goes to the LLM.
+"""
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from db import SessionLocal, Category, MemoCategory
+from embeddings import HashingEmbedder
+
+PRECLASSIFY_ENABLED = os.getenv("PRECLASSIFY_ENABLED", "1") == "1"
+PRECLASSIFY_THRESHOLD = float(os.getenv("PRECLASSIFY_THRESHOLD", "0.6"))
+PRECLASSIFY_MARGIN = float(os.getenv("PRECLASSIFY_MARGIN", "0.05"))
+# 예시 문장이 이 개수 미만인 카테고리는 중심 벡터를 신뢰하지 않음
+PRECLASSIFY_MIN_EXAMPLES = int(os.getenv("PRECLASSIFY_MIN_EXAMPLES", "5"))
+
+UNLEARNABLE = {"분류 안됨", ""}
+
+
+class CentroidClassifier:
+    def __init__(self, embedder=None, threshold: float = PRECLASSIFY_THRESHOLD,
+                 margin: float = PRECLASSIFY_MARGIN, min_examples: int = PRECLASSIFY_MIN_EXAMPLES):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.margin = margin
+        self.min_examples = min_examples
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._matrix = None  # (names, normalized centroid matrix), 변경 시 다시 계산
+
+    def load(self, batch_size: int = 2000):
+        db = SessionLocal()
+        try:
+            rows = (db.query(MemoCategory.sentence, Category.name)
+                    .join(Category, MemoCategory.category_id == Category.id)
+                    .yield_per(batch_size))
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self.update(batch)
+                    batch = []
+            self.update(batch)
+        finally:
+            db.close()
+
+    def update(self, pairs: Iterable[Tuple[str, str]]):
+        pairs = [(line, cat) for line, cat in pairs if line.strip() and cat not in UNLEARNABLE]
+        if not pairs:
+            return
+        vectors = self.embedder.encode([line for line, _ in pairs])
+        with self._lock:
+            for (_, cat), vec in zip(pairs, vectors):
+                if cat in self._sums:
+                    self._sums[cat] += vec
+                    self._counts[cat] += 1
+                else:
+                    self._sums[cat] = vec.copy()
+                    self._counts[cat] = 1
+            self._matrix = None
+
+    def _centroids(self):
+        with self._lock:
+            if self._matrix is None:
+                names = [cat for cat, n in self._counts.items() if n >= self.min_examples]
+                matrix = np.array([self._sums[cat] for cat in names], dtype=np.float32)
+                if not names:
+                    matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                np.divide(matrix, norms, out=matrix, where=norms > 0)
+                self._matrix = (names, matrix)
+            return self._matrix
+
+    def scores(self, lines: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Cosine similarity of each line to every trusted centroid."""
+        names, matrix = self._centroids()
+        if not names or not lines:
+            return names, np.zeros((len(lines), len(names)), dtype=np.float32)
+        return names, self.embedder.encode(lines) @ matrix.T
+
+    def predict(self, lines: List[str], skip: Iterable[int] = ()) -> Dict[int, Tuple[str, float]]:
+        """Return {1-based line number: (category, similarity)} for confident lines."""
+        skip = set(skip)
+        numbers = [idx for idx, line in enumerate(lines, 1) if idx not in skip and line.strip()]
+        names, sims = self.scores([lines[idx - 1] for idx in numbers])
+        if not names:
+            return {}
+        if len(names) > 1:
+            top2 = np.partition(sims, -2, axis=1)[:, -2:]
+            best, runner_up = top2[:, 1], top2[:, 0]
+        else:
+            best, runner_up = sims[:, 0], np.zeros(len(numbers), dtype=np.float32)
+        best_idx = sims.argmax(axis=1)
+        confident = (best >= self.threshold) & (best - runner_up >= self.margin)
+        return {numbers[i]: (names[best_idx[i]], float(best[i])) for i in np.flatnonzero(confident)}
@@ -0,0 +1,67 @@
+"""Sentence-level classification reuse.
+
+Maps a hash of each normalized memo line to the category it was last
+saved under, so re-submitted memos only send unseen lines to the LLM.
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from classify_cache import normalize_memo
+from db import SessionLocal, Category, MemoCategory
+
+SENTENCE_STORE_MAX = int(os.getenv("SENTENCE_STORE_MAX", "200000"))
+
+# 재사용하지 않는 카테고리 (다시 분류해볼 가치가 있는 문장)
+UNREUSABLE = {"분류 안됨", ""}
+
+
+def sentence_key(line: str) -> bytes:
+    return hashlib.blake2b(normalize_memo(line).encode("utf-8"), digest_size=16).digest()
+
+
+class SentenceStore:
+    def __init__(self, max_entries: int = SENTENCE_STORE_MAX):
+        self.max_entries = max_entries
+        self._categories: Dict[bytes, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._categories)
+
+    def load(self):
+        """Seed from memo_categories, oldest first so the latest label wins."""
+        db = SessionLocal()
+        try:
+            rows = (db.query(MemoCategory.sentence, Category.name)
+                    .join(Category, MemoCategory.category_id == Category.id)
+                    .order_by(MemoCategory.id)
+                    .yield_per(1000))
+            self.update(rows)
+        finally:
+            db.close()
+
+    def update(self, pairs: Iterable[Tuple[str, str]]):
+        with self._lock:
+            for line, category in pairs:
+                if not line.strip() or category in UNREUSABLE:
+                    continue
+                key = sentence_key(line)
+                # 최신 값을 dict 끝으로 보내서 오래된 항목부터 밀려나게 함
+                self._categories.pop(key, None)
+                self._categories[key] = category
+            while len(self._categories) > self.max_entries:
+                del self._categories[next(iter(self._categories))]
+
+    def lookup(self, lines: List[str]) -> Dict[int, str]:
+        """Return {1-based line number: category} for previously seen lines."""
+        known = {}
+        with self._lock:
+            for idx, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                category = self._categories.get(sentence_key(line))
+                if category is not None:
+                    known[idx] = category
+        return known
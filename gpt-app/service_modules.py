@@ -0,0 +1,81 @@
+"""Import the services/* microservices from tests.
+
+Each service is its own Docker context and imports its siblings flat
+(`from db import ...`, `from models import Memo`), and several of those
+names clash between services and with gpt-app's own db module. These
+helpers put one service directory on sys.path, point DATABASE_URL at the
+given database, and put back whatever modules and settings were there
+before. load_thinkengine imports the gpt-app API itself against a
+throwaway SQLite file and the fake LLM backend.
+"""
+import atexit
+import contextlib
+import importlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+GPT_APP = os.path.dirname(os.path.abspath(__file__))
+SERVICES = os.path.join(GPT_APP, "services")
+
+
+def load_file(name: str, path: str):
+    """Load one module from a file path without touching sys.path or sys.modules."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def service_path(service: str, database_url: Optional[str] = None) -> Iterator[str]:
+    """Make the service's flat imports resolve to its own files for the duration of the block."""
+    directory = os.path.join(SERVICES, service)
+    names = [f[:-3] for f in os.listdir(directory) if f.endswith(".py") and f != "__init__.py"]
+    saved_modules = {name: sys.modules.pop(name) for name in names if name in sys.modules}
+    saved_url = os.environ.get("DATABASE_URL")
+    if database_url is not None:
+        os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, directory)
+    try:
+        yield directory
+    finally:
+        sys.path.remove(directory)
+        for name in names:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved_modules)
+        if saved_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = saved_url
+
+
+def load_service(service: str, *names: str, database_url: Optional[str] = None) -> Tuple:
+    """Import the named modules of one service; returns them in the order given."""
+    with service_path(service, database_url):
+        return tuple(importlib.import_module(name) for name in names)
+
+
+def load_thinkengine():
+    """Import thinkengine once per process with LLM_BACKEND=fake and a temporary SQLite database."""
+    if "thinkengine" not in sys.modules:
+        directory = tempfile.mkdtemp(prefix="thinkengine-test-")
+        atexit.register(shutil.rmtree, directory, True)
+        os.environ.update({
+            "LLM_BACKEND": "fake",
+            "FAKE_LLM_LATENCY_MS": "50",
+            "FAKE_LLM_JITTER": "0",
+            "FAKE_LLM_NEW_CATEGORY_RATE": "0",
+            "THINKENGINE_DATABASE_URL": f"sqlite:///{directory}/thinkengine.db",
+        })
+        # 다른 테스트가 먼저 불러온 db 등은 기본 DB 에 묶여 있으므로 테스트 DB 로 다시 불러옴
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None) or ""
+            if os.path.dirname(path) == GPT_APP and not name.startswith("test_") and name != __name__:
+                del sys.modules[name]
+    thinkengine = importlib.import_module("thinkengine")
+    thinkengine.init_db()
+    return thinkengine
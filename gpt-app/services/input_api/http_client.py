@@ -0,0 +1,169 @@
+# services/input_api/http_client.py
+"""
+Shared HTTP client for calls to the downstream services.
+
+One httpx.AsyncClient per process (opened at startup, closed at shutdown)
+keeps connections to processing and storage alive between memos. Each
+downstream service has its own circuit breaker: after BREAKER_FAILURES
+consecutive failures calls fail fast for BREAKER_RESET_SECONDS, then one
+trial call decides whether to close it again.
+
+Retries use exponential backoff with full jitter. Failures before the
+request reached the server (connect errors, pool timeouts) are always
+retried; timeouts, dropped connections and 502/503/504 are retried only
+for idempotent calls, so a memo is never stored twice.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.1"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+RETRY_STATUSES = {502, 503, 504}
+# 요청이 서버에 도달하기 전에 난 오류라서 어떤 요청이든 다시 보내도 안전함
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"{service} circuit is open, retry in {retry_after:.1f}s")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpen or admit the call; returns True when the call is the half-open trial."""
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial):
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            raise CircuitOpen(self.name, retry_after)
+        if state == "half-open":
+            # 반쯤 열린 상태에서는 시험 요청 하나만 통과시킴
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial:
+                logger.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+    def abandon_trial(self):
+        """The trial call ended without an answer (e.g. cancelled): stay open for another reset_timeout."""
+        self.opened_at = time.monotonic()
+        self._trial = False
+
+
+def backoff_delay(attempt: int, base: float = HTTP_BACKOFF_BASE, cap: float = HTTP_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ServiceClient:
+    def __init__(self, retries: int = HTTP_RETRIES, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.retries = retries
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT),
+                transport=self._transport,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def breaker(self, service: str) -> CircuitBreaker:
+        if service not in self.breakers:
+            self.breakers[service] = CircuitBreaker(service)
+        return self.breakers[service]
+
+    async def post(self, service: str, url: str, json=None, idempotent: bool = False) -> httpx.Response:
+        """POST with retries and the service's circuit breaker; raises for non-2xx responses."""
+        if self._client is None:
+            await self.start()
+        breaker = self.breaker(service)
+        attempt = 0
+        while True:
+            trial = breaker.before_call()
+            try:
+                response = await self._client.post(url, json=json)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                if not (isinstance(e, NOT_SENT_ERRORS) or idempotent) or attempt >= self.retries:
+                    raise
+                reason = repr(e)
+            except BaseException:
+                # 취소 등은 서비스 상태와 무관하므로 실패로 세지 않음.
+                # 다만 시험 요청이었다면 표시를 풀어야 다음 시험 요청이 들어올 수 있음
+                if trial:
+                    breaker.abandon_trial()
+                raise
+            else:
+                # 4xx 는 호출한 쪽의 문제라서 차단기 실패로 세지 않음
+                if response.status_code < 500:
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                breaker.record_failure()
+                if not (idempotent and response.status_code in RETRY_STATUSES) or attempt >= self.retries:
+                    response.raise_for_status()
+                reason = f"HTTP {response.status_code}"
+            delay = backoff_delay(attempt)
+            logger.info("Retrying %s in %.2fs after %s", service, delay, reason)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+service_client = ServiceClient()
@@ -0,0 +1,194 @@
+# services/input_api/ingest.py
+"""
+Bulk ingest for /memo/create/batch.
+
+Memos are sent to processing concurrently (at most INGEST_CONCURRENCY in
+flight) and, as results come back, forwarded to storage's /store/batch in
+groups of up to INGEST_STORE_BATCH. A group is flushed when it is full or
+when no processed memo has arrived for INGEST_FLUSH_SECONDS, so progress
+keeps flowing for slow inputs. Every memo yields exactly one progress
+event, followed by a final summary; if an internal task dies, the memos
+it still owed are reported as failed so the stream always ends.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from http_client import service_client
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "16"))
+INGEST_STORE_BATCH = int(os.getenv("INGEST_STORE_BATCH", "200"))
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "0.5"))
+INGEST_MAX_ITEMS = int(os.getenv("INGEST_MAX_ITEMS", "10000"))
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def _memo_text(item) -> Optional[str]:
+    return item.get("text") if isinstance(item, dict) and isinstance(item.get("text"), str) else None
+
+
+def _check_size(count: int):
+    if count > INGEST_MAX_ITEMS:
+        raise BatchTooLarge(f"Batch has more than {INGEST_MAX_ITEMS} memos")
+
+
+def parse_items(body: bytes) -> List[Optional[str]]:
+    """
+    Memo texts from a JSON body ({"memos": [{"text": ...}]} or a bare array).
+
+    Unreadable items become None so they are reported as failed without
+    rejecting the rest of the batch.
+    """
+    data = json.loads(body)
+    items = data.get("memos", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Expected {\"memos\": [...]} or a JSON array")
+    _check_size(len(items))
+    return [_memo_text(item) for item in items]
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> List[Optional[str]]:
+    """
+    Memo texts from an NDJSON upload (one {"text": ...} per line), read as it arrives.
+
+    Only the texts are kept, never the whole body, and reading stops as
+    soon as the batch is over INGEST_MAX_ITEMS.
+    """
+    texts: List[Optional[str]] = []
+    pending = b""
+
+    def add(line: bytes):
+        if not line.strip():
+            return
+        try:
+            texts.append(_memo_text(json.loads(line)))
+        except ValueError:
+            texts.append(None)
+        _check_size(len(texts))
+
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            add(line)
+    add(pending)
+    return texts
+
+
+def _failed(index: int, stage: str, error) -> Dict:
+    return {"index": index, "status": "failed", "stage": stage, "error": str(error)}
+
+
+async def ingest(texts: List[Optional[str]], processing_url: str, storage_batch_url: str,
+                 concurrency: int = INGEST_CONCURRENCY, store_batch: int = INGEST_STORE_BATCH,
+                 flush_seconds: float = INGEST_FLUSH_SECONDS) -> AsyncIterator[Dict]:
+    """Yield one progress event per memo (in completion order), then a summary."""
+    started = time.perf_counter()
+    events: asyncio.Queue = asyncio.Queue()
+    processed: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(index: int, text: Optional[str]):
+        if text is None or not text.strip():
+            await events.put(_failed(index, "input", "Text is empty" if text is not None
+                                     else 'Expected an object with a "text" string'))
+            return
+        async with semaphore:
+            try:
+                resp = await service_client.post("processing", processing_url, json={"text": text},
+                                                 idempotent=True)
+                result = resp.json()
+                if not isinstance(result, dict):
+                    raise ValueError(f"processing returned {type(result).__name__}, expected an object")
+            except Exception as e:
+                # 어떤 오류든 이 메모의 이벤트는 꼭 내보내야 스트림이 끝남
+                await events.put(_failed(index, "processing", e))
+                return
+        await processed.put((index, {"original_text": text, **result}))
+
+    async def store(batch: List[Tuple[int, Dict]]):
+        try:
+            resp = await service_client.post("storage", storage_batch_url,
+                                             json={"memos": [payload for _, payload in batch]})
+            body = resp.json()
+            rows = body.get("memos") if isinstance(body, dict) else None
+            if not isinstance(rows, list) or len(rows) != len(batch):
+                raise ValueError(f"storage returned {len(rows) if isinstance(rows, list) else 'no'} rows "
+                                 f"for {len(batch)} memos")
+            # storage 는 입력 순서대로 id 를 돌려줌
+            results = [{"index": index, "status": "stored", "id": row["id"], "created_at": row.get("created_at")}
+                       for (index, _), row in zip(batch, rows)]
+        except Exception as e:
+            results = [_failed(index, "storage", e) for index, _ in batch]
+        for event in results:
+            await events.put(event)
+
+    async def run_processing():
+        await asyncio.gather(*(process(i, t) for i, t in enumerate(texts)))
+        await processed.put(None)
+
+    async def forward():
+        batch = []
+        while True:
+            try:
+                item = await asyncio.wait_for(processed.get(), flush_seconds)
+            except asyncio.TimeoutError:
+                # 한동안 새 결과가 없으면 모인 것만이라도 저장
+                if batch:
+                    await store(batch)
+                    batch = []
+                continue
+            if item is None:
+                break
+            batch.append(item)
+            if len(batch) >= store_batch:
+                await store(batch)
+                batch = []
+        if batch:
+            await store(batch)
+
+    processing = asyncio.ensure_future(run_processing())
+    forwarder = asyncio.ensure_future(forward())
+    workers = {processing, forwarder}
+    reported = set()
+    stored = failed = 0
+
+    def count(event: Dict) -> Dict:
+        nonlocal stored, failed
+        reported.add(event["index"])
+        if event["status"] == "stored":
+            stored += 1
+        else:
+            failed += 1
+        return event
+
+    try:
+        while len(reported) < len(texts):
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({next_event, *workers}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                yield count(next_event.result())
+                continue
+            next_event.cancel()
+            crashed = [task for task in done if not task.cancelled() and task.exception() is not None]
+            workers -= done
+            if crashed or not workers:
+                # 작업이 예외로 끝나면 남은 메모의 이벤트가 오지 않으므로 나머지를 실패로 보고하고 끝냄
+                error = crashed[0].exception() if crashed else "ingest stopped before reporting every memo"
+                while not events.empty():
+                    yield count(events.get_nowait())
+                for index in range(len(texts)):
+                    if index not in reported:
+                        yield count(_failed(index, "ingest", error))
+                break
+        else:
+            await forwarder
+    finally:
+        processing.cancel()
+        forwarder.cancel()
+    yield {"done": True, "total": len(texts), "stored": stored, "failed": failed,
+           "seconds": round(time.perf_counter() - started, 3)}
@@ -1,35 +1,83 @@
 # services/input_api/main.py
-from fastapi import FastAPI, HTTPException
+import json
+import os
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import httpx
 
+from http_client import CircuitOpen, service_client
+from ingest import BatchTooLarge, ingest, parse_items, parse_ndjson
+
 app = FastAPI()
 
-PROCESSING_URL = "http://processing:8001/process"
-STORAGE_URL = "http://storage:8002/store"
+PROCESSING_URL = os.getenv("PROCESSING_URL", "http://processing:8001/process")
+STORAGE_URL = os.getenv("STORAGE_URL", "http://storage:8002/store")
+STORAGE_BATCH_URL = os.getenv("STORAGE_BATCH_URL", "http://storage:8002/store/batch")
 
 class MemoInput(BaseModel):
     text: str
 
+
+@app.on_event("startup")
+async def open_http_client():
+    await service_client.start()
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await service_client.close()
+
+
 @app.post("/memo/create")
 async def create_memo(memo: MemoInput):
-    async with httpx.AsyncClient() as client:
-        try:
-            processing_resp = await client.post(PROCESSING_URL, json={"text": memo.text})
-            processing_resp.raise_for_status()
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
-
-        processed_data = processing_resp.json()
-        store_payload = {
-            "original_text": memo.text,
-            **processed_data
-        }
-
-        try:
-            storage_resp = await client.post(STORAGE_URL, json=store_payload)
-            storage_resp.raise_for_status()
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Storage failed: {e}")
-
-        return {"message": "Memo processed and stored!", "data": storage_resp.json()}
+    try:
+        # 처리 단계는 같은 입력에 같은 결과라서 재시도해도 안전함
+        processing_resp = await service_client.post("processing", PROCESSING_URL,
+                                                    json={"text": memo.text}, idempotent=True)
+    except CircuitOpen as e:
+        raise HTTPException(status_code=503, detail=f"Processing failed: {e}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
+
+    processed_data = processing_resp.json()
+    store_payload = {
+        "original_text": memo.text,
+        **processed_data
+    }
+
+    try:
+        storage_resp = await service_client.post("storage", STORAGE_URL, json=store_payload)
+    except CircuitOpen as e:
+        raise HTTPException(status_code=503, detail=f"Storage failed: {e}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Storage failed: {e}")
+
+    return {"message": "Memo processed and stored!", "data": storage_resp.json()}
+
+
+@app.post("/memo/create/batch")
+async def create_memo_batch(request: Request):
+    """
+    Process and store many memos: {"memos": [{"text": ...}, ...]} or an NDJSON upload.
+
+    Streams NDJSON progress, one {"index", "status", ...} line per memo as it is stored
+    or fails, then a {"done": true, ...} summary.
+    """
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            # 수천 건 업로드를 통째로 메모리에 올리지 않도록 줄 단위로 읽음
+            texts = await parse_ndjson(request.stream())
+        else:
+            texts = parse_items(await request.body())
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+
+    async def progress():
+        async for event in ingest(texts, PROCESSING_URL, STORAGE_BATCH_URL):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
@@ -0,0 +1,124 @@
+# services/manage/bulk.py
+"""
+Set-based bulk update/delete for memos.
+
+A selection is any combination of ids, (id, version) items and a filter
+(category, tags, created_at range), ANDed together, and runs as a single
+UPDATE or DELETE ... RETURNING id. Every update bumps memos.version.
+
+Versioned items are the optimistic check: the statement only matches rows
+whose version is still the one the client read. If any item did not
+match because it changed or was deleted since, the whole operation is
+rolled back and the conflicting ids are reported; items that are current
+but excluded by ids or the filter are simply not affected.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import JSON, String, bindparam, cast, delete, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from models import Memo
+
+
+class EmptySelection(ValueError):
+    pass
+
+
+class VersionConflict(Exception):
+    def __init__(self, conflicts: List[int]):
+        super().__init__(f"{len(conflicts)} memos were changed or deleted since they were read")
+        self.conflicts = conflicts
+
+
+def _conditions(db: Session, ids: Optional[List[int]] = None, items: Optional[Dict[int, int]] = None,
+                category: Optional[str] = None, tags: Optional[List[str]] = None,
+                created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> list:
+    conditions = []
+    if ids:
+        conditions.append(Memo.id.in_(ids))
+    if items:
+        conditions.append(tuple_(Memo.id, Memo.version).in_(list(items.items())))
+    if category:
+        conditions.append(Memo.category == category)
+    if tags:
+        if db.bind.dialect.name == "postgresql":
+            conditions.append(Memo.tags.op("@>")(cast(tags, postgresql.ARRAY(String))))
+        else:
+            # SQLite 에서는 tags 가 JSON 배열
+            conditions += [text(f"EXISTS (SELECT 1 FROM json_each(memos.tags) WHERE json_each.value = :tag_{i})")
+                           .bindparams(**{f"tag_{i}": tag}) for i, tag in enumerate(tags)]
+    if created_from:
+        conditions.append(Memo.created_at >= created_from)
+    if created_to:
+        conditions.append(Memo.created_at < created_to)
+    if not conditions:
+        # 조건 없는 전체 UPDATE/DELETE 는 실수일 가능성이 커서 막음
+        raise EmptySelection("Give ids, items or at least one filter")
+    return conditions
+
+
+def _retag(db: Session, add: List[str], remove: List[str]):
+    """SQL expression for (tags - remove) | add, evaluated per row inside the UPDATE."""
+    if db.bind.dialect.name == "postgresql":
+        array = postgresql.ARRAY(String)
+        return text(
+            "ARRAY(SELECT t FROM unnest(coalesce(memos.tags, CAST('{}' AS VARCHAR[]))) AS t "
+            "WHERE NOT (t = ANY(:remove_tags)) UNION SELECT unnest(:add_tags))"
+        ).bindparams(bindparam("remove_tags", remove, type_=array), bindparam("add_tags", add, type_=array))
+    return text(
+        "(SELECT json_group_array(value) FROM (SELECT value FROM json_each(memos.tags) "
+        "WHERE value NOT IN (SELECT value FROM json_each(:remove_tags)) "
+        "UNION SELECT value FROM json_each(:add_tags)))"
+    ).bindparams(bindparam("remove_tags", remove, type_=JSON), bindparam("add_tags", add, type_=JSON))
+
+
+def _check_versions(db: Session, items: Optional[Dict[int, int]], matched: List[int]):
+    """Roll back and raise if a versioned item was skipped because it changed or was deleted.
+
+    Items skipped only because ids/filter excluded them are still at the
+    version the client read, so they are not conflicts.
+    """
+    if not items:
+        return
+    unmatched = set(items) - set(matched)
+    if not unmatched:
+        return
+    # 빠진 항목의 현재 버전을 확인: 없어졌거나 버전이 다르면 충돌
+    current = dict(db.execute(select(Memo.id, Memo.version).where(Memo.id.in_(unmatched))).all())
+    conflicts = sorted(memo_id for memo_id in unmatched if current.get(memo_id) != items[memo_id])
+    if conflicts:
+        db.rollback()
+        raise VersionConflict(conflicts)
+
+
+def bulk_update(db: Session, values: Dict, add_tags: Optional[List[str]] = None,
+                remove_tags: Optional[List[str]] = None, **selection) -> int:
+    """Apply values (and tag additions/removals) to every selected memo; returns the affected count."""
+    values = dict(values)
+    if add_tags or remove_tags:
+        if "tags" in values:
+            raise ValueError("Use either tags or add_tags/remove_tags, not both")
+        values["tags"] = _retag(db, add_tags or [], remove_tags or [])
+    if not values:
+        raise ValueError("Nothing to update")
+    values["version"] = Memo.version + 1
+
+    items = selection.get("items")
+    statement = (update(Memo).where(*_conditions(db, **selection)).values(**values)
+                 .returning(Memo.id).execution_options(synchronize_session=False))
+    matched = db.execute(statement).scalars().all()
+    _check_versions(db, items, matched)
+    db.commit()
+    return len(matched)
+
+
+def bulk_delete(db: Session, **selection) -> int:
+    items = selection.get("items")
+    statement = (delete(Memo).where(*_conditions(db, **selection))
+                 .returning(Memo.id).execution_options(synchronize_session=False))
+    matched = db.execute(statement).scalars().all()
+    _check_versions(db, items, matched)
+    db.commit()
+    return len(matched)
@@ -1,32 +1,111 @@
 # services/manage/main.py
+from datetime import datetime
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session 
-from models import Memo
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from db import engine, get_db
+from models import Memo, init_schema
+
+import bulk
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def create_schema():
+    # storage 보다 먼저 시작해도 version 컬럼이 있도록 함
+    init_schema(engine)
+
 class MemoUpdate(BaseModel):
     summary: str
     tags: list[str]
     category: str
+    # 주면 그 버전일 때만 수정 (아니면 409)
+    version: Optional[int] = None
+
+class MemoFilter(BaseModel):
+    category: Optional[str] = None
+    tags: Optional[list[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class VersionedId(BaseModel):
+    id: int
+    version: int
+
+class BulkSelection(BaseModel):
+    ids: Optional[list[int]] = None
+    items: Optional[list[VersionedId]] = None
+    filter: Optional[MemoFilter] = None
+
+    def selection(self) -> dict:
+        return {
+            "ids": self.ids,
+            "items": {item.id: item.version for item in self.items} if self.items else None,
+            **(self.filter.model_dump() if self.filter else {}),
+        }
+
+class BulkPatch(BulkSelection):
+    summary: Optional[str] = None
+    tags: Optional[list[str]] = None
+    category: Optional[str] = None
+    add_tags: Optional[list[str]] = None
+    remove_tags: Optional[list[str]] = None
+
+def _version_conflict(e: bulk.VersionConflict):
+    return HTTPException(status_code=409, detail={"message": str(e), "conflicts": e.conflicts})
 
 @app.put("/memo/update/{memo_id}")
 def update_memo(memo_id: int, data: MemoUpdate, db: Session = Depends(get_db)):
-    memo = db.query(Memo).filter(Memo.id == memo_id).first()
-    if not memo:
+    statement = update(Memo).where(Memo.id == memo_id)
+    if data.version is not None:
+        statement = statement.where(Memo.version == data.version)
+    result = db.execute(statement.values(summary=data.summary, tags=data.tags, category=data.category,
+                                         version=Memo.version + 1)
+                        .execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        db.rollback()
+        if data.version is not None and db.query(Memo.id).filter(Memo.id == memo_id).first():
+            raise _version_conflict(bulk.VersionConflict([memo_id]))
         raise HTTPException(status_code=404, detail="Memo not found")
-    memo.summary = data.summary
-    memo.tags = data.tags
-    memo.category = data.category
     db.commit()
     return {"message": "Memo updated"}
 
 @app.delete("/memo/delete/{memo_id}")
 def delete_memo(memo_id: int, db: Session = Depends(get_db)):
-    memo = db.query(Memo).filter(Memo.id == memo_id).first()
-    if not memo:
+    result = db.execute(delete(Memo).where(Memo.id == memo_id).execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Memo not found")
-    db.delete(memo)
     db.commit()
     return {"message": "Memo deleted"}
+
+@app.patch("/memo/bulk")
+def bulk_update_memos(data: BulkPatch, db: Session = Depends(get_db)):
+    """
+    Partially update every memo selected by ids, versioned items and/or filter in one UPDATE.
+
+    Only the given fields change; add_tags/remove_tags edit tags in place.
+    """
+    values = data.model_dump(include={"summary", "tags", "category"}, exclude_none=True)
+    try:
+        affected = bulk.bulk_update(db, values, data.add_tags, data.remove_tags, **data.selection())
+    except bulk.VersionConflict as e:
+        raise _version_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected}
+
+@app.delete("/memo/bulk")
+def bulk_delete_memos(data: BulkSelection, db: Session = Depends(get_db)):
+    """Delete every memo selected by ids, versioned items and/or filter in one DELETE."""
+    try:
+        affected = bulk.bulk_delete(db, **data.selection())
+    except bulk.VersionConflict as e:
+        raise _version_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected}
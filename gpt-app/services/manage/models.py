@@ -1,13 +1,37 @@
-# services/query/models.py
-from sqlalchemy import Column, Integer, String, DateTime, ARRAY
+# services/manage/models.py
+from sqlalchemy import Column, Integer, String, DateTime, ARRAY, JSON, inspect, text
 from db import Base
+from datetime import datetime
 
 class Memo(Base):
     __tablename__ = "memos"
 
-    id = Column(Integer, primary_key=True)
-    original_text = Column(String)
+    id = Column(Integer, primary_key=True, index=True)
+    original_text = Column(String, nullable=False)
     summary = Column(String)
-    tags = Column(ARRAY(String))
+    # SQLite (로컬 개발) 에는 ARRAY 가 없어서 JSON 배열로 저장
+    tags = Column(ARRAY(String).with_variant(JSON, "sqlite"))
     category = Column(String)
-    created_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # 수정할 때마다 1 씩 올라감 (manage 의 낙관적 동시성 검사용)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+
+# 여러 서비스가 동시에 시작해도 스키마 작업이 겹치지 않도록 잡는 Postgres advisory lock 번호 (모든 서비스 공통)
+SCHEMA_LOCK_ID = 0x6D656D6F
+
+
+def init_schema(engine):
+    """
+    Create the memos table and add the columns introduced since (idempotent).
+
+    storage, query and manage each run this at startup, so the schema is
+    right whichever of them reaches the database first.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEMA_LOCK_ID})
+        Base.metadata.create_all(bind=conn)
+        # create_all 은 기존 테이블에 컬럼을 추가하지 않으므로 version 컬럼은 직접 추가
+        if "version" not in {column["name"] for column in inspect(conn).get_columns("memos")}:
+            conn.execute(text("ALTER TABLE memos ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
@@ -1,26 +1,62 @@
 # services/processing/main.py
+import time
+
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from nlp import simple_summarize, extract_keywords
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from workers import nlp_workers
 
 app = FastAPI()
 
 
 class TextRequest(BaseModel):
     text: str
+    # 요약에 넣을 문장 수 (없으면 NLP_SUMMARY_SENTENCES)
+    summary_sentences: Optional[int] = Field(None, ge=1)
+
+
+class BatchRequest(BaseModel):
+    texts: list[str]
+    summary_sentences: Optional[int] = Field(None, ge=1)
+
+
+@app.on_event("startup")
+def start_workers():
+    nlp_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    nlp_workers.stop()
 
 
 @app.post("/process")
-def process_text(req: TextRequest):
+async def process_text(req: TextRequest):
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text is empty")
 
-    summary = simple_summarize(req.text)
-    keywords = extract_keywords(req.text)
-    category = "업무" if "회의" in req.text else "기타"
+    return await nlp_workers.analyze(req.text, req.summary_sentences)
+
+
+@app.post("/process/batch")
+async def process_batch(req: BatchRequest):
+    """Process many texts across the NLP workers; results are in input order."""
+    empty = [i for i, text in enumerate(req.texts) if not text.strip()]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Text is empty at index {empty}")
 
+    started = time.perf_counter()
+    results = await nlp_workers.analyze_batch(req.texts, req.summary_sentences)
+    seconds = time.perf_counter() - started
     return {
-        "summary": summary,
-        "tags": keywords,
-        "category": category
+        "results": results,
+        "timing": {
+            "seconds": round(seconds, 4),
+            "texts": len(req.texts),
+            "per_text_ms": round(seconds * 1000 / len(req.texts), 3) if req.texts else 0.0,
+            "mode": nlp_workers.mode,
+            "workers": nlp_workers.active_workers,
+            "chunks": len(nlp_workers.chunks(req.texts)),
+        }
     }
@@ -1,9 +1,147 @@
 # services/processing/nlp.py
-def simple_summarize(text: str) -> str:
-    # 임시 요약 로직: 첫 문장
-    return text.split('.')[0] + '.' if '.' in text else text[:50]
+"""
+Summary, tags and category for a memo.
+
+The summary is extractive TextRank over a sparse sentence graph. Sentences
+are TF-IDF vectors of Hangul character bigrams and Latin words (bigrams
+need no morphological analysis for Korean particles). Each sentence is
+linked only to sentences at most NLP_TEXTRANK_WINDOW positions away, so
+building the graph costs O(window * nnz) instead of O(n^2) on long
+transcripts; short memos are fully connected. A whole batch of documents
+is scored in one pass: all sentences share one matrix and the power
+iteration runs on the block-diagonal graph.
+"""
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+
+NLP_SUMMARY_SENTENCES = int(os.getenv("NLP_SUMMARY_SENTENCES", "3"))
+NLP_TEXTRANK_WINDOW = int(os.getenv("NLP_TEXTRANK_WINDOW", "20"))
+DAMPING = 0.85
+# 수렴 판정 없이 고정 횟수만 돌려서 배치 구성과 무관하게 같은 점수가 나오게 함
+ITERATIONS = 30
+
+# 문장 부호, 존댓말 종결 어미 뒤, 또는 다/요/죠/까 로 끝난 줄에서 나눔 (자막은 줄이 문장 단위가 아님)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?。])\s+|(?<=니다)\s+|(?<=[어아에예해네군]요)\s+|(?<=죠)\s+"
+                             r"|(?<=[다요죠까])[ \t]*\n\s*|\n\s*\n\s*")
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z][a-z0-9]+|\d+")
+
+
+def split_sentences(text: str) -> List[str]:
+    parts = (re.sub(r"\s+", " ", part).strip() for part in _SENTENCE_BREAK.split(text))
+    return [part for part in parts if part]
+
+
+def _terms(sentence: str) -> List[str]:
+    terms = []
+    for token in _TOKEN_RE.findall(sentence.lower()):
+        if token[0] >= "가":
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+def _sentence_vectors(sentences: List[str], doc: np.ndarray) -> sparse.csr_matrix:
+    """L2-normalised TF-IDF rows, one per sentence, with IDF taken within each sentence's document."""
+    vocab, indices, indptr = {}, [], [0]
+    for sentence in sentences:
+        indices.extend(vocab.setdefault(term, len(vocab)) for term in _terms(sentence))
+        indptr.append(len(indices))
+    x = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(sentences), len(vocab)))
+    x.sum_duplicates()
+    # 문서 안에서의 DF 를 써서 같은 글은 어떤 배치에 섞여 와도 같은 요약이 나오게 함
+    nz_doc = doc[np.repeat(np.arange(len(sentences)), np.diff(x.indptr))]
+    _, pair, df = np.unique(nz_doc * len(vocab) + x.indices, return_inverse=True, return_counts=True)
+    n_docs = np.bincount(doc)[nz_doc]
+    x.data = (1.0 + np.log(x.data)) * (np.log((1.0 + n_docs) / (1.0 + df[pair.ravel()])) + 1.0)
+    norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+    return sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ x
+
+
+def _banded_graph(x: sparse.csr_matrix, doc: np.ndarray, window: int) -> sparse.csr_matrix:
+    """Cosine similarity between sentences of the same document at most `window` apart."""
+    n = x.shape[0]
+    rows, cols, vals = [], [], []
+    for offset in range(1, min(window, n - 1) + 1):
+        sims = np.asarray(x[:-offset].multiply(x[offset:]).sum(axis=1)).ravel()
+        keep = np.nonzero((doc[:-offset] == doc[offset:]) & (sims > 0))[0]
+        rows += [keep, keep + offset]
+        cols += [keep + offset, keep]
+        vals += [sims[keep], sims[keep]]
+    if not rows:
+        return sparse.csr_matrix((n, n))
+    return sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+
+
+def _textrank(graph: sparse.csr_matrix, doc: np.ndarray) -> np.ndarray:
+    """PageRank per document, run for all documents at once on the block-diagonal graph."""
+    out = np.asarray(graph.sum(axis=1)).ravel()
+    transition_t = (sparse.diags(np.divide(1.0, out, out=np.zeros_like(out), where=out > 0)) @ graph).T.tocsr()
+    teleport = 1.0 / np.bincount(doc)[doc]
+    dangling = out == 0
+    rank = teleport.copy()
+    for _ in range(ITERATIONS):
+        # 연결이 없는 문장의 점수는 같은 문서 안에 고르게 나눠줌
+        leaked = np.bincount(doc, weights=rank * dangling)[doc]
+        rank = (1 - DAMPING) * teleport + DAMPING * (transition_t @ rank + leaked * teleport)
+    return rank
+
+
+def summarize_batch(texts: List[str], sentences: Optional[int] = None,
+                    window: int = NLP_TEXTRANK_WINDOW) -> List[str]:
+    """Top `sentences` TextRank sentences of each text, in their original order."""
+    k = sentences or NLP_SUMMARY_SENTENCES
+    split = [split_sentences(text) for text in texts]
+    all_sentences = [s for doc_sentences in split for s in doc_sentences]
+    if not all_sentences:
+        return ["" for _ in texts]
+    doc = np.repeat(np.arange(len(texts)), [len(doc_sentences) for doc_sentences in split])
+
+    x = _sentence_vectors(all_sentences, doc)
+    rank = _textrank(_banded_graph(x, doc, window), doc)
+
+    # 문서별로 점수 내림차순(동점이면 앞 문장) 정렬 후 상위 k 개를 원래 순서대로
+    positions = np.arange(len(all_sentences))
+    order = np.lexsort((positions, -rank, doc))
+    starts = np.concatenate([[0], np.cumsum(np.bincount(doc, minlength=len(texts)))[:-1]])
+    chosen = np.sort(order[positions - starts[doc[order]] < k])
+
+    summaries = [[] for _ in texts]
+    for i in chosen:
+        summaries[doc[i]].append(all_sentences[i])
+    return [" ".join(parts) for parts in summaries]
+
+
+def simple_summarize(text: str, sentences: Optional[int] = None) -> str:
+    return summarize_batch([text], sentences)[0]
+
 
 def extract_keywords(text: str) -> list:
     # 임시 태그 추출: 단어 길이 2 이상, 중복 제거
     words = text.replace('.', '').split()
     return list(set([word for word in words if len(word) >= 2]))[:5]
+
+
+def categorize(text: str) -> str:
+    return "업무" if "회의" in text else "기타"
+
+
+def analyze(text: str, summary_sentences: Optional[int] = None) -> dict:
+    """summary/tags/category for one text; top-level so process-pool workers can run it."""
+    return analyze_batch([text], summary_sentences)[0]
+
+
+def analyze_batch(texts: list, summary_sentences: Optional[int] = None) -> list:
+    summaries = summarize_batch(texts, summary_sentences)
+    return [
+        {
+            "summary": summary,
+            "tags": extract_keywords(text),
+            "category": categorize(text)
+        }
+        for text, summary in zip(texts, summaries)
+    ]
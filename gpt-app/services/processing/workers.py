@@ -0,0 +1,65 @@
+# services/processing/workers.py
+"""
+Where the NLP functions run.
+
+NLP_EXECUTOR=process (default) runs them in a ProcessPoolExecutor with
+NLP_WORKERS processes (default: one per CPU), so CPU-bound work scales past
+one core and never blocks the event loop. NLP_EXECUTOR=inline runs them in
+the server's thread pool, as before. Batches are split into one chunk per
+worker (at most NLP_CHUNK_SIZE texts each) so each worker gets a single
+round trip, and the chunk results are joined back in input order.
+"""
+import asyncio
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import nlp
+
+NLP_EXECUTOR = os.getenv("NLP_EXECUTOR", "process")
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", "0")) or os.cpu_count() or 1
+NLP_CHUNK_SIZE = int(os.getenv("NLP_CHUNK_SIZE", "256"))
+
+
+class NLPWorkers:
+    def __init__(self, mode: str = NLP_EXECUTOR, workers: int = NLP_WORKERS, chunk_size: int = NLP_CHUNK_SIZE):
+        self.mode = mode
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def active_workers(self) -> int:
+        return self.workers if self._pool is not None else 1
+
+    def start(self):
+        if self.mode == "process" and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        if self._pool is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def analyze(self, text: str, summary_sentences: Optional[int] = None) -> dict:
+        return await self._run(nlp.analyze, text, summary_sentences)
+
+    def chunks(self, texts: List[str]) -> List[List[str]]:
+        size = max(1, min(self.chunk_size, math.ceil(len(texts) / self.active_workers)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    async def analyze_batch(self, texts: List[str], summary_sentences: Optional[int] = None) -> List[dict]:
+        parts = await asyncio.gather(*(self._run(nlp.analyze_batch, chunk, summary_sentences)
+                                       for chunk in self.chunks(texts)))
+        return [result for part in parts for result in part]
+
+
+nlp_workers = NLPWorkers()
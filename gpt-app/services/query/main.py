@@ -1,24 +1,58 @@
 # services/query/main.py
-from fastapi import FastAPI, Query, Depends
-from typing import Optional
+import json
+from fastapi import FastAPI, Query, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from sqlalchemy.orm import Session
-from db import get_db
+from db import SessionLocal, engine, get_db
+from models import init_schema
 
-from models import Memo
+import search
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def create_search_indexes():
+    # storage 보다 먼저 시작해도 인덱스를 만들 수 있도록 테이블부터 만듦
+    init_schema(engine)
+    search.ensure_search_indexes(engine)
+
+
+def _stream_ndjson(limit: Optional[int], filters: dict):
+    # 응답이 끝날 때까지 세션이 열려 있어야 하므로 요청 의존성과 별도로 관리
+    db = SessionLocal()
+    try:
+        for item in search.iter_search(db, limit=limit, **filters):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+
+
 @app.get("/memo/search")
 def search_memos(
     keyword: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    sort: Optional[Literal["recent", "relevance"]] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    format: Literal["json", "ndjson"] = Query("json"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Memo)
-
-    if keyword:
-        query = query.filter(Memo.original_text.ilike(f"%{keyword}%"))
-    if category:
-        query = query.filter(Memo.category == category)
+    """
+    Memos matching keyword (ranked, with a highlighted snippet), category and every given tag.
 
-    return query.all()
+    JSON returns one page ({"items", "next_cursor"}); pass next_cursor back as cursor for the
+    next page. ndjson streams every match (or the first `limit`) one object per line.
+    sort defaults to relevance with a keyword and recent otherwise; cursors need sort=recent.
+    """
+    filters = dict(keyword=keyword, category=category, tags=tag, sort=sort, cursor=cursor)
+    try:
+        if format == "ndjson":
+            # 잘못된 커서는 스트림을 시작하기 전에 400 으로 돌려줌
+            search.build_search(db, **filters)
+            return StreamingResponse(_stream_ndjson(limit, filters), media_type="application/x-ndjson")
+        return search.search_page(db, limit=min(limit or search.DEFAULT_LIMIT, search.MAX_LIMIT), **filters)
+    except search.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
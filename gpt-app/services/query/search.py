@@ -0,0 +1,268 @@
+# services/query/search.py
+"""
+Indexed memo search.
+
+Postgres: pg_trgm GIN index on original_text, so ILIKE '%kw%' is an index
+lookup for keywords of 3+ characters (trigrams need no word segmentation,
+which suits Korean where particles attach to words), ranked by
+word_similarity. category has a btree index and tags a GIN index for @>.
+
+SQLite (local/dev): an external-content FTS5 table with the trigram
+tokenizer, kept in sync by triggers, ranked by bm25 with FTS5 snippets.
+
+Trigrams cannot serve 2-character keywords, which are most Korean nouns
+(회의, 모델), so both backends also index character bigrams: on Postgres
+an expression GIN index over memo_bigrams(original_text), a tsvector of
+the lower-cased bigrams; on SQLite a (bigram, memo_id) table kept in sync
+by triggers. The ILIKE filter still runs on the candidates, so results
+are exact. Only 1-character keywords scan.
+
+Results are pages of projected columns (never whole Memo rows). Sorting
+by recency pages with a keyset cursor on (created_at, id), so every page
+costs one index range scan; sort=relevance returns only the top `limit`.
+iter_search streams rows from a server-side cursor in fixed-size batches.
+"""
+import base64
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import String, cast, column, func, literal_column, table, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from models import Memo
+
+MARK_OPEN, MARK_CLOSE = "<mark>", "</mark>"
+SNIPPET_CHARS = 40
+DEFAULT_LIMIT, MAX_LIMIT = 50, 500
+STREAM_BATCH = 500
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_memos_original_text_trgm ON memos USING gin (original_text gin_trgm_ops)",
+    # 공백이 들어간 바이그램은 키워드가 될 수 없어서 뺌
+    "CREATE OR REPLACE FUNCTION memo_bigrams(t text) RETURNS tsvector "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ "
+    "SELECT coalesce(array_to_tsvector(array_agg(DISTINCT lower(substr(t, i, 2)))), ''::tsvector) "
+    "FROM generate_series(1, char_length(t) - 1) AS i WHERE substr(t, i, 2) !~ '\\s' $$",
+    "CREATE INDEX IF NOT EXISTS ix_memos_original_text_bigram ON memos USING gin (memo_bigrams(original_text))",
+    "CREATE INDEX IF NOT EXISTS ix_memos_category ON memos (category)",
+    "CREATE INDEX IF NOT EXISTS ix_memos_tags ON memos USING gin (tags)",
+    "CREATE INDEX IF NOT EXISTS ix_memos_created_at_id ON memos (created_at, id)",
+]
+
+MEMOS_FTS = table("memos_fts", column("rowid"))
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE memos_fts USING fts5("
+    "original_text, summary, content='memos', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS memos_fts_ai AFTER INSERT ON memos BEGIN "
+    "INSERT INTO memos_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS memos_fts_ad AFTER DELETE ON memos BEGIN "
+    "INSERT INTO memos_fts(memos_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS memos_fts_au AFTER UPDATE ON memos BEGIN "
+    "INSERT INTO memos_fts(memos_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); "
+    "INSERT INTO memos_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+    "CREATE INDEX IF NOT EXISTS ix_memos_category ON memos (category)",
+    "CREATE INDEX IF NOT EXISTS ix_memos_created_at_id ON memos (created_at, id)",
+    # 인덱스를 처음 만들 때 기존 행을 채움
+    "INSERT INTO memos_fts(memos_fts) VALUES ('rebuild')",
+]
+
+
+def _sqlite_bigrams(source: str, memo_id: str, from_prefix: str = "") -> str:
+    """SELECT of the distinct (bigram, memo_id) pairs of one text.
+
+    Triggers cannot use recursive CTEs, so positions come from json_each
+    over an array of length(text) zeros built from zeroblob.
+    """
+    return (f"SELECT DISTINCT lower(substr({source}, p.key + 1, 2)), {memo_id} "
+            f"FROM {from_prefix}json_each('[' || replace(hex(zeroblob(max(length({source}) - 1, 0))), '00', '0,') || '0]') AS p "
+            f"WHERE p.key < length({source}) - 1 "
+            f"AND substr({source}, p.key + 1, 2) NOT GLOB '*[' || char(9, 10, 13, 32) || ']*'")
+
+
+SQLITE_BIGRAM_DDL = [
+    "CREATE TABLE memo_bigrams (bigram TEXT NOT NULL, memo_id INTEGER NOT NULL, "
+    "PRIMARY KEY (bigram, memo_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS ix_memo_bigrams_memo_id ON memo_bigrams (memo_id)",
+    "CREATE TRIGGER IF NOT EXISTS memo_bigrams_ai AFTER INSERT ON memos BEGIN "
+    f"INSERT INTO memo_bigrams (bigram, memo_id) {_sqlite_bigrams('new.original_text', 'new.id')}; END",
+    "CREATE TRIGGER IF NOT EXISTS memo_bigrams_ad AFTER DELETE ON memos BEGIN "
+    "DELETE FROM memo_bigrams WHERE memo_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS memo_bigrams_au AFTER UPDATE OF original_text ON memos BEGIN "
+    "DELETE FROM memo_bigrams WHERE memo_id = old.id; "
+    f"INSERT INTO memo_bigrams (bigram, memo_id) {_sqlite_bigrams('new.original_text', 'new.id')}; END",
+    # 기존 행을 채움
+    "INSERT INTO memo_bigrams (bigram, memo_id) "
+    + _sqlite_bigrams("m.original_text", "m.id", "memos AS m, "),
+]
+
+
+def ensure_search_indexes(engine):
+    """Create the search indexes (idempotent). Call once at startup, after models.init_schema."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+        elif engine.dialect.name == "sqlite":
+            # 나중에 추가된 인덱스도 기존 개발 DB 에 만들어지도록 테이블별로 확인
+            for name, statements in (("memos_fts", SQLITE_DDL), ("memo_bigrams", SQLITE_BIGRAM_DDL)):
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}).first()
+                if not exists:
+                    for statement in statements:
+                        conn.execute(text(statement))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, memo_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{memo_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, memo_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(memo_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def make_snippet(window: str, keyword: str, clipped_start: bool = False, clipped_end: bool = False) -> str:
+    """Mark every case-insensitive match of keyword in a text window fetched around the first match."""
+    marked = re.sub(re.escape(keyword), lambda m: f"{MARK_OPEN}{m.group(0)}{MARK_CLOSE}",
+                    window or "", flags=re.IGNORECASE)
+    return ("…" if clipped_start else "") + marked + ("…" if clipped_end else "")
+
+
+def _like_pattern(keyword: str) -> str:
+    return "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _bigram_match(dialect: str, keyword: str):
+    """Index-backed candidate filter for a 2-character keyword."""
+    if dialect == "postgresql":
+        bigram = keyword.lower()
+        # tsquery 리터럴: 작은따옴표로 감싸고 ' 와 \ 는 이스케이프
+        lexeme = "'" + bigram.replace("\\", "\\\\").replace("'", "''") + "'"
+        return text("memo_bigrams(memos.original_text) @@ CAST(:bigram AS tsquery)").bindparams(bigram=lexeme)
+    # 트리거와 같은 SQLite lower() 로 맞춤
+    return text("memos.id IN (SELECT memo_id FROM memo_bigrams WHERE bigram = lower(:bigram))").bindparams(
+        bigram=keyword)
+
+
+def _row_dict(row, keyword: str) -> Dict:
+    item = {
+        "id": row.id,
+        "summary": row.summary,
+        "tags": row.tags,
+        "category": row.category,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "version": row.version,
+    }
+    if keyword:
+        item["rank"] = None if row.rank is None else float(row.rank)
+        if "snippet" in row._fields:
+            item["snippet"] = row.snippet
+        else:
+            item["snippet"] = make_snippet(row.window, keyword, row.window_start > 1,
+                                           row.window_start + len(row.window or "") <= row.text_length)
+    return item
+
+
+def _filtered(db: Session, category: Optional[str], tags: List[str]):
+    query = db.query(Memo.id, Memo.summary, Memo.tags, Memo.category, Memo.created_at, Memo.version)
+    if category:
+        query = query.filter(Memo.category == category)
+    if tags and db.bind.dialect.name == "postgresql":
+        query = query.filter(Memo.tags.op("@>")(cast(tags, postgresql.ARRAY(String))))  # GIN
+    else:
+        # SQLite 에서는 tags 가 JSON 배열
+        for i, tag in enumerate(tags):
+            query = query.filter(text(
+                f"EXISTS (SELECT 1 FROM json_each(memos.tags) WHERE json_each.value = :tag_{i})"
+            ).bindparams(**{f"tag_{i}": tag}))
+    return query
+
+
+def build_search(db: Session, keyword: Optional[str] = None, category: Optional[str] = None,
+                 tags: Optional[List[str]] = None, sort: Optional[str] = None, cursor: Optional[str] = None):
+    """(query, keyword, sort) for a search; the query selects only the columns _row_dict needs."""
+    keyword = (keyword or "").strip()
+    sort = sort or ("relevance" if keyword else "recent")
+    if cursor and sort != "recent":
+        raise InvalidCursor("Cursors are only supported with sort=recent")
+    query = _filtered(db, category, tags or [])
+    recent = (Memo.created_at.desc(), Memo.id.desc())
+
+    if cursor:
+        created_at, memo_id = decode_cursor(cursor)
+        # (created_at, id) 행 비교라서 복합 인덱스 범위 스캔 한 번으로 다음 페이지를 찾음
+        query = query.filter(tuple_(Memo.created_at, Memo.id) < tuple_(created_at, memo_id))
+
+    if not keyword:
+        return query.order_by(*recent), keyword, sort
+
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite" and len(keyword) >= 3:
+        # FTS5 trigram: 구문 검색으로 감싸서 특수문자를 그대로 찾음
+        phrase = 'original_text : "' + keyword.replace('"', '""') + '"'
+        # bm25 는 작을수록 관련도가 높으므로 부호를 바꿔서 내려줌
+        rank = (-func.bm25(literal_column("memos_fts"))).label("rank")
+        snippet = func.snippet(literal_column("memos_fts"), 0, MARK_OPEN, MARK_CLOSE, "…", 16).label("snippet")
+        query = (query.add_columns(rank, snippet)
+                 .join(MEMOS_FTS, MEMOS_FTS.c.rowid == Memo.id)
+                 .filter(text("memos_fts MATCH :phrase").bindparams(phrase=phrase)))
+    else:
+        if len(keyword) == 2:
+            query = query.filter(_bigram_match(dialect, keyword))
+        query = query.filter(Memo.original_text.ilike(_like_pattern(keyword), escape="\\"))
+        # 스니펫용으로 첫 일치 주변의 일부만 가져옴
+        if dialect == "postgresql":
+            position = func.strpos(func.lower(Memo.original_text), keyword.lower())
+            start = func.greatest(position - SNIPPET_CHARS, 1)
+            rank = func.word_similarity(keyword, Memo.original_text).label("rank")
+        else:
+            position = func.instr(func.lower(Memo.original_text), keyword.lower())
+            start = func.max(position - SNIPPET_CHARS, 1)
+            rank = literal_column("NULL").label("rank")
+        query = query.add_columns(
+            rank,
+            func.substr(Memo.original_text, start, len(keyword) + 2 * SNIPPET_CHARS).label("window"),
+            start.label("window_start"),
+            func.length(Memo.original_text).label("text_length"),
+        )
+
+    if sort == "relevance":
+        return query.order_by(rank.desc(), *recent), keyword, sort
+    return query.order_by(*recent), keyword, sort
+
+
+def search_page(db: Session, limit: int = DEFAULT_LIMIT, **filters) -> Dict:
+    """One page of results; next_cursor is set when more rows follow (sort=recent only)."""
+    query, keyword, sort = build_search(db, **filters)
+    rows = query.limit(limit + 1).all()
+    items = [_row_dict(row, keyword) for row in rows[:limit]]
+    next_cursor = None
+    if sort == "recent" and len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def iter_search(db: Session, limit: Optional[int] = None, batch_size: int = STREAM_BATCH,
+                **filters) -> Iterator[Dict]:
+    """Yield result rows from a server-side cursor, batch_size rows in memory at a time."""
+    query, keyword, _ = build_search(db, **filters)
+    if limit:
+        query = query.limit(limit)
+    for row in query.execution_options(stream_results=True).yield_per(batch_size):
+        yield _row_dict(row, keyword)
@@ -1,11 +1,17 @@
 # services/storage/main.py
-from fastapi import FastAPI, Depends
+import os
+from datetime import datetime
+
+from fastapi import FastAPI, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from db import SessionLocal, Base, engine
-from models import Memo
+from db import SessionLocal, engine
+from models import Memo, init_schema
+
+STORE_BATCH_MAX = int(os.getenv("STORE_BATCH_MAX", "5000"))
 
-Base.metadata.create_all(bind=engine)
+init_schema(engine)
 
 app = FastAPI()
 
@@ -15,6 +21,9 @@ class MemoIn(BaseModel):
     tags: list[str]
     category: str
 
+class MemoBatchIn(BaseModel):
+    memos: list[MemoIn]
+
 def get_db():
     db = SessionLocal()
     try:
@@ -40,3 +49,50 @@ def store_memo(memo: MemoIn, db: Session = Depends(get_db)):
         "category": db_memo.category,
         "created_at": db_memo.created_at.isoformat()
     }
+
+@app.post("/store/batch")
+def store_memo_batch(batch: MemoBatchIn, db: Session = Depends(get_db)):
+    """
+    Insert many memos in one transaction with multi-row INSERT ... RETURNING.
+
+    Returns the stored rows (same shape as /store) in input order.
+    """
+    if len(batch.memos) > STORE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch has {len(batch.memos)} memos, the limit is {STORE_BATCH_MAX}")
+    if not batch.memos:
+        return {"memos": []}
+
+    created_at = datetime.utcnow()
+    values = [
+        {
+            "original_text": memo.original_text,
+            "summary": memo.summary,
+            "tags": memo.tags,
+            "category": memo.category,
+            "created_at": created_at,
+        }
+        for memo in batch.memos
+    ]
+    if db.bind.dialect.name == "sqlite":
+        # SQLite 는 RETURNING 순서를 보장하지 않아서 sort_by_parameter_order 를 주면 SQLAlchemy 가
+        # 한 행씩 INSERT 함. 한 트랜잭션 안의 INSERT 는 입력 순서대로 id 가 커지므로 id 순으로 맞춤
+        rows = sorted(db.execute(insert(Memo).returning(Memo.id, Memo.created_at), values).all(),
+                      key=lambda row: row.id)
+    else:
+        # sort_by_parameter_order: RETURNING 결과를 입력 순서에 맞춰 돌려받음
+        rows = db.execute(
+            insert(Memo).returning(Memo.id, Memo.created_at, sort_by_parameter_order=True), values
+        ).all()
+    db.commit()
+    return {
+        "memos": [
+            {
+                "id": row.id,
+                "summary": memo.summary,
+                "tags": memo.tags,
+                "category": memo.category,
+                "created_at": row.created_at.isoformat()
+            }
+            for memo, row in zip(batch.memos, rows)
+        ]
+    }
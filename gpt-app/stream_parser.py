@@ -0,0 +1,72 @@
+"""Incremental parser for streamed classification JSON.
+
+Fed the completion deltas as they arrive, it yields each
+``"n": "category"`` pair of the top-level ``classification`` object as
+soon as the value string closes, without waiting for the whole document.
+"""
+import json
+from typing import List, Tuple
+
+
+class ClassificationStreamParser:
+    def __init__(self, field: str = "classification"):
+        self.field = field
+        self.buffer = []        # 지금까지 받은 전체 텍스트 (마지막에 json.loads 용)
+        self._stack = []        # [container_type, name, expecting_key]
+        self._pending_key = None
+        self._in_string = False
+        self._escape = False
+        self._chars = []
+
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a delta and return the (sentence number, category) pairs it completed."""
+        self.buffer.append(chunk)
+        pairs = []
+        for ch in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._chars.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._chars.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    pair = self._end_string(json.loads('"' + "".join(self._chars) + '"'))
+                    if pair:
+                        pairs.append(pair)
+                else:
+                    self._chars.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._chars = []
+            elif ch in "{[":
+                name = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append([ch, name, ch == "{"])
+                self._pending_key = None
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._pending_key = None
+            elif ch == ":":
+                if self._stack:
+                    self._stack[-1][2] = False
+            elif ch == ",":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][2] = True
+                    self._pending_key = None
+        return pairs
+
+    def _end_string(self, value: str):
+        if not self._stack or self._stack[-1][0] != "{":
+            return None
+        top = self._stack[-1]
+        if top[2]:
+            self._pending_key = value
+            return None
+        if len(self._stack) == 2 and top[1] == self.field and self._pending_key is not None:
+            return self._pending_key, value
+        return None
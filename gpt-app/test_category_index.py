@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+
+from sqlalchemy import Column, Integer, String, create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from common.category_index import CategoryIndex
+
+Base = declarative_base()
+
+
+class Category(Base):
+    __tablename__ = "categories"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class TestCategoryIndex(unittest.TestCase):
+    """
+    Test in-memory category resolution and the bulk upsert of missing names
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{self.tmp.name}/categories.db")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement.split()[0]))
+        with self.Session() as db:
+            db.add(Category(name="AI 개발"))
+            db.commit()
+        self.index = CategoryIndex(Category)
+        with self.Session() as db:
+            self.index.warm(db)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_known_names_resolve_without_queries(self):
+        self.statements.clear()
+        with self.Session() as db:
+            ids, created = self.index.ensure(db, ["AI 개발", "AI 개발"])
+        self.assertEqual((ids, created), ({"AI 개발": 1}, {}))
+        self.assertNotIn("INSERT", self.statements)
+        self.assertNotIn("SELECT", self.statements)
+
+    def test_missing_names_take_one_insert_and_one_select(self):
+        self.statements.clear()
+        with self.Session() as db:
+            ids, created = self.index.ensure(db, ["AI 개발", "회고", "기획"])
+            db.commit()
+        self.assertEqual(self.statements.count("INSERT"), 1)
+        self.assertEqual(self.statements.count("SELECT"), 1)
+        self.assertEqual(sorted(created), ["기획", "회고"])
+        self.assertEqual(set(ids), {"AI 개발", "기획", "회고"})
+
+        self.index.publish(created)
+        self.assertEqual(len(self.index), 3)
+
+    def test_rolled_back_names_are_not_indexed(self):
+        with self.Session() as db:
+            _, created = self.index.ensure(db, ["롤백"])
+            db.rollback()
+        self.assertEqual(len(self.index), 1)
+        with self.Session() as db:
+            ids, created_again = self.index.ensure(db, ["롤백"])
+            db.commit()
+        self.assertEqual(list(created_again), ["롤백"])
+        self.assertEqual(ids["롤백"], created_again["롤백"])
+
+    def test_names_created_elsewhere_are_picked_up(self):
+        # 다른 프로세스가 먼저 만든 이름도 충돌 없이 기존 id 로 해석
+        with self.Session() as db:
+            db.add(Category(name="다른 워커"))
+            db.commit()
+            existing = db.query(Category.id).filter_by(name="다른 워커").scalar()
+        with self.Session() as db:
+            ids, _ = self.index.ensure(db, ["다른 워커"])
+            db.commit()
+        self.assertEqual(ids["다른 워커"], existing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from common.chunking import chunk_line_numbers
+from common.tokens import count_tokens
+
+
+class TestChunkLineNumbers(unittest.TestCase):
+    """
+    Test token-budgeted chunking of memo lines
+    """
+
+    def test_keeps_order_and_global_numbering(self):
+        lines = [f"{i}번째 줄의 내용입니다" for i in range(1, 101)]
+        numbers = [n for n in range(1, 101) if n % 7]  # 일부 줄은 이미 분류된 것으로 가정
+        chunks = chunk_line_numbers(lines, numbers, token_budget=60)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([n for chunk in chunks for n in chunk], numbers)
+        for chunk in chunks:
+            cost = sum(count_tokens(lines[n - 1]) + 3 for n in chunk)
+            self.assertTrue(cost <= 60 or len(chunk) == 1)
+
+    def test_oversized_line_gets_own_chunk(self):
+        lines = ["짧은 줄", "아주 긴 줄 " * 200, "짧은 줄"]
+        self.assertEqual(chunk_line_numbers(lines, [1, 2, 3], token_budget=50), [[1], [2], [3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
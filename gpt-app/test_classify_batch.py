@@ -0,0 +1,102 @@
+import json
+import unittest
+import uuid
+
+from fastapi.testclient import TestClient
+
+from service_modules import load_thinkengine
+
+
+class TestClassifyBatch(unittest.TestCase):
+    """
+    Test packing, splitting and partial failures of thinkengine's /classify/batch
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.client = TestClient(self.te.app)
+        self.budget = self.te.BATCH_TOKEN_BUDGET
+        self.complete = self.te.llm_backend.complete
+        self.add_classification = self.te.add_classification
+        self.calls = []
+        self.drop = None
+
+        async def complete(model, messages, **kwargs):
+            content = await self.complete(model, messages, **kwargs)
+            self.calls.append(messages[-1]["content"])
+            if self.drop and self.drop in messages[-1]["content"]:
+                # 이 메모가 들어 있는 묶음의 답에서 첫 메모 결과를 빼서 일부만 실패하게 함
+                answer = json.loads(content)
+                del answer["results"]["1"]
+                content = json.dumps(answer, ensure_ascii=False)
+            return content
+
+        self.te.llm_backend.complete = complete
+
+    def tearDown(self):
+        self.te.BATCH_TOKEN_BUDGET = self.budget
+        self.te.llm_backend.complete = self.complete
+        self.te.add_classification = self.add_classification
+
+    def memos(self, count):
+        # 캐시/로컬 분류에 걸리지 않도록 매번 새 메모
+        tag = uuid.uuid4().hex[:8]
+        return [f"{tag} 배치 메모 {i}\n{tag} 두 번째 줄 {i}" for i in range(count)]
+
+    def memo_rows(self, memos):
+        with self.te.SessionLocal() as db:
+            return db.query(self.te.Memo).filter(self.te.Memo.text.in_(memos)).count()
+
+    def test_groups_split_back_in_order_and_cache(self):
+        self.te.BATCH_TOKEN_BUDGET = 480
+        memos = self.memos(6)
+        body = self.client.post("/classify/batch", json={"memos": memos}).json()
+
+        self.assertGreater(len(self.calls), 1)
+        self.assertLess(len(self.calls), 6)
+        self.assertEqual([item["index"] for item in body["results"]], list(range(6)))
+        self.assertEqual(body["succeeded"], 6)
+        for item in body["results"]:
+            self.assertEqual(sorted(item["result"]["classification"]), ["1", "2"])
+        self.assertEqual(self.memo_rows(memos), 6)
+
+        self.calls.clear()
+        again = self.client.post("/classify/batch", json={"memos": memos}).json()
+        self.assertEqual(self.calls, [])
+        self.assertTrue(all(item["cached"] for item in again["results"]))
+
+    def test_memo_missing_from_the_answer_fails_alone(self):
+        self.te.BATCH_TOKEN_BUDGET = 480
+        memos = self.memos(6)
+        self.drop = memos[0].splitlines()[0]
+        body = self.client.post("/classify/batch", json={"memos": memos}).json()
+
+        self.assertEqual((body["succeeded"], body["failed"]), (5, 1))
+        self.assertIn("missing from batch output", body["results"][0]["error"])
+        self.assertEqual(self.memo_rows(memos), 5)
+
+    def test_failed_save_rolls_back_every_memo(self):
+        memos = self.memos(3)
+        added = []
+
+        def failing_add(db, memo_text, result):
+            if added:
+                raise RuntimeError("disk full")
+            added.append(memo_text)
+            return self.add_classification(db, memo_text, result)
+
+        self.te.add_classification = failing_add
+        body = self.client.post("/classify/batch", json={"memos": memos}).json()
+
+        self.assertEqual(body["failed"], 3)
+        self.assertTrue(all("Failed to save batch" in item["error"] for item in body["results"]))
+        self.assertEqual(self.memo_rows(memos), 0)
+
+    def test_too_many_memos_are_rejected(self):
+        memos = ["메모"] * (self.te.BATCH_MAX_MEMOS + 1)
+        self.assertEqual(self.client.post("/classify/batch", json={"memos": memos}).status_code, 422)
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
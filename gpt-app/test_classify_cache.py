@@ -0,0 +1,64 @@
+import importlib
+import unittest
+import uuid
+
+from service_modules import load_thinkengine
+
+
+class TestClassifyCache(unittest.TestCase):
+    """
+    Test cache keys and the memory/database tiers of the classify result cache
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        # thinkengine 과 같은 테스트 DB 에 묶인 모듈
+        self.cache = importlib.import_module("classify_cache")
+
+    def key(self, text=None, categories=("AI 개발",), prompt_version="1"):
+        return self.cache.make_cache_key(text or f"캐시 {uuid.uuid4().hex}", list(categories),
+                                         "model", prompt_version, True)
+
+    def test_key_ignores_whitespace_but_not_lines_or_prompt(self):
+        base = self.key("첫 줄\n둘째   줄")
+        self.assertEqual(self.key("  첫 줄 \n둘째 줄\t"), base)
+        self.assertNotEqual(self.key("첫 줄 둘째 줄"), base)
+        self.assertNotEqual(self.key("첫 줄\n둘째 줄", categories=("개인 회고",)), base)
+        self.assertNotEqual(self.key("첫 줄\n둘째 줄", prompt_version="2"), base)
+
+    def test_result_survives_a_new_process_in_the_database(self):
+        key, result = self.key(), {"classification": {"1": "AI 개발"}, "new_categories": []}
+        self.cache.ResultCache().set(key, result)
+
+        fresh = self.cache.ResultCache()
+        self.assertEqual(fresh.get(key), result)
+        self.assertEqual(fresh.get(key), result)
+        self.assertIsNone(fresh.get(self.key()))
+        self.assertEqual(fresh.stats()["db_hits"], 1)
+        self.assertEqual(fresh.stats()["memory_hits"], 1)
+        self.assertEqual(fresh.stats()["misses"], 1)
+
+    def test_expired_entries_are_dropped(self):
+        key = self.key()
+        expired = self.cache.ResultCache(ttl_seconds=-1)
+        expired.set(key, {"classification": {}})
+        self.assertIsNone(expired.get(key))
+
+        with self.te.SessionLocal() as db:
+            self.assertIsNone(db.get(self.cache.ClassificationCache, key))
+
+    def test_get_many_mixes_tiers_in_request_order(self):
+        warm, cold, missing = self.key(), self.key(), self.key()
+        writer = self.cache.ResultCache()
+        writer.set(warm, {"n": 1})
+        writer.set(cold, {"n": 2})
+
+        reader = self.cache.ResultCache()
+        reader.get(warm)
+        self.assertEqual(reader.get_many([cold, missing, warm, cold]), [{"n": 2}, None, {"n": 1}, {"n": 2}])
+        stats = reader.stats()
+        self.assertEqual((stats["memory_hits"], stats["db_hits"], stats["misses"]), (1, 2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
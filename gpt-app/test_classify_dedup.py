@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+
+from service_modules import load_thinkengine
+
+
+class TestClassifyDedup(unittest.TestCase):
+    """
+    Test single-flight coalescing and Idempotency-Key handling of /classify
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+
+    def memo_rows(self, memo):
+        with self.te.SessionLocal() as db:
+            return db.query(self.te.Memo).filter(self.te.Memo.text == memo).count()
+
+    def classify(self, memo, key=None):
+        async def call():
+            try:
+                return await self.te.classify(self.te.MemoRequest(memo=memo), idempotency_key=key,
+                                              run_async=False)
+            except HTTPException as e:
+                return e.status_code
+        return call()
+
+    def test_concurrent_identical_requests_share_one_write(self):
+        memo = "공유 테스트 메모\n두 번째 줄"
+
+        async def scenario():
+            return await asyncio.gather(self.classify(memo), self.classify(memo))
+
+        first, second = asyncio.run(scenario())
+        self.assertNotIn("error", first)
+        self.assertEqual(first, second)
+        self.assertEqual(self.memo_rows(memo), 1)
+
+    def test_idempotency_key_reuse(self):
+        memo, other = "멱등 키 메모\n회의 정리", "다른 메모"
+
+        async def concurrent():
+            first = asyncio.ensure_future(self.classify(memo, "key-1"))
+            # 첫 요청이 LLM 을 기다리는 중에 같은 키로 같은/다른 메모가 들어옴
+            await asyncio.sleep(0.02)
+            return await asyncio.gather(first, self.classify(memo, "key-1"), self.classify(other, "key-1"))
+
+        first, same, mismatched = asyncio.run(concurrent())
+        self.assertNotIn("error", first)
+        self.assertEqual(same, first)
+        self.assertEqual(mismatched, 422)
+
+        # 끝난 뒤의 재시도는 저장된 응답을 그대로 돌려주고 다시 쓰지 않음
+        self.assertEqual(asyncio.run(self.classify(memo, "key-1")), first)
+        self.assertEqual(asyncio.run(self.classify(other, "key-1")), 422)
+        self.assertEqual(self.memo_rows(memo), 1)
+        self.assertEqual(self.memo_rows(other), 0)
+
+    def test_retry_whose_lookup_misses_the_store_does_not_write_again(self):
+        memo = "조회와 저장 사이의 재시도"
+        te = self.te
+        original_load = te.load_response
+        first_done = threading.Event()
+        lookups = []
+
+        def slow_lookup(db, key):
+            stored = original_load(db, key)
+            lookups.append(stored)
+            if len(lookups) > 1:
+                # 재시도의 조회는 "없음"을 본 뒤, 첫 요청이 저장하고 끝날 때까지 늦게 돌아옴
+                first_done.wait(2)
+            return stored
+
+        async def scenario():
+            first = asyncio.ensure_future(self.classify(memo, "key-2"))
+            await asyncio.sleep(0.02)
+            retry = asyncio.ensure_future(self.classify(memo, "key-2"))
+            await asyncio.sleep(0.01)
+            first_result = await first
+            first_done.set()
+            return first_result, await retry
+
+        te.load_response = slow_lookup
+        try:
+            first, retry = asyncio.run(scenario())
+        finally:
+            te.load_response = original_load
+            first_done.set()
+        self.assertEqual(retry, first)
+        self.assertEqual(self.memo_rows(memo), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+import uuid
+
+from common.llm_backend import FakeBackend
+from service_modules import load_thinkengine
+
+
+class TestMalformedOutput(unittest.TestCase):
+    """
+    Test that thinkengine's structured parses repair FAKE_LLM_MALFORMED_RATE output
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.backend = self.te.llm_backend
+        self.te.llm_backend = FakeBackend(latency_ms=0, malformed_rate=1.0)
+
+    def tearDown(self):
+        self.te.llm_backend = self.backend
+
+    def test_structured_classification_is_repaired(self):
+        result = asyncio.run(self.te.classify_memo("모델 학습 계획\n영상 기획 회의", self.te.BASE_CATEGORIES))
+        self.assertEqual(sorted(result["classification"]), ["1", "2"])
+
+    def test_batch_answer_is_repaired(self):
+        outcomes = asyncio.run(self.te.classify_memo_batch(["첫 메모", "둘째 메모\n둘째 줄"], self.te.BASE_CATEGORIES))
+        self.assertEqual([error for _, error in outcomes], [None, None])
+        self.assertEqual([sorted(result["classification"]) for result, _ in outcomes], [["1"], ["1", "2"]])
+
+    def test_streamed_answer_is_repaired_at_the_end(self):
+        lines = [f"{uuid.uuid4().hex[:8]} 스트리밍 복구 {i}" for i in range(3)]
+        parts = []
+
+        async def drain():
+            return [pair async for pair in self.te.stream_unseen_lines(lines, [[1, 2, 3]], parts)]
+
+        asyncio.run(drain())
+        self.assertEqual(sorted(parts[0][1]["classification"]), ["1", "2", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
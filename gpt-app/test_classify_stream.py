@@ -0,0 +1,62 @@
+import json
+import unittest
+import uuid
+
+from fastapi.testclient import TestClient
+
+from service_modules import load_thinkengine
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class TestClassifyStream(unittest.TestCase):
+    """
+    Test that /classify/stream chunks long memos and keeps memo line numbers
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.budget = self.te.CHUNK_TOKEN_BUDGET
+        self.stream = self.te.llm_backend.stream
+        self.prompts = []
+
+        def counting_stream(model, messages, **kwargs):
+            self.prompts.append(messages[-1]["content"])
+            return self.stream(model, messages, **kwargs)
+
+        self.te.llm_backend.stream = counting_stream
+
+    def tearDown(self):
+        self.te.CHUNK_TOKEN_BUDGET = self.budget
+        self.te.llm_backend.stream = self.stream
+
+    def test_long_memo_is_streamed_in_chunks(self):
+        self.te.CHUNK_TOKEN_BUDGET = 60
+        # 다른 테스트에서 익힌 문장으로 로컬 분류되지 않도록 매번 새 문장 사용
+        tag = uuid.uuid4().hex[:8]
+        lines = [f"{tag} {i}번째 줄은 스트리밍 청크 테스트용 문장입니다" for i in range(1, 41)]
+        lines[9] = ""
+        memo = "\n".join(lines)
+
+        response = TestClient(self.te.app).post("/classify/stream", json={"memo": memo})
+        events = parse_sse(response.text)
+        kind, done = events[-1]
+        self.assertEqual(kind, "done", done)
+        categories = {e["line"]: e["category"] for kind, e in events[:-1] if kind == "category"}
+
+        expected = [str(n) for n in range(1, 41) if n != 10]
+        self.assertGreater(len(self.prompts), 1)
+        self.assertEqual(sorted(done["result"]["classification"], key=int), expected)
+        self.assertEqual({str(n): cat for n, cat in categories.items()}, done["result"]["classification"])
+        for prompt in self.prompts:
+            self.assertLess(prompt.count(tag), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
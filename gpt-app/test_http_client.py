@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+
+import httpx
+
+from service_modules import load_service
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Test how cancelled calls affect the circuit breaker
+    """
+
+    def test_cancelled_trial_reopens_the_breaker(self):
+        http_client, = load_service("input_api", "http_client")
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={})
+
+        async def scenario():
+            client = http_client.ServiceClient(retries=0, transport=httpx.MockTransport(handler))
+            breaker = client.breaker("processing")
+            breaker.failure_threshold, breaker.reset_timeout = 1, 0.05
+            breaker.record_failure()
+            self.assertEqual(breaker.state, "open")
+            await asyncio.sleep(0.06)
+            self.assertEqual(breaker.state, "half-open")
+
+            trial = asyncio.ensure_future(client.post("processing", "http://processing/process"))
+            await asyncio.sleep(0.01)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+            self.assertFalse(breaker._trial)
+
+            # 취소된 시험 요청은 결과가 없으므로 다시 열림 -> reset_timeout 뒤에는 새 요청을 받아야 함
+            with self.assertRaises(http_client.CircuitOpen):
+                await client.post("processing", "http://processing/process")
+            await asyncio.sleep(0.06)
+            release.set()
+            response = await client.post("processing", "http://processing/process")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(breaker.state, "closed")
+            await client.close()
+
+        asyncio.run(scenario())
+
+    def test_cancelled_calls_do_not_count_as_failures(self):
+        http_client, = load_service("input_api", "http_client")
+
+        async def handler(request):
+            await asyncio.sleep(10)
+
+        async def scenario():
+            client = http_client.ServiceClient(retries=0, transport=httpx.MockTransport(handler))
+            breaker = client.breaker("processing")
+            breaker.failure_threshold = 2
+            # 배치 스트림을 버린 클라이언트처럼 진행 중인 요청 여러 개를 한꺼번에 취소
+            calls = [asyncio.ensure_future(client.post("processing", "http://processing/process"))
+                     for _ in range(5)]
+            await asyncio.sleep(0.01)
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+            self.assertEqual(breaker.failures, 0)
+            self.assertEqual(breaker.state, "closed")
+            await client.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from service_modules import load_service
+
+PROCESSING_URL = "http://processing/process"
+STORAGE_BATCH_URL = "http://storage/store/batch"
+
+
+class TestIngest(unittest.TestCase):
+    """
+    Test that /memo/create/batch progress always reports every memo and ends
+    """
+
+    def setUp(self):
+        self.http_client, self.ingest = load_service("input_api", "http_client", "ingest")
+
+    def run_ingest(self, texts, processing, storage=None):
+        def handler(request):
+            if request.url.path == "/process":
+                return processing(json.loads(request.content)["text"])
+            if storage is not None:
+                return storage(json.loads(request.content)["memos"])
+            memos = json.loads(request.content)["memos"]
+            return httpx.Response(200, json={"memos": [{"id": i + 1} for i in range(len(memos))]})
+
+        async def collect():
+            self.ingest.service_client = self.http_client.ServiceClient(
+                retries=0, transport=httpx.MockTransport(handler))
+            try:
+                return [event async for event in self.ingest.ingest(
+                    texts, PROCESSING_URL, STORAGE_BATCH_URL, flush_seconds=0.01)]
+            finally:
+                await self.ingest.service_client.close()
+
+        # 스트림이 끝나지 않으면 실패로 처리
+        return asyncio.run(asyncio.wait_for(collect(), timeout=5))
+
+    def by_index(self, events):
+        self.assertTrue(events[-1]["done"])
+        return {event["index"]: event for event in events[:-1]}
+
+    def test_non_object_processing_result_fails_only_that_memo(self):
+        def processing(text):
+            return httpx.Response(200, json=["not", "an", "object"] if text == "bad" else {"summary": text})
+
+        events = self.run_ingest(["ok", "bad", "fine"], processing)
+        results = self.by_index(events)
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[1]["stage"], "processing")
+        self.assertEqual([results[i]["status"] for i in (0, 2)], ["stored", "stored"])
+        self.assertEqual((events[-1]["stored"], events[-1]["failed"]), (2, 1))
+
+    def test_malformed_storage_response_fails_the_batch(self):
+        ok = lambda text: httpx.Response(200, json={"summary": text})  # noqa: E731
+        for body in (["rows"], {"memos": [{"created_at": None}, {"created_at": None}]}, {"memos": None}):
+            with self.subTest(body=body):
+                events = self.run_ingest(["a", "b"], ok, lambda memos: httpx.Response(200, json=body))
+                results = self.by_index(events)
+                self.assertEqual(sorted(results), [0, 1])
+                self.assertEqual({event["stage"] for event in results.values()}, {"storage"})
+
+    def test_crashed_task_fails_the_remaining_memos(self):
+        ok = lambda text: httpx.Response(200, json={"summary": text})  # noqa: E731
+        # 문자열이 아닌 항목은 처리 작업 자체를 죽임
+        events = self.run_ingest(["a", 123, "b"], ok)
+        results = self.by_index(events)
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(events[-1]["total"], 3)
+        self.assertIn("ingest", {event.get("stage") for event in results.values()})
+
+
+class TestParseNdjson(unittest.TestCase):
+    """
+    Test line-by-line parsing of streamed NDJSON uploads
+    """
+
+    def setUp(self):
+        _, self.ingest = load_service("input_api", "http_client", "ingest")
+
+    def parse(self, chunks):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        return asyncio.run(self.ingest.parse_ndjson(stream()))
+
+    def test_lines_split_across_chunks(self):
+        body = '{"text": "첫 메모"}\n\nnot json\n{"memo": 1}\n{"text": "마지막"}'.encode()
+        chunks = [body[i:i + 5] for i in range(0, len(body), 5)]
+        self.assertEqual(self.parse(chunks), ["첫 메모", None, None, "마지막"])
+
+    def test_stops_reading_past_the_limit(self):
+        line = b'{"text": "x"}\n'
+        read = []
+
+        def chunks():
+            for _ in range(self.ingest.INGEST_MAX_ITEMS + 100):
+                read.append(1)
+                yield line
+
+        with self.assertRaises(self.ingest.BatchTooLarge):
+            self.parse(chunks())
+        self.assertEqual(len(read), self.ingest.INGEST_MAX_ITEMS + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
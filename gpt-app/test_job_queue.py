@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import unittest
+
+from service_modules import load_thinkengine
+
+
+class TestJobQueue(unittest.TestCase):
+    """
+    Test retries, exhaustion, restart recovery and backpressure of the durable job queue
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.job_queue = importlib.import_module("job_queue")
+        self.clear_jobs()
+
+    def tearDown(self):
+        self.clear_jobs()
+
+    def clear_jobs(self):
+        # 큐는 테이블 전체에서 작업을 가져가므로 테스트마다 비움
+        with self.te.SessionLocal() as db:
+            db.query(self.job_queue.ClassifyJob).delete()
+            db.commit()
+
+    def queue(self, handler, **kwargs):
+        options = {"workers": 1, "backoff": 0.01, "poll": 0.01, "max_attempts": 3, **kwargs}
+        return self.job_queue.JobQueue(handler, **options)
+
+    async def settled(self, queue, job_id):
+        while True:
+            job = await asyncio.to_thread(queue.get, job_id)
+            if job["status"] in ("done", "failed"):
+                return job
+            await asyncio.sleep(0.01)
+
+    def run_job(self, queue, memo="작업 메모"):
+        async def scenario():
+            await queue.start()
+            try:
+                job_id = await queue.enqueue(memo)
+                return await asyncio.wait_for(self.settled(queue, job_id), timeout=5)
+            finally:
+                await queue.stop()
+
+        return asyncio.run(scenario())
+
+    def test_failures_are_retried_until_success(self):
+        calls = []
+
+        async def flaky(memo):
+            calls.append(memo)
+            if len(calls) < 3:
+                raise RuntimeError("LLM timeout")
+            return {"result": {"classification": {"1": "AI 개발"}}}
+
+        job = self.run_job(self.queue(flaky))
+        self.assertEqual((job["status"], job["attempts"], job["error"]), ("done", 3, None))
+        self.assertEqual(job["result"]["result"]["classification"], {"1": "AI 개발"})
+
+    def test_error_responses_fail_after_max_attempts(self):
+        async def failing(memo):
+            return {"error": "bad output", "metadata": {}}
+
+        job = self.run_job(self.queue(failing, max_attempts=2))
+        self.assertEqual((job["status"], job["attempts"], job["error"]), ("failed", 2, "bad output"))
+        self.assertEqual(job["result"], {"error": "bad output", "metadata": {}})
+
+    def test_running_jobs_are_recovered_after_a_restart(self):
+        async def handler(memo):
+            return {"memo": memo}
+
+        crashed = self.queue(handler)
+        job_id = crashed._enqueue("재시작 메모")
+        # 작업을 가져간 뒤 끝내지 못하고 죽은 프로세스
+        self.assertEqual(crashed._claim().id, job_id)
+        self.assertEqual(crashed.get(job_id)["status"], "running")
+
+        restarted = self.queue(handler)
+
+        async def scenario():
+            await restarted.start()
+            try:
+                return await asyncio.wait_for(self.settled(restarted, job_id), timeout=5)
+            finally:
+                await restarted.stop()
+
+        job = asyncio.run(scenario())
+        self.assertEqual((job["status"], job["attempts"], job["result"]), ("done", 2, {"memo": "재시작 메모"}))
+
+    def test_full_queue_rejects_new_jobs(self):
+        async def handler(memo):
+            return {}
+
+        queue = self.queue(handler, max_pending=2)
+        queue._enqueue("첫째")
+        queue._enqueue("둘째")
+        with self.assertRaises(self.job_queue.QueueFull):
+            queue._enqueue("셋째")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from service_modules import load_thinkengine
+
+
+class TestLLMConcurrency(unittest.TestCase):
+    """
+    Test that LLM calls overlap but never exceed LLM_MAX_CONCURRENCY
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.semaphore = self.te.llm_semaphore
+        self.complete = self.te.llm_backend.complete
+        self.running, self.peak = 0, 0
+
+        async def complete(model, messages, **kwargs):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            try:
+                await asyncio.sleep(0.05)
+                return await self.complete(model, messages, **kwargs)
+            finally:
+                self.running -= 1
+
+        self.te.llm_backend.complete = complete
+
+    def tearDown(self):
+        self.te.llm_semaphore = self.semaphore
+        self.te.llm_backend.complete = self.complete
+
+    def test_calls_are_capped_by_the_semaphore(self):
+        self.te.llm_semaphore = asyncio.Semaphore(3)
+
+        async def scenario():
+            memos = [f"동시 호출 {i}" for i in range(8)]
+            return await asyncio.gather(*(self.te.classify_memo(memo, self.te.BASE_CATEGORIES) for memo in memos))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result["classification"] for result in results))
+        self.assertEqual(self.peak, 3)
+
+    def test_waiting_calls_do_not_block_the_event_loop(self):
+        self.te.llm_semaphore = asyncio.Semaphore(1)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(self.running)
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            calls = asyncio.gather(*(self.te.classify_memo(f"대기 {i}", self.te.BASE_CATEGORIES) for i in range(3)))
+            await asyncio.gather(calls, ticker())
+
+        asyncio.run(scenario())
+        # LLM 호출이 진행되는 동안에도 다른 코루틴이 돌아감
+        self.assertEqual(len(ticks), 5)
+        self.assertIn(1, ticks)
+        self.assertEqual(self.peak, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from service_modules import load_service
+
+
+class TestBulkEndpoints(unittest.TestCase):
+    """
+    Test set-based bulk update/delete and their version checks on SQLite
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db, self.main = load_service("manage", "db", "main",
+                                          database_url=f"sqlite:///{self.tmp.name}/memos.db")
+        with self.db.engine.begin() as conn:
+            # storage 보다 먼저 뜬 것처럼 version 컬럼이 없는 예전 테이블에서 시작
+            conn.execute(text("CREATE TABLE memos (id INTEGER PRIMARY KEY, original_text VARCHAR NOT NULL, "
+                              "summary VARCHAR, tags JSON, category VARCHAR, created_at DATETIME)"))
+            conn.execute(text("INSERT INTO memos (id, original_text, tags, category, created_at) VALUES "
+                              "(1, 'a', '[\"x\"]', 'A', :d1), (2, 'b', '[\"x\", \"y\"]', 'B', :d2), "
+                              "(3, 'c', '[]', 'A', :d3)"),
+                         {"d1": datetime(2024, 1, 1), "d2": datetime(2024, 2, 1), "d3": datetime(2024, 3, 1)})
+        self.client = TestClient(self.main.app)
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self.db.engine.dispose()
+        self.tmp.cleanup()
+
+    def rows(self):
+        with self.db.engine.connect() as conn:
+            return {row.id: row for row in conn.execute(text("SELECT id, category, tags, version FROM memos"))}
+
+    def test_filter_and_add_remove_tags(self):
+        response = self.client.patch("/memo/bulk", json={"filter": {"tags": ["x"]}, "add_tags": ["z"],
+                                                          "remove_tags": ["y"]})
+        self.assertEqual(response.json(), {"affected": 2})
+        rows = self.rows()
+        self.assertEqual(sorted(json.loads(rows[2].tags)), ["x", "z"])
+        self.assertEqual([rows[i].version for i in (1, 2, 3)], [2, 2, 1])
+
+    def test_items_excluded_by_the_filter_are_not_conflicts(self):
+        response = self.client.patch("/memo/bulk", json={
+            "items": [{"id": 1, "version": 1}, {"id": 2, "version": 1}],
+            "filter": {"category": "A"}, "summary": "s"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"affected": 1})
+        self.assertEqual(self.rows()[2].version, 1)
+
+    def test_stale_or_deleted_items_roll_back_everything(self):
+        self.client.put("/memo/update/2", json={"summary": "s", "tags": [], "category": "B"})
+        self.client.delete("/memo/delete/3")
+        response = self.client.patch("/memo/bulk", json={
+            "items": [{"id": 1, "version": 1}, {"id": 2, "version": 1}, {"id": 3, "version": 1}],
+            "category": "C"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"]["conflicts"], [2, 3])
+        self.assertEqual(self.rows()[1].category, "A")
+
+    def test_bulk_delete(self):
+        response = self.client.request("DELETE", "/memo/bulk", json={
+            "ids": [1, 2, 3], "filter": {"created_from": "2024-01-15T00:00:00"}})
+        self.assertEqual(response.json(), {"affected": 2})
+        self.assertEqual(list(self.rows()), [1])
+
+    def test_empty_selection_is_rejected(self):
+        response = self.client.request("DELETE", "/memo/bulk", json={})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.rows()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
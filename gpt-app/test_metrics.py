@@ -0,0 +1,32 @@
+import unittest
+
+from common.metrics import Registry
+
+
+class TestMetricsRender(unittest.TestCase):
+    """
+    Test the Prometheus text rendering of counters and histograms
+    """
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        hist = registry.histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0))
+        hist.observe(0.05, stage="llm")
+        hist.observe(0.1, stage="llm")
+        hist.observe(3.0, stage="llm")
+        text = registry.render()
+        self.assertIn('stage_seconds_bucket{stage="llm",le="0.1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="1.0"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="llm",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="llm"} 3', text)
+
+    def test_counter_labels_are_escaped(self):
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests.", ["endpoint"])
+        counter.inc(endpoint='/a"b')
+        counter.inc(2, endpoint='/a"b')
+        self.assertIn('requests_total{endpoint="/a\\"b"} 3', registry.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import importlib
+import unittest
+import uuid
+
+from service_modules import load_thinkengine
+
+TRADING = [(f"비트코인 차트 분석 {i}", "트레이딩 분석") for i in range(5)]
+YOUTUBE = [(f"유튜브 썸네일 기획 {i}", "YouTube 기획") for i in range(5)]
+
+
+class TestCentroidClassifier(unittest.TestCase):
+    """
+    Test which lines the embedding-centroid pre-classifier labels without the LLM
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.CentroidClassifier = importlib.import_module("preclassifier").CentroidClassifier
+
+    def classifier(self, **kwargs):
+        options = {"threshold": 0.6, "margin": 0.05, "min_examples": 3, **kwargs}
+        return self.CentroidClassifier(**options)
+
+    def test_confident_lines_are_labelled_and_others_left_for_the_llm(self):
+        classifier = self.classifier()
+        classifier.update(TRADING + YOUTUBE + [(f"아무 문장 {i}", "분류 안됨") for i in range(5)])
+        lines = ["비트코인 차트 분석 정리", "", "유튜브 썸네일 기획 회의", "점심 메뉴 추천"]
+
+        predicted = classifier.predict(lines)
+        self.assertEqual({n: cat for n, (cat, _) in predicted.items()}, {1: "트레이딩 분석", 3: "YouTube 기획"})
+        self.assertTrue(all(score >= 0.6 for _, score in predicted.values()))
+        self.assertEqual(list(classifier.predict(lines, skip=[1])), [3])
+
+    def test_ambiguous_lines_and_thin_categories_are_skipped(self):
+        ambiguous = ["비트코인 유튜브 썸네일 차트"]
+        classifier = self.classifier(margin=0.2)
+        classifier.update(TRADING + YOUTUBE)
+        self.assertEqual(classifier.predict(ambiguous), {})
+
+        thin = self.classifier(min_examples=10)
+        thin.update(TRADING + YOUTUBE)
+        self.assertEqual(thin.predict(["비트코인 차트 분석 정리"]), {})
+
+    def test_load_learns_from_saved_lines(self):
+        name = f"카테고리 {uuid.uuid4().hex[:8]}"
+        with self.te.SessionLocal() as db:
+            category = self.te.Category(name=name)
+            memo = self.te.Memo(text="학습용", result_json={})
+            db.add_all([category, memo])
+            db.flush()
+            db.add_all([self.te.MemoCategory(memo_id=memo.id, category_id=category.id, sentence_number=i,
+                                             sentence=f"주식 배당 포트폴리오 점검 {i}") for i in range(1, 4)])
+            db.commit()
+
+        classifier = self.classifier()
+        classifier.load()
+        predicted = classifier.predict(["주식 배당 포트폴리오 점검"])
+        self.assertEqual(predicted[1][0], name)
+
+
+if __name__ == "__main__":
+    unittest.main()
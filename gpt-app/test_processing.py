@@ -0,0 +1,90 @@
+import asyncio
+import importlib
+import unittest
+
+from fastapi.testclient import TestClient
+
+from service_modules import load_service, service_path
+
+TEXTS = [f"{i}번째 메모입니다. 모델 학습 결과를 정리했습니다. 다음 회의에서 공유합니다." for i in range(10)]
+
+
+class TestNLPWorkers(unittest.TestCase):
+    """
+    Test how /process/batch splits texts across the NLP workers and joins them back
+    """
+
+    def setUp(self):
+        self.nlp, self.workers = load_service("processing", "nlp", "workers")
+
+    def test_one_chunk_per_worker_capped_by_chunk_size(self):
+        pool = self.workers.NLPWorkers(mode="process", workers=4, chunk_size=256)
+        pool._pool = object()  # 프로세스를 띄우지 않고 활성 상태로 간주
+        self.assertEqual([len(chunk) for chunk in pool.chunks(TEXTS)], [3, 3, 3, 1])
+        pool.chunk_size = 2
+        self.assertEqual([len(chunk) for chunk in pool.chunks(TEXTS)], [2] * 5)
+
+        inline = self.workers.NLPWorkers(mode="inline", workers=4, chunk_size=4)
+        self.assertEqual([len(chunk) for chunk in inline.chunks(TEXTS)], [4, 4, 2])
+
+    def test_process_pool_results_keep_input_order(self):
+        # tags 는 set 순서를 따르므로 해시 시드가 다른 자식 프로세스와는 비교하지 않음
+        expected = [(r["summary"], r["category"]) for r in map(self.nlp.analyze, TEXTS)]
+        # 자식 프로세스가 nlp 를 같은 이름으로 불러올 수 있도록 서비스 경로 안에서 실행
+        with service_path("processing"):
+            workers = importlib.import_module("workers")
+            pool = workers.NLPWorkers(mode="process", workers=2, chunk_size=3)
+            pool.start()
+            try:
+                results = asyncio.run(pool.analyze_batch(TEXTS))
+            finally:
+                pool.stop()
+        self.assertEqual([(r["summary"], r["category"]) for r in results], expected)
+
+    def test_batch_endpoint(self):
+        _, _, main = load_service("processing", "nlp", "workers", "main")
+        main.nlp_workers.mode = "inline"
+        client = TestClient(main.app)
+
+        body = client.post("/process/batch", json={"texts": TEXTS[:3]}).json()
+        self.assertEqual([result["summary"] for result in body["results"]],
+                         [self.nlp.analyze(text)["summary"] for text in TEXTS[:3]])
+        self.assertEqual((body["timing"]["texts"], body["timing"]["mode"]), (3, "inline"))
+
+        response = client.post("/process/batch", json={"texts": ["ok", " "]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("[1]", response.json()["detail"])
+
+
+class TestTextRank(unittest.TestCase):
+    """
+    Test the TextRank summary: central sentences win and batching doesn't change results
+    """
+
+    def setUp(self):
+        (self.nlp,) = load_service("processing", "nlp")
+
+    def test_sentences_split_on_korean_endings(self):
+        text = "회의를 했습니다 결론은 없었어요 다음 주에 다시 하죠\n자막 줄은\n이어집니다"
+        self.assertEqual(self.nlp.split_sentences(text),
+                         ["회의를 했습니다", "결론은 없었어요", "다음 주에 다시 하죠", "자막 줄은 이어집니다"])
+
+    def test_central_sentences_are_kept_in_original_order(self):
+        text = ("모델 학습 데이터를 정리했다. 점심은 김밥을 먹었다. "
+                "모델 학습 결과 정확도가 올랐다. 다음 모델 학습은 데이터를 늘린다.")
+        summary = self.nlp.summarize_batch([text], sentences=2)[0]
+        # 첫 문장 요약과 달리 다른 문장과 가장 많이 겹치는 두 문장을 고름
+        self.assertEqual(summary, "모델 학습 데이터를 정리했다. 다음 모델 학습은 데이터를 늘린다.")
+        self.assertEqual(self.nlp.summarize_batch(["한 문장뿐이다."], sentences=3), ["한 문장뿐이다."])
+
+    def test_batch_gives_the_same_summaries_as_one_by_one(self):
+        long = " ".join(f"{i % 7}번 주제의 회의 내용 {i}번째 문장이다." for i in range(200))
+        texts = TEXTS[:3] + ["", long, "마지막 메모다. 짧다."]
+        together = self.nlp.summarize_batch(texts, sentences=2, window=5)
+        self.assertEqual(together, [self.nlp.summarize_batch([text], sentences=2, window=5)[0] for text in texts])
+        self.assertEqual(together[3], "")
+        self.assertEqual(len(self.nlp.split_sentences(together[4])), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
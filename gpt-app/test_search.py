@@ -0,0 +1,157 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from service_modules import load_service
+
+
+class TestStartup(unittest.TestCase):
+    """
+    Test that query can start before storage has created the memos table
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{self.tmp.name}/memos.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_startup_on_an_empty_database(self):
+        db, search, main = load_service("query", "db", "search", "main", database_url=self.url)
+        main.create_search_indexes()
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO memos (original_text, created_at) VALUES ('회의록 정리', :now)"),
+                         {"now": datetime(2024, 1, 1)})
+        with db.SessionLocal() as session:
+            for keyword in ("회의", "회의록"):
+                items = search.search_page(session, keyword=keyword)["items"]
+                self.assertEqual([(item["id"], item["version"]) for item in items], [(1, 1)])
+        db.engine.dispose()
+
+    def test_startup_adds_version_to_an_existing_table(self):
+        db, search, main = load_service("query", "db", "search", "main", database_url=self.url)
+        with db.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE memos (id INTEGER PRIMARY KEY, original_text VARCHAR NOT NULL, "
+                              "summary VARCHAR, tags JSON, category VARCHAR, created_at DATETIME)"))
+            conn.execute(text("INSERT INTO memos (original_text, created_at) VALUES ('주간 회의', :now)"),
+                         {"now": datetime(2024, 1, 1)})
+        main.create_search_indexes()
+        with db.SessionLocal() as session:
+            items = search.search_page(session, keyword="회의")["items"]
+        self.assertEqual([item["version"] for item in items], [1])
+        db.engine.dispose()
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """
+    Test that next_cursor walks every match once, in (created_at, id) order
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db, models, main = load_service("query", "db", "models", "main",
+                                             database_url=f"sqlite:///{self.tmp.name}/memos.db")
+        main.create_search_indexes()
+        self.Memo = models.Memo
+        self.client = TestClient(main.app)
+        # 같은 시각에 저장된 메모가 페이지 경계에 걸치도록 시각을 겹치게 넣음
+        self.add(*[(f"회의 {i}", datetime(2024, 1, 1 + i // 3), ["업무"] if i % 2 else []) for i in range(8)])
+
+    def tearDown(self):
+        self.db.engine.dispose()
+        self.tmp.cleanup()
+
+    def add(self, *memos):
+        with self.db.SessionLocal() as session:
+            session.add_all([self.Memo(original_text=text, summary=text, tags=tags, created_at=created_at)
+                             for text, created_at, tags in memos])
+            session.commit()
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            page = self.client.get("/memo/search", params={**params, "limit": 3, "cursor": cursor}).json()
+            ids.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(self.walk(), [8, 7, 6, 5, 4, 3, 2, 1])
+        self.assertEqual(self.walk(keyword="회의", sort="recent", tag="업무"), [8, 6, 4, 2])
+
+    def test_rows_added_meanwhile_do_not_shift_later_pages(self):
+        first = self.client.get("/memo/search", params={"limit": 3}).json()
+        self.add(("새 회의", datetime(2025, 1, 1), []))
+        second = self.client.get("/memo/search", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([item["id"] for item in first["items"] + second["items"]], [8, 7, 6, 5, 4, 3])
+
+    def test_ndjson_streams_every_match(self):
+        response = self.client.get("/memo/search", params={"format": "ndjson", "tag": "업무"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([item["id"] for item in lines], [8, 6, 4, 2])
+
+    def test_bad_cursors_are_rejected(self):
+        cursor = self.client.get("/memo/search", params={"limit": 3}).json()["next_cursor"]
+        for params in ({"cursor": "not-a-cursor"}, {"cursor": cursor, "keyword": "회의", "sort": "relevance"},
+                       {"cursor": "x", "format": "ndjson"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/memo/search", params=params).status_code, 400)
+
+
+class TestBigramSearch(unittest.TestCase):
+    """
+    Test that 2-character keywords are served by the bigram index on SQLite
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db, models, self.search = load_service("query", "db", "models", "search",
+                                                    database_url=f"sqlite:///{self.tmp.name}/memos.db")
+        models.init_schema(self.db.engine)
+        with self.db.engine.begin() as conn:
+            # 인덱스를 만들기 전에 있던 행도 채워지는지 보기 위해 먼저 넣음
+            conn.execute(text("INSERT INTO memos (id, original_text, created_at, version) "
+                              "VALUES (1, '오늘 회의 내용 정리', :now, 1)"), {"now": datetime(2024, 1, 1)})
+        self.search.ensure_search_indexes(self.db.engine)
+
+    def tearDown(self):
+        self.db.engine.dispose()
+        self.tmp.cleanup()
+
+    def keyword_ids(self, keyword):
+        with self.db.SessionLocal() as session:
+            return sorted(item["id"] for item in self.search.search_page(session, keyword=keyword)["items"])
+
+    def test_two_syllable_keyword_uses_bigram_index(self):
+        with self.db.SessionLocal() as session:
+            query, _, _ = self.search.build_search(session, keyword="회의")
+            statement = query.statement.compile(self.db.engine, compile_kwargs={"literal_binds": True})
+            plan = " | ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+        self.assertIn("SEARCH memo_bigrams USING PRIMARY KEY", plan)
+        self.assertNotIn("SCAN memos", plan)
+
+    def test_bigram_index_follows_inserts_updates_and_deletes(self):
+        self.assertEqual(self.keyword_ids("회의"), [1])
+        with self.db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO memos (id, original_text, created_at, version) "
+                              "VALUES (2, '주간 회의록', :now, 1), (3, 'Model review', :now, 1)"),
+                         {"now": datetime(2024, 1, 2)})
+        self.assertEqual(self.keyword_ids("회의"), [1, 2])
+        self.assertEqual(self.keyword_ids("MO"), [3])
+
+        with self.db.engine.begin() as conn:
+            conn.execute(text("UPDATE memos SET original_text = '점심 메뉴' WHERE id = 1"))
+            conn.execute(text("DELETE FROM memos WHERE id = 3"))
+        self.assertEqual(self.keyword_ids("회의"), [2])
+        self.assertEqual(self.keyword_ids("메뉴"), [1])
+        self.assertEqual(self.keyword_ids("mo"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
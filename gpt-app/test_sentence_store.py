@@ -0,0 +1,59 @@
+import asyncio
+import importlib
+import unittest
+import uuid
+
+from service_modules import load_thinkengine
+
+
+class TestSentenceStore(unittest.TestCase):
+    """
+    Test that previously labelled lines are reused instead of sent to the LLM
+    """
+
+    def setUp(self):
+        self.te = load_thinkengine()
+        self.SentenceStore = importlib.import_module("sentence_store").SentenceStore
+
+    def test_lookup_normalizes_and_keeps_the_latest_label(self):
+        store = self.SentenceStore()
+        store.update([("회의 정리", "개인 회고"), ("모델 학습", "분류 안됨"), ("회의  정리 ", "AI 개발")])
+        self.assertEqual(store.lookup(["", " 회의 정리", "모델 학습"]), {2: "AI 개발"})
+
+    def test_oldest_entries_are_evicted(self):
+        store = self.SentenceStore(max_entries=2)
+        store.update([("첫째", "A"), ("둘째", "B")])
+        store.update([("첫째", "A"), ("셋째", "C")])
+        self.assertEqual(store.lookup(["첫째", "둘째", "셋째"]), {1: "A", 3: "C"})
+
+    def test_saved_lines_are_reused_and_reloaded(self):
+        tag = uuid.uuid4().hex[:8]
+        seen = f"{tag} 이미 분류한 문장"
+        first = asyncio.run(self.te.classify_and_save(f"{seen}\n{tag} 다른 문장"))
+        label = first["result"]["classification"]["1"]
+
+        prompts = []
+        complete = self.te.llm_backend.complete
+
+        async def recording(model, messages, **kwargs):
+            prompts.append(messages[-1]["content"])
+            return await complete(model, messages, **kwargs)
+
+        self.te.llm_backend.complete = recording
+        try:
+            second = asyncio.run(self.te.classify_and_save(f"{uuid.uuid4().hex} 새 문장\n{seen}"))
+        finally:
+            self.te.llm_backend.complete = complete
+
+        self.assertEqual(second["reused_sentences"], 1)
+        self.assertEqual(second["result"]["classification"]["2"], label)
+        self.assertFalse(any(seen in prompt for prompt in prompts))
+
+        # 재시작 후에는 memo_categories 에서 다시 채움
+        reloaded = self.SentenceStore()
+        reloaded.load()
+        self.assertEqual(reloaded.lookup([seen]), {1: label})
+
+
+if __name__ == "__main__":
+    unittest.main()
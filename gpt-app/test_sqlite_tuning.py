@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from common.sqlite import create_sqlite_engine
+
+
+class TestSqliteTuning(unittest.TestCase):
+    """
+    Test the PRAGMAs of the tuned SQLite engine and that readers don't wait on a writer
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engines = []
+
+    def tearDown(self):
+        for engine in self.engines:
+            engine.dispose()
+        self.tmp.cleanup()
+
+    def engine(self, name, **kwargs):
+        engine = create_sqlite_engine(f"sqlite:///{self.tmp.name}/{name}.db", **kwargs)
+        self.engines.append(engine)
+        return engine
+
+    def pragma(self, engine, name):
+        with engine.connect() as conn:
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_every_pooled_connection_is_tuned(self):
+        engine = self.engine("tuned")
+        with engine.connect(), engine.connect() as second:
+            self.assertEqual(second.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+            self.assertEqual(second.execute(text("PRAGMA busy_timeout")).scalar(), 30000)
+        self.assertEqual(self.pragma(engine, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(engine, "cache_size"), -65536)
+
+    def test_untuned_engine_keeps_sqlite_defaults(self):
+        engine = self.engine("default", tuned=False)
+        self.assertEqual(self.pragma(engine, "journal_mode"), "delete")
+        self.assertEqual(self.pragma(engine, "synchronous"), 2)  # FULL
+
+    def test_reader_is_not_blocked_by_an_open_write(self):
+        engine = self.engine("wal")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE memos (id INTEGER PRIMARY KEY, text TEXT)"))
+            conn.execute(text("INSERT INTO memos (text) VALUES ('커밋됨')"))
+
+        with engine.connect() as writer, engine.connect() as reader:
+            writer.execute(text("BEGIN EXCLUSIVE"))
+            writer.execute(text("INSERT INTO memos (text) VALUES ('진행 중')"))
+            # WAL 에서는 쓰기 트랜잭션 중에도 커밋된 스냅샷을 바로 읽음
+            rows = reader.execute(text("SELECT text FROM memos")).scalars().all()
+            writer.execute(text("ROLLBACK"))
+        self.assertEqual(rows, ["커밋됨"])
+
+
+if __name__ == "__main__":
+    unittest.main()
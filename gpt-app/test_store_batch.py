@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from service_modules import load_service
+
+
+def memo(i):
+    return {"original_text": f"원문 {i}", "summary": f"요약 {i}", "tags": [f"t{i}"], "category": "A" if i % 2 else "B"}
+
+
+class TestStoreBatch(unittest.TestCase):
+    """
+    Test that /store/batch inserts in one statement and returns ids in input order
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db, self.main = load_service("storage", "db", "main",
+                                          database_url=f"sqlite:///{self.tmp.name}/memos.db")
+        self.client = TestClient(self.main.app)
+        # 이미 행이 있어서 id 가 1 부터 시작하지 않는 상태에서 확인
+        self.client.post("/store", json=memo(-1))
+        self.inserts = []
+        event.listen(self.db.engine, "before_cursor_execute", self.record_insert)
+
+    def tearDown(self):
+        event.remove(self.db.engine, "before_cursor_execute", self.record_insert)
+        self.db.engine.dispose()
+        self.tmp.cleanup()
+
+    def record_insert(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("INSERT"):
+            self.inserts.append(statement)
+
+    def test_returned_rows_match_the_input_order(self):
+        memos = [memo(i) for i in range(50)]
+        stored = self.client.post("/store/batch", json={"memos": memos}).json()["memos"]
+
+        self.assertEqual(len(self.inserts), 1)
+        self.assertEqual([row["summary"] for row in stored], [m["summary"] for m in memos])
+        with self.db.engine.connect() as conn:
+            texts = dict(conn.execute(text("SELECT id, original_text FROM memos")).all())
+        self.assertEqual([texts[row["id"]] for row in stored], [m["original_text"] for m in memos])
+        self.assertEqual(len({row["created_at"] for row in stored}), 1)
+
+    def test_order_holds_across_insert_pages(self):
+        # SQLAlchemy 는 1000 행씩 나눠서 INSERT 함
+        memos = [memo(i) for i in range(2500)]
+        stored = self.client.post("/store/batch", json={"memos": memos}).json()["memos"]
+
+        self.assertEqual(len(self.inserts), 3)
+        with self.db.engine.connect() as conn:
+            texts = dict(conn.execute(text("SELECT id, original_text FROM memos")).all())
+        self.assertEqual([texts[row["id"]] for row in stored], [m["original_text"] for m in memos])
+
+    def test_empty_and_oversized_batches(self):
+        self.assertEqual(self.client.post("/store/batch", json={"memos": []}).json(), {"memos": []})
+        self.main.STORE_BATCH_MAX = 2
+        response = self.client.post("/store/batch", json={"memos": [memo(i) for i in range(3)]})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.inserts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import json
+import unittest
+
+from stream_parser import ClassificationStreamParser
+
+
+class TestClassificationStreamParser(unittest.TestCase):
+    """
+    Test incremental parsing of streamed classification JSON
+    """
+
+    def feed_in_chunks(self, doc, size):
+        parser = ClassificationStreamParser()
+        pairs = []
+        for i in range(0, len(doc), size):
+            pairs.extend(parser.feed(doc[i:i + size]))
+        return parser, pairs
+
+    def test_pairs_emitted_in_order(self):
+        result = {
+            "classification": {"1": "AI 개발", "2": "새 \"따옴표\" 카테고리"},
+            "new_categories": ["새 \"따옴표\" 카테고리"],
+        }
+        doc = json.dumps(result, ensure_ascii=False, indent=2)
+        for size in (1, 3, 7, len(doc)):
+            parser, pairs = self.feed_in_chunks(doc, size)
+            self.assertEqual(pairs, [("1", "AI 개발"), ("2", "새 \"따옴표\" 카테고리")])
+            self.assertEqual(json.loads(parser.text()), result)
+
+    def test_ignores_other_objects(self):
+        doc = json.dumps({"meta": {"1": "x"}, "classification": {"1": "y"}, "new_categories": ["z"]})
+        _, pairs = self.feed_in_chunks(doc, 5)
+        self.assertEqual(pairs, [("1", "y")])
+
+    def test_pair_emitted_before_document_closes(self):
+        parser = ClassificationStreamParser()
+        self.assertEqual(parser.feed('{"classification": {"1": "AI'), [])
+        self.assertEqual(parser.feed(' 개발", "2'), [("1", "AI 개발")])
+
+
+if __name__ == '__main__':
+    unittest.main()
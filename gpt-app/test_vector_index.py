@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from vector_index import IVFIndex, dequantize, quantize
+
+
+class TestIVFIndex(unittest.TestCase):
+    """
+    Test int8 storage and IVF search of sentence vectors
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        centers = rng.standard_normal((20, 32)).astype(np.float32)
+        x = centers[np.arange(2000) % 20] + 0.3 * rng.standard_normal((2000, 32)).astype(np.float32)
+        self.x = x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    def test_quantize_roundtrip(self):
+        codes, scales = quantize(self.x)
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertLess(np.abs(dequantize(codes, scales) - self.x).max(), 0.01)
+
+    def test_trained_search_matches_exact_neighbour(self):
+        index = IVFIndex(32, nprobe=4, train_min=500)
+        codes, scales = quantize(self.x)
+        index.add(np.arange(1500), np.ones(1500), codes[:1500], scales[:1500], train=False)
+        index.maybe_retrain(background=False)
+        # 학습 이후 추가된 행은 가장 가까운 리스트에 바로 들어감
+        index.add(np.arange(1500, 2000), np.ones(500), codes[1500:], scales[1500:], train=False)
+
+        hits = index.search(self.x[1990:1991], k=1)[0]
+        self.assertEqual(hits[0][0], 1990)
+        hits = index.search(self.x[1990:1991], k=3, exclude_memo=1990)[0]
+        self.assertNotIn(1990, [memo_id for memo_id, _, _ in hits])
+        self.assertTrue(all(memo_id % 20 == 10 for memo_id, _, _ in hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
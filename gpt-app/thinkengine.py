@@ -1,6 +1,7 @@
-from fastapi import FastAPI, Request
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi import FastAPI, Request, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional
 import openai
 import uuid
 import os
@@ -9,30 +10,75 @@ import json
 import configparser
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import uuid
 import os
 from datetime import datetime
 import json
-from openai import OpenAI
-
-from db import SessionLocal, Memo, Category, MemoCategory, init_db
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response
+import asyncio
+import time
+
+from db import SessionLocal, Memo, Category, MemoCategory, SentenceEmbedding, init_db, get_db
+from sqlalchemy.orm import Session
+from classify_cache import ResultCache, make_cache_key
+from sentence_store import SentenceStore
+from stream_parser import ClassificationStreamParser
+from preclassifier import CentroidClassifier, PRECLASSIFY_ENABLED
+from vector_index import SimilarityIndex, SIMILARITY_ENABLED
+from dedup import FlightConflict, SingleFlight, load_response, store_response
+from job_queue import JobQueue, QueueFull
+from common.category_index import CategoryIndex
+from common.chunking import chunk_line_numbers
+from common.json_repair import loads_repaired
+from common.batching import BATCH_SYSTEM_PROMPT, build_batch_prompt, pack_by_budget, split_batch_result
+from common.llm_backend import get_backend
+from common.keywords import default_engine as keyword_engine, extract_metadata, extract_metadata_batch
+from common import metrics
+from common.metrics import span
 import os
 from datetime import datetime
 import json
 # --- Config ---
-os.getenv("OPENAI_API_KEY")  # 또는 직접 API Key를 입력할 수 있음
+openai_api_key = os.getenv("OPENAI_API_KEY")  # 또는 직접 API Key를 입력할 수 있음
 
 config = configparser.ConfigParser()
 
 # ini 파일 읽기
 config.read('api_key.ini')
 
-# 값 가져오기
-openai_api_key = config['OPENAI_API_KEY']['OPEN_API_KEY']
+# 값 가져오기 (LLM_BACKEND=fake 이면 키 없이도 동작)
+if not openai_api_key and config.has_option('OPENAI_API_KEY', 'OPEN_API_KEY'):
+    openai_api_key = config['OPENAI_API_KEY']['OPEN_API_KEY']
 
 # --- Config ---
-client = OpenAI(api_key=openai_api_key)
+# 동시에 진행할 수 있는 LLM 호출 수와 호출당 타임아웃(초)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# LLM_BACKEND=fake 로 API 없이 지연/출력 분포를 흉내 내는 가짜 백엔드를 쓸 수 있음
+llm_backend = get_backend(openai_api_key, timeout=LLM_TIMEOUT)
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+STRUCTURED_MODEL = "gpt-4o-2024-08-06"
+LEGACY_MODEL = "gpt-4"
+# 프롬프트 문구를 바꾸면 올려서 이전 캐시 결과를 무효화
+PROMPT_VERSION = "2"
+
+# 긴 메모는 청크당 이 토큰 수 이하로 나눠서, 요청당 최대 CHUNK_CONCURRENCY 개씩 동시에 분류
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "3000"))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "8"))
+# 배치 분류 시 한 프롬프트에 묶을 최대 토큰 수
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "6000"))
+BATCH_MAX_MEMOS = int(os.getenv("BATCH_MAX_MEMOS", "100"))
+
+result_cache = ResultCache()
+sentence_store = SentenceStore()
+preclassifier = CentroidClassifier()
+similarity_index = SimilarityIndex()
+inflight = SingleFlight()
+category_index = CategoryIndex(Category)
 
 # --- FastAPI 앱 생성 ---
 app = FastAPI() 
@@ -46,10 +92,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+def on_startup():
+    # 스키마 생성은 요청마다가 아니라 시작 시 한 번만
+    init_db()
+    sentence_store.load()
+    if PRECLASSIFY_ENABLED:
+        preclassifier.load()
+    if SIMILARITY_ENABLED:
+        similarity_index.load()
+    db = SessionLocal()
+    try:
+        category_index.warm(db)
+        # 저장된 메모로 키워드 문서 빈도(DF) 초기화, 이후 저장 시마다 갱신
+        keyword_engine.load(text for (text,) in db.query(Memo.text).yield_per(1000))
+    finally:
+        db.close()
+
 # --- 입력 데이터 모델 ---
 class MemoRequest(BaseModel):
     memo: str
 
+class BatchMemoRequest(BaseModel):
+    memos: List[str] = Field(..., max_length=BATCH_MAX_MEMOS)
+
 # --- 기존 분류 체계 ---
 BASE_CATEGORIES = [
     "AI 개발", "콘텐츠 제작", "마케팅 전략", "개인 회고",
@@ -64,69 +132,23 @@ def is_json_like(s):
     s = s.strip()
     return (s.startswith("{") and s.endswith("}")) or (s.startswith("[") and s.endswith("]"))
 
-def classify_memo(text: str, categories: List[str]) -> Dict:
-    prompt = f"""
-    당신은 분류 전문가입니다. 아래 메모를 문장 단위로 분리하고, 가능한 한 기존 카테고리에 매핑하세요.
-    만약 어떤 문장이 기존 카테고리와 맞지 않는다면, 새로운 카테고리를 생성하되, 중복되지 않고 간결하게 지어주세요.
-
-    기존 카테고리: {', '.join(categories)}
-
-    메모:
-    """
-    for i, line in enumerate(text.strip().splitlines(), 1):
-        prompt += f"{i}. {line}\n"
-
-    prompt += "\n각 문장을 하나의 카테고리로 분류해서 JSON 형식으로 출력하세요. 예시: {1: 'AI 개발', 2: '새로운 카테고리: 콘텐츠 확산 전략'}"
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    content = response.choices[0].message.content.strip()
-    if not is_json_like(content):
-        # Return a helpful error to the frontend
-        raise ValueError(f"LLM did not return JSON. Raw output: {content}")
-    try:
-        content_json = content.replace("'", '"') if "'" in content and '"' not in content else content
-        return json.loads(content_json)
-    except Exception as e:
-        raise ValueError(f"Failed to parse LLM output as JSON: {content}\nError: {e}")
+async def create_completion(**kwargs):
+    """Run a chat completion under the in-flight limit and return the message content."""
+    waited = time.perf_counter()
+    async with llm_semaphore:
+        metrics.stage_seconds.observe(time.perf_counter() - waited, stage="llm_wait")
+        with span("llm"):
+            return await llm_backend.complete(**kwargs)
 
-import re
-def extract_metadata(text):
-    # Fast, simple keyword extraction: unique words (alphanumeric, Korean, etc.)
-    import re
-    summary = text.split('.')[0] if '.' in text else text.split('\n')[0]
-    keywords = list(set(re.findall(r'\w+', text)))[:5]
-    return summary, keywords
-
-
-def classify_memo(text: str, categories: List[str], use_structured_output: bool = True) -> Dict:
-    if use_structured_output:
-        summary, keywords = extract_metadata(text)
-        enriched_text = f"요약: {summary}\n키워드: {', '.join(keywords)}\n{text}"
 
-        schema = {
-    "type": "object",
-    "properties": {
-        "classification": {
-            "type": "object",
-            "description": "Map from sentence number (as string, starting from 1) to category name.",
-            "additionalProperties": { "type": "string" }
-        },
-        "new_categories": {
-            "type": "array",
-            "items": { "type": "string" }
-        }
-    },
-    "required": ["classification", "new_categories"],
-    "additionalProperties": False
-}
-       
-        prompt = f"""
+def structured_messages(text: str) -> List[Dict]:
+    # 청크 분류 결과를 원래 줄 번호로 되돌릴 수 있도록 줄마다 번호를 붙여서 보냄
+    numbered = "\n".join(f"{i}. {line}" for i, line in enumerate(text.strip().splitlines(), 1))
+    prompt = f"""
         당신은 분류 전문가입니다. 아래 메모의 각 문장을 기존 카테고리 중 하나에 분류하거나, 기존 카테고리에 맞지 않으면 새로운 카테고리명을 직접 만들어서 분류하세요.
         아래 JSON 스키마의 키 이름(classification, new_categories)과 구조를 반드시 그대로 사용하세요.
-        각 문장은 1부터 시작하는 번호로 매핑하세요.
+        메모의 각 줄에 붙은 번호(1부터 시작)를 그대로 키로 사용하세요.
 
         반드시 아래와 같은 JSON 형식으로만 응답하세요. 예시:
         {{
@@ -140,25 +162,44 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
         }}
 
         메모:
-        {text}
+        {numbered}
         """
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 JSON 스키마에 맞춰 한국어로만 응답하세요."},
-                {"role": "user", "content": prompt}
-            ],
+    return [
+        {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 JSON 스키마에 맞춰 한국어로만 응답하세요."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+async def stream_completion(**kwargs):
+    """Yield content deltas of a streamed completion, holding an in-flight slot throughout."""
+    waited = time.perf_counter()
+    async with llm_semaphore:
+        metrics.stage_seconds.observe(time.perf_counter() - waited, stage="llm_wait")
+        with span("llm"):
+            async for delta in llm_backend.stream(**kwargs):
+                yield delta
+
+
+async def classify_memo(text: str, categories: List[str], use_structured_output: bool = True) -> Dict:
+    if use_structured_output:
+        with span("prompt_build"):
+            messages = structured_messages(text)
+        content = await create_completion(
+            model=STRUCTURED_MODEL,
+            messages=messages,
             response_format={"type": "json_object"}
         )
-        content = response.choices[0].message.content.strip()
+        content = content.strip()
         try:
-            return json.loads(content)
+            with span("json_parse"):
+                return loads_repaired(content)
         except Exception as e:
             raise ValueError(f"Failed to parse LLM output as JSON: {content}\nError: {e}")
 
 
     else:
-        summary, keywords = extract_metadata(text)
+        with span("extract_metadata"):
+            summary, keywords = extract_metadata(text)
         enriched_text = f"요약: {summary}\n키워드: {', '.join(keywords)}\n{text}"
         
         prompt = f"""
@@ -172,84 +213,533 @@ def classify_memo(text: str, categories: List[str], use_structured_output: bool
         {enriched_text}
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4",
+        content = await create_completion(
+            model=LEGACY_MODEL,
             messages=[
                 {"role": "system", "content": "당신은 메모 분류 전문가입니다. 반드시 JSON 형식으로만 응답하세요. 설명 없이 결과만 출력하세요."},
                 {"role": "user", "content": prompt}
             ]
         )
-        content = response.choices[0].message.content.strip()
+        content = content.strip()
         import re
-        json_match = re.search(r'(\{[\s\S]*\})', content)
-        if not json_match:
-            raise ValueError(f"LLM did not return JSON. Raw output: {content}")
-        json_str = json_match.group(1)
-        json_str = json_str.replace("'", '"') if "'" in json_str and '"' not in json_str else json_str
+        with span("json_repair"):
+            json_match = re.search(r'(\{[\s\S]*\})', content)
+            if not json_match:
+                raise ValueError(f"LLM did not return JSON. Raw output: {content}")
+            json_str = json_match.group(1)
+            json_str = json_str.replace("'", '"') if "'" in json_str and '"' not in json_str else json_str
         try:
-            return json.loads(json_str)
+            with span("json_parse"):
+                return json.loads(json_str)
         except Exception as e:
             raise ValueError(f"Failed to parse LLM output as JSON: {json_str}\nOriginal output: {content}\nError: {e}")
-@app.post("/classify")
-async def classify(request: MemoRequest):
-    summary, keywords = extract_metadata(request.memo)
+
+
+def unseen_line_numbers(lines: List[str], known: Dict[int, str]) -> List[int]:
+    return [idx for idx, line in enumerate(lines, 1) if idx not in known and line.strip()]
+
+
+def merge_partials(known: Dict[int, str], parts: List[Tuple[List[int], Dict]]) -> Dict:
+    """Map classifications of line subsets (each numbered from 1) back onto the full memo.
+
+    parts holds (original line numbers, partial result) pairs; new_categories
+    are concatenated without duplicates.
+    """
+    classification = {str(idx): cat for idx, cat in known.items()}
+    new_categories = []
+    for numbers, partial in parts:
+        partial_map = partial.get("classification", {})
+        for pos, idx in enumerate(numbers, 1):
+            if str(pos) in partial_map:
+                classification[str(idx)] = partial_map[str(pos)]
+        for cat in partial.get("new_categories", []):
+            if cat not in new_categories:
+                new_categories.append(cat)
+    return {
+        "classification": dict(sorted(classification.items(), key=lambda kv: int(kv[0]))),
+        "new_categories": new_categories,
+    }
+
+
+async def classify_unseen_lines(lines: List[str], known: Dict[int, str], categories: List[str]) -> Dict:
+    """Classify the lines not labelled locally, in token-budgeted chunks run concurrently.
+
+    Each chunk is renumbered from 1 for the prompt and mapped back to the
+    original line numbers, so latency is bounded by the slowest chunk.
+    """
+    unseen = unseen_line_numbers(lines, known)
+    chunks = chunk_line_numbers(lines, unseen, CHUNK_TOKEN_BUDGET, STRUCTURED_MODEL)
+    chunk_slots = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def classify_chunk(numbers):
+        async with chunk_slots:
+            return numbers, await classify_memo("\n".join(lines[idx - 1] for idx in numbers), categories)
+
+    parts = await asyncio.gather(*(classify_chunk(numbers) for numbers in chunks))
+    return merge_partials(known, parts)
+
+
+async def stream_unseen_lines(lines: List[str], chunks: List[List[int]],
+                              parts: List[Tuple[List[int], Dict]]):
+    """Stream the chunks' classifications concurrently, yielding (line number, category) as parsed.
+
+    Uses the same chunks as classify_unseen_lines; each finished chunk's
+    result is appended to parts as (line numbers, partial) for merge_partials.
+    """
+    found: asyncio.Queue = asyncio.Queue()
+    chunk_slots = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def stream_chunk(numbers):
+        async with chunk_slots:
+            parser = ClassificationStreamParser()
+            text = "\n".join(lines[idx - 1] for idx in numbers)
+            async for delta in stream_completion(model=STRUCTURED_MODEL, messages=structured_messages(text),
+                                                 response_format={"type": "json_object"}):
+                for n, cat in parser.feed(delta):
+                    # 청크 안의 번호(1부터)를 메모 전체의 줄 번호로 되돌림
+                    if n.isdigit() and 1 <= int(n) <= len(numbers):
+                        await found.put((numbers[int(n) - 1], cat))
+            with span("json_parse"):
+                parts.append((numbers, loads_repaired(parser.text())))
+
+    tasks = [asyncio.ensure_future(stream_chunk(numbers)) for numbers in chunks]
+    finished = asyncio.gather(*tasks)
     try:
-        result = classify_memo(request.memo, BASE_CATEGORIES)
-    except Exception as e:
-        return {"error": str(e), "metadata": {"summary": summary, "keywords": keywords}}
+        while True:
+            next_pair = asyncio.ensure_future(found.get())
+            done, _ = await asyncio.wait({next_pair, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if next_pair in done:
+                yield next_pair.result()
+                continue
+            next_pair.cancel()
+            while not found.empty():
+                yield found.get_nowait()
+            finished.result()
+            return
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def resolve_lines_locally(lines: List[str]):
+    """Label what we can without the LLM: exact reuse first, then confident embedding matches.
+
+    Returns (known, resolution) where resolution lists the line numbers
+    labelled by each local stage.
+    """
+    known = sentence_store.lookup(lines)
+    local = preclassifier.predict(lines, skip=known) if PRECLASSIFY_ENABLED else {}
+    resolution = {"reused": sorted(known), "embedding": sorted(local)}
+    known.update({idx: cat for idx, (cat, _) in local.items()})
+    return known, resolution
 
-    # DB integration
-    init_db()
-    db = SessionLocal()
-    memo_obj = Memo(text=request.memo, created_at=datetime.now(), result_json=result)
+
+def remember_labels(labelled: List[Tuple[str, str]]):
+    sentence_store.update(labelled)
+    if PRECLASSIFY_ENABLED:
+        preclassifier.update(labelled)
+
+
+async def classify_memo_cached(text: str, categories: List[str], use_structured_output: bool = True):
+    """classify_memo behind the result cache, local line resolution and chunking.
+
+    Returns (result, cached, resolution) where resolution lists the lines
+    labelled locally (see resolve_lines_locally) instead of by the LLM.
+    """
+    model = STRUCTURED_MODEL if use_structured_output else LEGACY_MODEL
+    key = make_cache_key(text, categories, model, PROMPT_VERSION, use_structured_output)
+    with span("cache_lookup"):
+        cached = await run_in_threadpool(result_cache.get, key)
+    if cached is not None:
+        return cached, True, {"reused": [], "embedding": []}
+
+    lines = text.strip().splitlines()
+    if use_structured_output:
+        with span("local_resolution"):
+            known, resolution = await run_in_threadpool(resolve_lines_locally, lines)
+        result = await classify_unseen_lines(lines, known, categories)
+    else:
+        resolution = {"reused": [], "embedding": []}
+        result = await classify_memo(text, categories, use_structured_output)
+    await run_in_threadpool(result_cache.set, key, result)
+    return result, False, resolution
+
+
+def add_classification(db, memo_text: str, result: Dict):
+    """Stage a memo and its per-line categories on db without committing.
+
+    Returns (sidebar, labelled, created, embedded): labelled is the (line,
+    category) list for the sentence store, created the new categories to
+    publish to the category index and embedded the sentence vectors for the
+    similarity index, all once the transaction commits.
+    """
+    memo_obj = Memo(text=memo_text, created_at=datetime.now(), result_json=result)
     db.add(memo_obj)
-    db.commit()
-    db.refresh(memo_obj)
+    db.flush()
 
     # Organize sidebar data
     sidebar = {}
-    lines = request.memo.strip().splitlines()
-    if "classification" in result:
-        for idx, line in enumerate(lines, 1):
-            idx_str = str(idx)
-            cat = result["classification"].get(idx_str, "분류 안됨")
-            if cat not in sidebar:
-                sidebar[cat] = []
-            sidebar[cat].append(line)
-            # Save category to DB
-            category_obj = db.query(Category).filter_by(name=cat).first()
-            if not category_obj:
-                category_obj = Category(name=cat)
-                db.add(category_obj)
-                db.commit()
-                db.refresh(category_obj)
-            db.add(MemoCategory(memo_id=memo_obj.id, category_id=category_obj.id, sentence_number=idx, sentence=line))
-    else:
-        for idx, line in enumerate(lines, 1):
+    labelled = []
+    lines = memo_text.strip().splitlines()
+    for idx, line in enumerate(lines, 1):
+        if "classification" in result:
+            tag = result["classification"].get(str(idx), "분류 안됨")
+        else:
             cat = result.get(str(idx), '분류 안됨')
             if cat.startswith("새로운 카테고리: "):
                 tag = cat.replace("새로운 카테고리: ", "")
             else:
                 tag = cat
-            if tag not in sidebar:
-                sidebar[tag] = []
-            sidebar[tag].append(line)
-            # Save category to DB
-            category_obj = db.query(Category).filter_by(name=tag).first()
-            if not category_obj:
-                category_obj = Category(name=tag)
-                db.add(category_obj)
-                db.commit()
-                db.refresh(category_obj)
-            db.add(MemoCategory(memo_id=memo_obj.id, category_id=category_obj.id, sentence_number=idx, sentence=line))
-    db.commit()
-    db.close()
+        if tag not in sidebar:
+            sidebar[tag] = []
+        sidebar[tag].append(line)
+        labelled.append((line, tag))
+
+    # 카테고리는 한 번에 upsert, 문장-카테고리 매핑은 한 번에 bulk insert
+    category_ids, created = category_index.ensure(db, sidebar.keys())
+    if labelled:
+        db.execute(MemoCategory.__table__.insert(), [
+            {"memo_id": memo_obj.id, "category_id": category_ids[tag], "sentence_number": idx, "sentence": line}
+            for idx, (line, tag) in enumerate(labelled, 1)
+        ])
+    embedded = ([], None, None)
+    if SIMILARITY_ENABLED:
+        embedded = similarity_index.embed_rows(memo_obj.id, list(enumerate(lines, 1)))
+        if embedded[0]:
+            db.execute(SentenceEmbedding.__table__.insert(), embedded[0])
+    return sidebar, labelled, created, embedded
+
+
+def save_classification(db: Session, memo_text: str, result: Dict) -> Dict[str, List[str]]:
+    """Persist a classification result and return the sidebar grouping.
+
+    Blocking SQLAlchemy work - call it through run_in_threadpool from async code.
+    """
+    with span("db_write"):
+        sidebar, labelled, created, embedded = add_classification(db, memo_text, result)
+    with span("db_commit"):
+        db.commit()
+    category_index.publish(created)
+    similarity_index.publish(*embedded)
+    remember_labels(labelled)
+    keyword_engine.add_documents([memo_text])
+    return sidebar
+
+
+def save_batch(db: Session, items: List[Tuple[str, Dict]]) -> List[Dict[str, List[str]]]:
+    """Persist several (memo_text, result) pairs in a single transaction."""
+    sidebars, labelled, created, embedded = [], [], {}, []
+    with span("db_write"):
+        for memo_text, result in items:
+            sidebar, memo_labelled, memo_created, memo_embedded = add_classification(db, memo_text, result)
+            sidebars.append(sidebar)
+            labelled.extend(memo_labelled)
+            created.update(memo_created)
+            embedded.append(memo_embedded)
+    with span("db_commit"):
+        db.commit()
+    category_index.publish(created)
+    for memo_embedded in embedded:
+        similarity_index.publish(*memo_embedded)
+    remember_labels(labelled)
+    keyword_engine.add_documents([memo_text for memo_text, _ in items])
+    return sidebars
+
+
+def save_classification_new_session(memo_text: str, result: Dict) -> Dict[str, List[str]]:
+    # 스트리밍 응답이나 공유(single-flight) 작업은 요청 의존성 수명보다 오래 살 수 있으므로 자체 세션 사용
+    db = SessionLocal()
+    try:
+        return save_classification(db, memo_text, result)
+    finally:
+        db.close()
+
+
+async def classify_memo_batch(texts: List[str], categories: List[str]) -> List[Tuple[Dict, str]]:
+    """Classify several memos with one completion. Returns (result, error) per memo."""
+    with span("prompt_build"):
+        prompt = build_batch_prompt(texts, categories)
+    content = await create_completion(
+        model=STRUCTURED_MODEL,
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"}
+    )
+    with span("json_parse"):
+        return split_batch_result(content.strip(), len(texts))
+
+
+async def classify_and_save(memo: str) -> Dict:
+    with span("extract_metadata"):
+        summary, keywords = extract_metadata(memo)
+    try:
+        result, cached, resolution = await classify_memo_cached(memo, BASE_CATEGORIES)
+    except Exception as e:
+        metrics.requests_total.inc(endpoint="/classify", outcome="error")
+        return {"error": str(e), "metadata": {"summary": summary, "keywords": keywords}}
+    metrics.requests_total.inc(endpoint="/classify", outcome="cached" if cached else "ok")
+
+    # DB integration (이벤트 루프를 막지 않도록 스레드풀에서 저장)
+    await run_in_threadpool(save_classification_new_session, memo, result)
 
     return {
     "result": result,
+    "cached": cached,
+    "reused_sentences": len(resolution["reused"]),
+    "locally_resolved": resolution["embedding"],
     "metadata": {"summary": summary, "keywords": keywords}
 }
 
+
+job_queue = JobQueue(classify_and_save)
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+
+async def classify_idempotent(idempotency_key: str, request_hash: str, memo: str) -> Dict:
+    """Replay the response stored for an Idempotency-Key, or classify once and store it."""
+    db = SessionLocal()
+    try:
+        stored = await run_in_threadpool(load_response, db, idempotency_key)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different memo")
+            return stored.response_json
+        response, _ = await inflight.do(request_hash, lambda: classify_and_save(memo))
+        if "error" not in response:
+            await run_in_threadpool(store_response, db, idempotency_key, request_hash, response)
+        return response
+    finally:
+        db.close()
+
+
+@app.post("/classify")
+async def classify(request: MemoRequest, idempotency_key: Optional[str] = Header(None),
+                   run_async: bool = Query(False, alias="async")):
+    if run_async:
+        # 바로 job id 를 돌려주고, 워커가 분류/저장 후 GET /jobs/{id} 로 결과 제공
+        try:
+            job_id = await job_queue.enqueue(request.memo)
+        except QueueFull as e:
+            raise HTTPException(status_code=429, detail=f"Classification queue is full: {e}",
+                                headers={"Retry-After": "5"})
+        return JSONResponse(status_code=202, content={
+            "job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"
+        })
+
+    request_hash = make_cache_key(request.memo, BASE_CATEGORIES, STRUCTURED_MODEL, PROMPT_VERSION, True)
+    if idempotency_key:
+        # 같은 키의 조회/분류/저장은 한 번에 하나만 실행. 처리 중인 키를 다른 메모로 쓰면 거절
+        try:
+            response, _ = await inflight.do(
+                f"idempotency:{idempotency_key}",
+                lambda: classify_idempotent(idempotency_key, request_hash, request.memo), tag=request_hash)
+        except FlightConflict:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different memo")
+        return response
+
+    # 같은 내용의 요청이 동시에 들어오면 하나의 분류 결과를 공유
+    response, _ = await inflight.do(request_hash, lambda: classify_and_save(request.memo))
+    return response
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_threadpool(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/classify/batch")
+async def classify_batch(request: BatchMemoRequest, db: Session = Depends(get_db)):
+    model = STRUCTURED_MODEL
+    keys = [make_cache_key(memo, BASE_CATEGORIES, model, PROMPT_VERSION, True) for memo in request.memos]
+    outcomes = [None] * len(request.memos)  # (result, error, cached)
+
+    pending = []
+    with span("cache_lookup"):
+        cached_results = await run_in_threadpool(result_cache.get_many, keys)
+    for i, cached in enumerate(cached_results):
+        if cached is not None:
+            outcomes[i] = (cached, None, True)
+        else:
+            pending.append(i)
+
+    # 캐시에 없는 메모만 토큰 예산 단위로 묶어서 동시에 분류
+    groups = [[pending[j] for j in group]
+              for group in pack_by_budget([request.memos[i] for i in pending], BATCH_TOKEN_BUDGET)]
+
+    async def run_group(group):
+        try:
+            split = await classify_memo_batch([request.memos[i] for i in group], BASE_CATEGORIES)
+        except Exception as e:
+            split = [(None, str(e))] * len(group)
+        for i, (result, error) in zip(group, split):
+            outcomes[i] = (result, error, False)
+            if result is not None:
+                await run_in_threadpool(result_cache.set, keys[i], result)
+
+    await asyncio.gather(*(run_group(group) for group in groups))
+
+    ok = [i for i, (result, _, _) in enumerate(outcomes) if result is not None]
+    sidebars = {}
+    if ok:
+        try:
+            saved = await run_in_threadpool(save_batch, db, [(request.memos[i], outcomes[i][0]) for i in ok])
+            sidebars = dict(zip(ok, saved))
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            for i in ok:
+                outcomes[i] = (outcomes[i][0], f"Failed to save batch: {e}", outcomes[i][2])
+
+    with span("extract_metadata"):
+        metadata = extract_metadata_batch(request.memos)
+    items = []
+    for i, (result, error, cached) in enumerate(outcomes):
+        metrics.requests_total.inc(endpoint="/classify/batch",
+                                   outcome="error" if error else "cached" if cached else "ok")
+        summary, keywords = metadata[i]
+        item = {"index": i, "metadata": {"summary": summary, "keywords": keywords}}
+        if error:
+            item["error"] = error
+        else:
+            item.update({"result": result, "cached": cached, "sidebar": sidebars.get(i, {})})
+        items.append(item)
+    return {
+        "results": items,
+        "succeeded": sum(1 for item in items if "error" not in item),
+        "failed": sum(1 for item in items if "error" in item),
+    }
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/classify/stream")
+async def classify_stream(request: MemoRequest):
+    """Server-Sent Events variant of /classify.
+
+    Emits a ``category`` event per line as soon as its label is known
+    (locally resolved lines first, then LLM lines as the stream parses them) and a
+    final ``done`` event with result, sidebar and metadata after saving. Long
+    memos are split into the same token-budgeted chunks as /classify and the
+    chunks are streamed concurrently; line numbers are always the memo's own.
+    """
+    memo = request.memo
+    with span("extract_metadata"):
+        summary, keywords = extract_metadata(memo)
+    metadata = {"summary": summary, "keywords": keywords}
+
+    async def events():
+        try:
+            key = make_cache_key(memo, BASE_CATEGORIES, STRUCTURED_MODEL, PROMPT_VERSION, True)
+            with span("cache_lookup"):
+                result = await run_in_threadpool(result_cache.get, key)
+            cached, resolution = result is not None, {"reused": [], "embedding": []}
+            if cached:
+                for n, cat in result.get("classification", {}).items():
+                    yield sse("category", {"line": int(n), "category": cat})
+            else:
+                lines = memo.strip().splitlines()
+                with span("local_resolution"):
+                    known, resolution = await run_in_threadpool(resolve_lines_locally, lines)
+                for idx, cat in known.items():
+                    yield sse("category", {"line": idx, "category": cat})
+
+                # 긴 메모도 /classify 와 같은 토큰 예산 청크로 나눠서 동시에 스트리밍
+                unseen = unseen_line_numbers(lines, known)
+                chunks = chunk_line_numbers(lines, unseen, CHUNK_TOKEN_BUDGET, STRUCTURED_MODEL)
+                parts = []
+                async for line_no, cat in stream_unseen_lines(lines, chunks, parts):
+                    yield sse("category", {"line": line_no, "category": cat})
+                result = merge_partials(known, parts)
+                await run_in_threadpool(result_cache.set, key, result)
+
+            sidebar = await run_in_threadpool(save_classification_new_session, memo, result)
+            metrics.requests_total.inc(endpoint="/classify/stream", outcome="cached" if cached else "ok")
+            yield sse("done", {
+                "result": result,
+                "sidebar": sidebar,
+                "cached": cached,
+                "reused_sentences": len(resolution["reused"]),
+                "locally_resolved": resolution["embedding"],
+                "metadata": metadata,
+            })
+        except Exception as e:
+            metrics.requests_total.inc(endpoint="/classify/stream", outcome="error")
+            yield sse("error", {"error": str(e), "metadata": metadata})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/similar")
+async def similar(memo_id: Optional[int] = None, text: Optional[str] = None,
+                  k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """Top-k saved sentences (and their memos) most similar to a stored memo or to free text."""
+    if not SIMILARITY_ENABLED:
+        raise HTTPException(status_code=503, detail="Similarity index is disabled")
+    if (memo_id is None) == (text is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of memo_id or text")
+    if memo_id is not None:
+        memo = await run_in_threadpool(db.get, Memo, memo_id)
+        if memo is None:
+            raise HTTPException(status_code=404, detail="Memo not found")
+        text = memo.text
+
+    with span("similarity_search"):
+        hits, memos = await run_in_threadpool(similarity_index.similar, text.strip().splitlines(), k, memo_id)
+
+    def describe():
+        # 결과 문장의 원문/카테고리만 조회 (k 개 이하)
+        ids = {m for m, _, _ in hits}
+        rows = (db.query(MemoCategory.memo_id, MemoCategory.sentence_number, MemoCategory.sentence, Category.name)
+                .join(Category, MemoCategory.category_id == Category.id)
+                .filter(MemoCategory.memo_id.in_(ids)).all()) if ids else []
+        previews = dict(db.query(Memo.id, Memo.text).filter(Memo.id.in_(ids)).all()) if ids else {}
+        return {(r.memo_id, r.sentence_number): (r.sentence, r.name) for r in rows}, previews
+
+    sentences, previews = await run_in_threadpool(describe)
+    return {
+        "query": {"memo_id": memo_id} if memo_id is not None else {"text": text},
+        "sentences": [
+            {"memo_id": m, "sentence_number": n, "score": round(score, 4),
+             "sentence": sentences.get((m, n), (None, None))[0], "category": sentences.get((m, n), (None, None))[1]}
+            for m, n, score in hits
+        ],
+        "memos": [
+            {"memo_id": m, "score": round(score, 4), "preview": (previews.get(m) or "")[:100]}
+            for m, score in memos
+        ],
+    }
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # --- 메모 업로드 엔드포인트 ---
 # @app.post("/classify")
 # async def classify(request: MemoRequest):
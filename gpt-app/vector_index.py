@@ -0,0 +1,260 @@
+"""Approximate nearest-neighbour search over saved memo sentences.
+
+Every saved line is embedded (HashingEmbedder at SIMILARITY_DIM) and
+stored int8-quantized with a per-row scale in sentence_embeddings, so a
+million sentences take about SIMILARITY_DIM MB. In memory the rows sit in
+an IVF index: spherical k-means centroids over a sample, one inverted
+list per centroid, and queries score only the SIMILARITY_NPROBE closest
+lists. New rows are appended to their nearest list as they are saved;
+the centroids are retrained in a background thread whenever the index
+has doubled since the last training. Below SIMILARITY_TRAIN_MIN rows the
+search is exact.
+"""
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from db import SessionLocal, SentenceEmbedding
+from embeddings import HashingEmbedder
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "1") == "1"
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", "256"))
+SIMILARITY_NPROBE = int(os.getenv("SIMILARITY_NPROBE", "8"))
+SIMILARITY_TRAIN_MIN = int(os.getenv("SIMILARITY_TRAIN_MIN", "4096"))
+MAX_LISTS = 1024
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: vectors ~= codes * scales[:, None]."""
+    scales = (np.abs(vectors).max(axis=1) / 127.0).astype(np.float32)
+    safe = np.where(scales > 0, scales, 1.0)[:, None]
+    codes = np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    np.divide(x, norms, out=x, where=norms > 0)
+    return x
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    return np.concatenate([(x[i:i + chunk] @ centroids.T).argmax(axis=1)
+                           for i in range(0, len(x), chunk)]) if len(x) else np.zeros(0, dtype=np.int64)
+
+
+def spherical_kmeans(x: np.ndarray, k: int, iters: int = 8, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        labels, starts = np.unique(assign[order], return_index=True)
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        # 비어 있는 클러스터는 임의의 점으로 다시 시작
+        fresh = x[rng.choice(len(x), k, replace=True)].copy()
+        fresh[labels] = sums
+        centroids = _normalize_rows(fresh)
+    return centroids
+
+
+class IVFIndex:
+    def __init__(self, dim: int, nprobe: int = SIMILARITY_NPROBE, train_min: int = SIMILARITY_TRAIN_MIN):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self._codes = np.zeros((1024, dim), dtype=np.int8)
+        self._scales = np.zeros(1024, dtype=np.float32)
+        self._memo_ids = np.zeros(1024, dtype=np.int64)
+        self._numbers = np.zeros(1024, dtype=np.int32)
+        self._size = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: dict = {}
+        self._trained_size = 0
+        self._training = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = len(self._scales)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("_codes", "_scales", "_memo_ids", "_numbers"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add(self, memo_ids, numbers, codes: np.ndarray, scales: np.ndarray, train: bool = True):
+        if len(codes) == 0:
+            return
+        with self._lock:
+            start = self._size
+            self._grow(start + len(codes))
+            end = start + len(codes)
+            self._codes[start:end] = codes
+            self._scales[start:end] = scales
+            self._memo_ids[start:end] = memo_ids
+            self._numbers[start:end] = numbers
+            self._size = end
+            if self._centroids is not None:
+                self._assign(range(start, end), _nearest(dequantize(codes, scales), self._centroids))
+        if train:
+            self.maybe_retrain()
+
+    def _assign(self, rows, lists):
+        for row, lst in zip(rows, lists):
+            self._lists[lst].append(row)
+            self._list_arrays.pop(lst, None)
+
+    def maybe_retrain(self, background: bool = True):
+        with self._lock:
+            due = self._size >= self.train_min and self._size >= 2 * self._trained_size
+            if not due or self._training:
+                return
+            self._training = True
+        if background:
+            threading.Thread(target=self._train, name="ivf-train", daemon=True).start()
+        else:
+            self._train()
+
+    def _train(self):
+        try:
+            with self._lock:
+                n = self._size
+                codes, scales = self._codes, self._scales
+            nlist = int(min(MAX_LISTS, max(16, 4 * np.sqrt(n))))
+            rng = np.random.default_rng(0)
+            sample = rng.choice(n, min(n, 16 * nlist), replace=False)
+            centroids = spherical_kmeans(dequantize(codes[sample], scales[sample]), nlist)
+            assign = np.concatenate([_nearest(dequantize(codes[i:i + 65536], scales[i:i + 65536]), centroids)
+                                     for i in range(0, n, 65536)])
+            lists = [[] for _ in range(nlist)]
+            for lst, rows in self._group(assign):
+                lists[lst] = rows.tolist()
+            with self._lock:
+                # 학습하는 동안 추가된 행도 새 중심에 배정한 뒤 교체
+                extra = range(n, self._size)
+                self._centroids, self._lists, self._list_arrays = centroids, lists, {}
+                if len(extra):
+                    self._assign(extra, _nearest(dequantize(self._codes[n:self._size], self._scales[n:self._size]),
+                                                 centroids))
+                self._trained_size = n
+            logger.info("Trained similarity index: %d rows, %d lists", n, nlist)
+        finally:
+            self._training = False
+
+    @staticmethod
+    def _group(assign):
+        order = np.argsort(assign, kind="stable")
+        labels, starts = np.unique(assign[order], return_index=True)
+        return zip(labels, np.split(order, starts[1:]))
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.arange(self._size)
+        probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        arrays = []
+        for lst in probe:
+            arr = self._list_arrays.get(lst)
+            if arr is None:
+                arr = self._list_arrays[lst] = np.array(self._lists[lst], dtype=np.int64)
+            arrays.append(arr)
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    def search(self, queries: np.ndarray, k: int, exclude_memo: Optional[int] = None):
+        """Top-k (memo_id, sentence_number, score) per query row, best first."""
+        out = []
+        with self._lock:
+            for query in queries:
+                rows = self._candidates(query)
+                if exclude_memo is not None and len(rows):
+                    rows = rows[self._memo_ids[rows] != exclude_memo]
+                if not len(rows):
+                    out.append([])
+                    continue
+                scores = (self._codes[rows].astype(np.float32) @ query) * self._scales[rows]
+                top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                out.append([(int(self._memo_ids[rows[i]]), int(self._numbers[rows[i]]), float(scores[i]))
+                             for i in top])
+        return out
+
+
+class SimilarityIndex:
+    """Embeds sentences at save time, persists them and answers /similar queries."""
+
+    def __init__(self, embedder=None, index: Optional[IVFIndex] = None):
+        self.embedder = embedder or HashingEmbedder(dim=SIMILARITY_DIM)
+        self.index = index or IVFIndex(self.embedder.dim)
+
+    def embed_rows(self, memo_id: int, numbered_lines: List[Tuple[int, str]]):
+        """(rows for sentence_embeddings, codes, scales) for non-empty lines of one memo."""
+        numbered_lines = [(n, line) for n, line in numbered_lines if line.strip()]
+        if not numbered_lines:
+            return [], None, None
+        codes, scales = quantize(self.embedder.encode([line for _, line in numbered_lines]))
+        rows = [{"memo_id": memo_id, "sentence_number": n, "vector": codes[i].tobytes(), "scale": float(scales[i])}
+                for i, (n, _) in enumerate(numbered_lines)]
+        return rows, codes, scales
+
+    def publish(self, rows, codes, scales):
+        """Add committed rows to the in-memory index."""
+        if rows:
+            self.index.add([r["memo_id"] for r in rows], [r["sentence_number"] for r in rows], codes, scales)
+
+    def load(self, batch_size: int = 5000):
+        """Rebuild the in-memory index from sentence_embeddings."""
+        self.index = IVFIndex(self.embedder.dim, self.index.nprobe, self.index.train_min)
+        db = SessionLocal()
+        try:
+            query = (db.query(SentenceEmbedding.memo_id, SentenceEmbedding.sentence_number,
+                              SentenceEmbedding.vector, SentenceEmbedding.scale)
+                     .yield_per(batch_size))
+            batch = []
+            for row in query:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self._add_loaded(batch)
+                    batch = []
+            self._add_loaded(batch)
+        finally:
+            db.close()
+        self.index.maybe_retrain()
+
+    def _add_loaded(self, batch):
+        if not batch:
+            return
+        codes = np.frombuffer(b"".join(r.vector for r in batch), dtype=np.int8).reshape(len(batch), -1)
+        self.index.add([r.memo_id for r in batch], [r.sentence_number for r in batch], codes,
+                       np.array([r.scale for r in batch], dtype=np.float32), train=False)
+
+    def query_vectors(self, lines: List[str]) -> np.ndarray:
+        lines = [line for line in lines if line.strip()]
+        return self.embedder.encode(lines) if lines else np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+    def similar(self, lines: List[str], k: int = 10, exclude_memo: Optional[int] = None):
+        """Best hits over all query lines: ([(memo_id, n, score)] sentences, [(memo_id, score)] memos)."""
+        best = {}
+        for hits in self.index.search(self.query_vectors(lines), k, exclude_memo):
+            for memo_id, n, score in hits:
+                if score > max(0.0, best.get((memo_id, n), 0.0)):
+                    best[(memo_id, n)] = score
+        sentences = sorted(((m, n, s) for (m, n), s in best.items()), key=lambda h: (-h[2], h[0], h[1]))[:k]
+        memos = {}
+        for memo_id, _, score in sentences:
+            memos[memo_id] = max(score, memos.get(memo_id, -1.0))
+        return sentences, sorted(memos.items(), key=lambda kv: (-kv[1], kv[0]))